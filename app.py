@@ -5,7 +5,9 @@ from flask_restful import Api
 from flask_login import LoginManager, login_required
 from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_cors import CORS
-from database import db, ma, migrate
+from database import db, ma, migrate, replica_binds
+from config import config as app_configs
+from utils.db_pool import engine_options
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -21,7 +23,7 @@ app.secret_key = os.environ.get("SESSION_SECRET", "health-app-secret-key")
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
 # Configure CORS to allow requests from any origin
-CORS(app)
+CORS(app, expose_headers=['X-Compacted-Before'])
 
 # Configure the database with fallback to SQLite
 database_url = os.environ.get("DATABASE_URL")
@@ -31,12 +33,18 @@ if not database_url or 'neon.tech' in database_url:
     logging.info("Using SQLite database for development")
 
 app.config["SQLALCHEMY_DATABASE_URI"] = database_url
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+# Connection pool settings for the current FLASK_ENV, see config.py
+environment_config = app_configs.get(os.environ.get("FLASK_ENV", "default"), app_configs["default"])
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(database_url, environment_config.DATABASE_POOL)
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+# Optional read replicas: reads of GET requests go to one of them, while
+# writes, and reads shortly after a client's own write, stay on the primary
+app.config["SQLALCHEMY_BINDS"] = replica_binds(os.environ.get("DATABASE_REPLICA_URLS"))
+app.config["SQLALCHEMY_REPLICA_STICKY_SECONDS"] = float(os.environ.get("DATABASE_REPLICA_STICKY_SECONDS", "5"))
+if app.config["SQLALCHEMY_BINDS"]:
+    logging.info(f"Routing reads to {len(app.config['SQLALCHEMY_BINDS'])} read replica(s)")
+
 # Initialize the app with the extensions
 db.init_app(app)
 ma.init_app(app)
@@ -62,14 +70,34 @@ with app.app_context():
     # Import models
     import models  # noqa: F401
 
-    # Create database tables - force recreation with new schema
+    # Create missing database tables. DATABASE_RESET_ON_STARTUP=true drops
+    # and recreates them all instead (development only: it wipes every row,
+    # including the reminder queue and its leases, each time a process starts)
     try:
-        db.drop_all()  # Drop existing tables first
-        db.create_all()  # Create with new schema including user_id columns
-        logging.info("Database tables recreated successfully with new schema")
+        if os.environ.get("DATABASE_RESET_ON_STARTUP", "false").lower() in ("true", "1", "yes"):
+            db.drop_all()  # Drop existing tables first
+            db.create_all()  # Create with new schema including user_id columns
+            logging.info("Database tables recreated successfully with new schema")
+        else:
+            db.create_all()  # Only creates missing tables
     except Exception as e:
         logging.error(f"Could not create database tables: {e}")
         raise
+
+    # Optional monthly partitioning of health_metric and medication_log (PostgreSQL only)
+    from services.partition_service import partition_tables, partitioning_enabled, supports_partitioning
+    if partitioning_enabled():
+        with db.engine.begin() as connection:
+            if supports_partitioning(connection):
+                partition_tables(connection)
+            else:
+                logging.info(f"DATABASE_PARTITIONING is ignored on {connection.dialect.name}")
+
+    # Decide once whether repositories are served by the database or the JSON
+    # store, and fail over to the JSON store when the database stops answering
+    from utils.helpers import repository_registry
+    repository_registry.resolve()
+    repository_registry.watch(db.engine)
     
     # API Documentation
     @app.route('/api/docs')
@@ -125,20 +153,25 @@ with app.app_context():
     app.register_blueprint(auth_bp)
 
 # These imports are below app.app_context to avoid circular imports
-from resources.medication import MedicationResource, MedicationListResource, MedicationLogResource, MedicationStatusResource
-from resources.health_metrics import HealthMetricResource, HealthMetricListResource
+from resources.medication import MedicationResource, MedicationListResource, MedicationLogResource, MedicationLogBatchResource, MedicationLogSummaryResource, MedicationStatusResource
+from resources.health_metrics import HealthMetricResource, HealthMetricListResource, HealthMetricBatchResource, HealthMetricSummaryResource
 from resources.appointment import AppointmentResource, AppointmentListResource, AppointmentStatusResource
 from resources.reminder import ReminderResource, ReminderListResource
 from resources.notification import NotificationListResource, NotificationResource, NotificationTestResource, NotificationSettingsResource
+from resources.metrics import PoolMetricsResource
 
 # Register API endpoints
 api.add_resource(MedicationListResource, '/api/medications')
 api.add_resource(MedicationResource, '/api/medications/<int:medication_id>')
 api.add_resource(MedicationStatusResource, '/api/medications/<int:medication_id>/status')
 api.add_resource(MedicationLogResource, '/api/medications/<int:medication_id>/logs')
+api.add_resource(MedicationLogBatchResource, '/api/medications/<int:medication_id>/logs/batch')
+api.add_resource(MedicationLogSummaryResource, '/api/medications/<int:medication_id>/logs/summary')
 
 api.add_resource(HealthMetricListResource, '/api/health-metrics')
 api.add_resource(HealthMetricResource, '/api/health-metrics/<int:metric_id>')
+api.add_resource(HealthMetricBatchResource, '/api/health-metrics/batch')
+api.add_resource(HealthMetricSummaryResource, '/api/health-metrics/summary')
 
 api.add_resource(AppointmentListResource, '/api/appointments')
 api.add_resource(AppointmentResource, '/api/appointments/<int:appointment_id>')
@@ -148,21 +181,28 @@ api.add_resource(ReminderListResource, '/api/reminders')
 api.add_resource(ReminderResource, '/api/reminders/<int:reminder_id>')
 
 api.add_resource(NotificationListResource, '/api/notifications')
-api.add_resource(NotificationResource, '/api/notifications/<string:notification_id>')
+api.add_resource(NotificationResource, '/api/notifications/<int:notification_id>')
 api.add_resource(NotificationTestResource, '/api/notifications/test')
 api.add_resource(NotificationSettingsResource, '/api/notifications/settings')
 
+api.add_resource(PoolMetricsResource, '/api/metrics/pool')
+
 # Import and register chatbot resources
 from resources.chatbot import ChatbotResource, ChatbotHealthTipsResource, ChatbotStatusResource
 api.add_resource(ChatbotResource, '/api/chatbot')
 api.add_resource(ChatbotHealthTipsResource, '/api/chatbot/tips', '/api/chatbot/tips/<string:category>')
 api.add_resource(ChatbotStatusResource, '/api/chatbot/status')
 
-# Initialize notification service
+# Initialize notification service; with REMINDER_WORKER=external, reminders are
+# delivered by `python -m services.reminder_worker` and the web tier only
+# enqueues and cancels them
 with app.app_context():
     try:
         from services.notification_service import notification_service
-        notification_service.initialize_all_reminders()
-        logging.info("Notification service initialized and reminders scheduled")
+        if os.environ.get("REMINDER_WORKER", "embedded") == "embedded":
+            notification_service.initialize_all_reminders()
+            logging.info("Notification service initialized and reminders scheduled")
+        else:
+            logging.info("Reminders are delivered by the reminder worker")
     except Exception as e:
         logging.error(f"Failed to initialize notification service: {e}")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold loads of JSON vs binary snapshots in utils.data_loader.
+
+Writes synthetic reminder and health metric collections to a temporary data
+store in both formats (the binary one through export_snapshots, i.e. the
+JSON importer), then times a cold load of each: reading and parsing the
+snapshot into the cache, as on startup or after another process rewrote it.
+Also times decoding every timestamp afterwards and reports the file sizes.
+
+Usage:
+    python benchmarks/binary_snapshot.py [--rows 10000 100000]
+"""
+import argparse
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import data_loader  # noqa: E402
+
+def _make_reminders(count):
+    start = datetime(2025, 1, 1, 8, 0)
+    return [
+        {
+            'id': i,
+            'reminder_type': 'medication',
+            'target_id': i % 50,
+            'title': f'Reminder {i}',
+            'message': 'Time to take your medication',
+            'reminder_time': start + timedelta(hours=i),
+            'repeat_interval': 'daily',
+            'is_active': True,
+            'notification_method': 'app',
+            'created_at': start,
+            'updated_at': start,
+        }
+        for i in range(count)
+    ]
+
+def _make_health_metrics(count):
+    start = datetime(2025, 1, 1, 8, 0)
+    return [
+        {
+            'id': i,
+            'metric_type': ('blood_pressure', 'glucose', 'weight')[i % 3],
+            'value': f'{120 + i % 20}/{80 + i % 10}' if i % 3 == 0 else str(90 + i % 40),
+            'unit': ('mmHg', 'mg/dL', 'kg')[i % 3],
+            'recorded_at': start + timedelta(minutes=15 * i),
+            'notes': None,
+        }
+        for i in range(count)
+    ]
+
+def _timed(func):
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+def _cold_load(data_type):
+    data_loader.invalidate_cache(data_type)
+    return data_loader._get_collection(data_type)
+
+def run(count):
+    store = tempfile.mkdtemp(prefix='binary-snapshot-bench-')
+    data_loader.STORE_DIR = store
+    previous_format = os.environ.get('JSON_SNAPSHOT_FORMAT')
+    try:
+        os.environ['JSON_SNAPSHOT_FORMAT'] = 'json'
+        data_loader.save_dummy_data(_make_reminders(count), 'reminders')
+        data_loader.save_dummy_data(_make_health_metrics(count), 'health_metrics')
+        for data_type in ('reminders', 'health_metrics'):
+            data_loader.export_snapshots('binary', data_type)
+
+        for data_type, fields in (('reminders', ('reminder_time', 'created_at', 'updated_at')),
+                                  ('health_metrics', ('recorded_at',))):
+            results = {}
+            for snapshot_format in ('json', 'binary'):
+                os.environ['JSON_SNAPSHOT_FORMAT'] = snapshot_format
+                load, rows = _timed(lambda: _cold_load(data_type))
+                decode, _ = _timed(lambda: [[row[field] for field in fields] for row in rows.values()])
+                size = os.path.getsize(data_loader._snapshot_path(data_type, snapshot_format))
+                results[snapshot_format] = (load, decode, size)
+            (json_load, json_decode, json_size), (bin_load, bin_decode, bin_size) = results['json'], results['binary']
+            print(f"{count:>7} {data_type:<15} load: json {json_load * 1000:8.1f} ms  binary {bin_load * 1000:8.1f} ms "
+                  f"({json_load / bin_load:4.1f}x)   +decode timestamps: json {json_decode * 1000:7.1f} ms  "
+                  f"binary {bin_decode * 1000:7.1f} ms   size: json {json_size / 1e6:6.2f} MB  "
+                  f"binary {bin_size / 1e6:6.2f} MB")
+    finally:
+        if previous_format is None:
+            os.environ.pop('JSON_SNAPSHOT_FORMAT', None)
+        else:
+            os.environ['JSON_SNAPSHOT_FORMAT'] = previous_format
+        data_loader.invalidate_cache()
+        shutil.rmtree(store, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+    for count in args.rows:
+        run(count)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark the JSON data store under N concurrent writer processes.
+
+Each writer creates health metrics through JsonHealthMetricRepository against
+a private copy of data/dummy_data.json. At the end the script checks that no
+write was lost and that all IDs are unique, and reports the throughput.
+
+Usage:
+    python benchmarks/json_concurrent_writers.py [--writers 1 2 4 8] [--writes 200] [--mode snapshot|journal]
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import data_loader  # noqa: E402
+
+def _use_data_dir(data_dir):
+    """Point the data loader at the files inside ``data_dir``."""
+    data_loader.DATA_FILE = os.path.join(data_dir, 'dummy_data.json')
+    data_loader.STORE_DIR = os.path.join(data_dir, 'json_store')
+    data_loader.invalidate_cache()
+
+def _writer(data_dir, writes):
+    _use_data_dir(data_dir)
+    from utils.json_repository import JsonHealthMetricRepository
+    for i in range(writes):
+        JsonHealthMetricRepository.create({'metric_type': 'glucose', 'value': 90 + i % 40, 'unit': 'mg/dL'})
+
+def run(writers, writes, source_file):
+    data_dir = tempfile.mkdtemp(prefix='json-bench-')
+    try:
+        shutil.copy(source_file, os.path.join(data_dir, 'dummy_data.json'))
+        _use_data_dir(data_dir)
+        initial = len(data_loader.load_dummy_data('health_metrics'))
+
+        processes = [multiprocessing.Process(target=_writer, args=(data_dir, writes)) for _ in range(writers)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        data_loader.invalidate_cache()
+        metrics = data_loader.load_dummy_data('health_metrics')
+        ids = [m['id'] for m in metrics]
+        expected = initial + writers * writes
+        lost = expected - len(metrics)
+        duplicates = len(ids) - len(set(ids))
+        print(f"{writers:>3} writers  {writers * writes:>6} writes  {elapsed:8.2f}s  "
+              f"{writers * writes / elapsed:9.1f} writes/s  lost={lost} duplicate_ids={duplicates}")
+        return lost == 0 and duplicates == 0
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--writes', type=int, default=200, help='writes per writer')
+    parser.add_argument('--mode', choices=['snapshot', 'journal'], default='snapshot')
+    args = parser.parse_args()
+
+    os.environ['JSON_STORAGE_MODE'] = args.mode
+    source_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'dummy_data.json')
+
+    print(f"JSON store, {args.mode} mode")
+    ok = all([run(writers, args.writes, source_file) for writers in args.writers])
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark lazy timestamp decoding in utils.data_loader.
+
+Compares the eager approach (fromisoformat on every temporal field at load,
+full recursive re-encoding on save) with LazyRecord (fields decoded on first
+access, untouched rows saved in the form they were read) on synthetic
+reminder collections, then times the public read paths on a temporary data
+store: a cold and a warm load_dummy_data('reminders'), and a warm
+JsonReminderRepository.get_all(). A warm read must cost far less than the
+cold one, which parses the file.
+
+Usage:
+    python benchmarks/lazy_records.py [--rows 10000 100000]
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import data_loader, json_repository  # noqa: E402
+from utils.data_loader import _parse_record, _convert_datetime_to_str  # noqa: E402
+
+def _make_reminders(count):
+    start = datetime(2025, 1, 1, 8, 0)
+    return [
+        {
+            'id': i,
+            'reminder_type': 'medication',
+            'target_id': i % 50,
+            'title': f'Reminder {i}',
+            'message': 'Time to take your medication',
+            'reminder_time': (start + timedelta(hours=i)).isoformat(),
+            'repeat_interval': 'daily',
+            'is_active': True,
+            'notification_method': 'app',
+            'created_at': start.isoformat(),
+            'updated_at': start.isoformat(),
+        }
+        for i in range(count)
+    ]
+
+def _eager_parse(records):
+    for record in records:
+        record['reminder_time'] = datetime.fromisoformat(record['reminder_time'])
+        record['created_at'] = datetime.fromisoformat(record['created_at'])
+        record['updated_at'] = datetime.fromisoformat(record['updated_at'])
+    return records
+
+def _timed(func):
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+def _best_of(func, repeat=3):
+    return min(_timed(func)[0] for _ in range(repeat))
+
+def run_public(count):
+    """Time the data store's public readers, which hand out plain dicts."""
+    store_dir = tempfile.mkdtemp(prefix='lazy-records-')
+    data_loader.STORE_DIR = store_dir
+    data_loader.DATA_FILE = os.path.join(store_dir, 'dummy_data.json')
+    try:
+        data_loader.save_dummy_data(_make_reminders(count), 'reminders')
+        data_loader.invalidate_cache()
+        cold, _ = _timed(lambda: data_loader.load_dummy_data('reminders'))
+        warm = _best_of(lambda: data_loader.load_dummy_data('reminders'))
+        json_repository.JsonReminderRepository.get_all()
+        repository = _best_of(json_repository.JsonReminderRepository.get_all)
+    finally:
+        data_loader.invalidate_cache()
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+    print(f"{count:>7} rows  load_dummy_data: cold {cold * 1000:8.1f} ms  warm {warm * 1000:8.1f} ms   "
+          f"JsonReminderRepository.get_all: warm {repository * 1000:8.1f} ms")
+
+def run(count):
+    payload = json.dumps(_make_reminders(count))
+
+    # json.loads itself costs the same for both, so only the conversion is timed
+    raw = json.loads(payload)
+    eager_load, eager = _timed(lambda: _eager_parse(raw))
+    raw = json.loads(payload)
+    lazy_load, lazy = _timed(lambda: [_parse_record('reminders', r) for r in raw])
+
+    # Typical list endpoint: only ids and titles are needed
+    eager_read, _ = _timed(lambda: [(r['id'], r['title']) for r in eager])
+    lazy_read, _ = _timed(lambda: [(r['id'], r['title']) for r in lazy])
+
+    # Touch 1% of the rows, then encode everything for saving
+    for rows in (eager, lazy):
+        for record in rows[::100]:
+            record['updated_at'] = datetime.utcnow()
+    eager_save, _ = _timed(lambda: _convert_datetime_to_str(eager))
+    lazy_save, _ = _timed(lambda: _convert_datetime_to_str(lazy))
+
+    print(f"{count:>7} rows  decode: eager {eager_load * 1000:8.1f} ms  lazy {lazy_load * 1000:8.1f} ms   "
+          f"read id/title: eager {eager_read * 1000:6.1f} ms  lazy {lazy_read * 1000:6.1f} ms   "
+          f"save: eager {eager_save * 1000:8.1f} ms  lazy {lazy_save * 1000:8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+    for count in args.rows:
+        run(count)
+    for count in args.rows:
+        run_public(count)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark scheduling reminders with threading.Timer vs services.scheduler.HeapScheduler.
+
+For each approach, schedules reminders due an hour from now and reports
+the thread count, resident and virtual memory growth and the time taken.
+The heap scheduler is also timed cancelling and rescheduling, and firing
+a batch of reminders that are already due.
+
+Starting 100k OS threads usually runs into the process's thread limit,
+so the Timer baseline defaults to fewer reminders and its memory is also
+extrapolated to --reminders.
+
+Usage:
+    python benchmarks/reminder_scheduler.py [--reminders 100000] [--timers 5000]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.scheduler import HeapScheduler  # noqa: E402
+
+def _memory_kb():
+    """Return (resident, virtual) memory of this process in kB (Linux)."""
+    values = {}
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(('VmRSS:', 'VmSize:')):
+                    name, value = line.split(':')
+                    values[name] = int(value.split()[0])
+    except OSError:
+        pass
+    return values.get('VmRSS', 0), values.get('VmSize', 0)
+
+def _noop(reminder_id):
+    pass
+
+def _report(label, count, seconds, before, after, threads):
+    rss = after[0] - before[0]
+    vms = after[1] - before[1]
+    print(f"{label:<22} {count:>8} reminders  {seconds * 1000:>9.1f} ms  "
+          f"threads {threads:>6}  RSS +{rss / 1024:>8.1f} MB  virtual +{vms / 1024:>10.1f} MB")
+    return rss, vms
+
+def bench_timers(count):
+    due_in = 3600
+    before = _memory_kb()
+    start = time.perf_counter()
+    timers = []
+    try:
+        for reminder_id in range(count):
+            timer = threading.Timer(due_in, _noop, args=[reminder_id])
+            timer.daemon = True
+            timer.start()
+            timers.append(timer)
+    except RuntimeError as e:
+        print(f"threading.Timer: stopped after {len(timers)} threads ({e})")
+    seconds = time.perf_counter() - start
+    result = _report('threading.Timer', len(timers), seconds, before, _memory_kb(), threading.active_count())
+    for timer in timers:
+        timer.cancel()
+    for timer in timers:
+        timer.join()
+    return len(timers), result
+
+def bench_heap(count):
+    scheduler = HeapScheduler(name='benchmark-scheduler')
+    due = datetime.utcnow() + timedelta(hours=1)
+    before = _memory_kb()
+    start = time.perf_counter()
+    for reminder_id in range(count):
+        scheduler.schedule(reminder_id, due + timedelta(seconds=reminder_id % 86400), _noop, reminder_id)
+    seconds = time.perf_counter() - start
+    result = _report('HeapScheduler', count, seconds, before, _memory_kb(), threading.active_count())
+
+    changed = min(count, 10000)
+    start = time.perf_counter()
+    for reminder_id in range(changed):
+        scheduler.reschedule(reminder_id, due + timedelta(minutes=reminder_id % 60))
+    print(f"  reschedule {changed}: {(time.perf_counter() - start) * 1000:.1f} ms")
+    start = time.perf_counter()
+    for reminder_id in range(changed):
+        scheduler.cancel(reminder_id)
+    print(f"  cancel {changed}: {(time.perf_counter() - start) * 1000:.1f} ms, {len(scheduler)} left")
+
+    # Fire a batch that is already due, on top of everything still scheduled
+    fired = threading.Semaphore(0)
+    start = time.perf_counter()
+    for reminder_id in range(changed):
+        scheduler.schedule(('due', reminder_id), datetime.utcnow(), fired.release)
+    for _ in range(changed):
+        fired.acquire()
+    print(f"  fire {changed} due reminders: {(time.perf_counter() - start) * 1000:.1f} ms")
+    scheduler.stop(timeout=5)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reminders', type=int, default=100000)
+    parser.add_argument('--timers', type=int, default=5000,
+                        help='Reminders for the threading.Timer baseline')
+    args = parser.parse_args()
+
+    print(f"Baseline: {threading.active_count()} threads\n")
+    timers, (timer_rss, timer_vms) = bench_timers(args.timers)
+    bench_heap(args.reminders)
+    if timers and timers < args.reminders:
+        scale = args.reminders / timers
+        print(f"\nthreading.Timer extrapolated to {args.reminders}: {args.reminders} threads, "
+              f"RSS +{timer_rss * scale / 1024:.0f} MB, virtual +{timer_vms * scale / 1024:.0f} MB")
+
+if __name__ == '__main__':
+    main()
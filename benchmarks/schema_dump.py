@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark serializing list responses with marshmallow vs the compiled dumpers.
+
+Builds synthetic medications (with logs), health metrics, appointments and
+reminders as ORM objects and serializes them three ways:
+
+    fresh     a new schema per call, as the resources used to do
+    cached    a schema from schemas.get_schema, reused across calls
+    compiled  utils.serialization.dump_list with FAST_SERIALIZATION=true
+
+Also checks that the compiled output is identical to schema.dump.
+
+Usage:
+    python benchmarks/schema_dump.py [--rows 10000]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, date, timedelta
+from datetime import time as time_of_day
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Medication, MedicationLog, HealthMetric, Appointment, Reminder  # noqa: E402
+from schemas import (  # noqa: E402
+    MedicationSchema, HealthMetricSchema, AppointmentSchema, ReminderSchema, get_schema,
+)
+from utils.serialization import dump_list  # noqa: E402
+
+START = datetime(2025, 1, 1, 8, 0)
+
+def _rows(count):
+    medications = []
+    for i in range(1, count + 1):
+        medication = Medication(
+            id=i, user_id=1, name=f'Medication {i}', dosage='10mg', frequency='once_daily',
+            intake_time='08:00', special_instructions='Take with food', status='active',
+            notes='Notes ' * 10, created_at=START, updated_at=START,
+        )
+        medication.logs = [
+            MedicationLog(id=i * 10 + j, user_id=1, medication_id=i, status='taken',
+                          taken_at=START + timedelta(days=j))
+            for j in range(3)
+        ]
+        medications.append(medication)
+    return {
+        'medications (no logs)': (MedicationSchema, {'exclude': ('logs',)}, medications),
+        'medications (3 logs)': (MedicationSchema, {}, medications),
+        'health_metrics': (HealthMetricSchema, {}, [
+            HealthMetric(id=i, user_id=1, metric_type='blood_pressure', value=120.0, unit='mmHg',
+                         recorded_at=START + timedelta(minutes=i), systolic=120.0, diastolic=80.0)
+            for i in range(1, count + 1)
+        ]),
+        'appointments': (AppointmentSchema, {}, [
+            Appointment(id=i, user_id=1, title=f'Appointment {i}', doctor_name='Dr. Smith',
+                        date=date(2025, 1, 1) + timedelta(days=i % 365), time=time_of_day(9, 30),
+                        status='scheduled', created_at=START, updated_at=START)
+            for i in range(1, count + 1)
+        ]),
+        'reminders': (ReminderSchema, {}, [
+            Reminder(id=i, user_id=1, reminder_type='medication', target_id=i, title=f'Reminder {i}',
+                     message='Time to take your medication', reminder_time=START + timedelta(hours=i),
+                     repeat_interval='daily', is_active=True, notification_method='app',
+                     created_at=START, updated_at=START)
+            for i in range(1, count + 1)
+        ]),
+    }
+
+def _best(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    args = parser.parse_args()
+
+    for name, (schema_class, options, rows) in _rows(args.rows).items():
+        schema = get_schema(schema_class, many=True, **options)
+        os.environ['FAST_SERIALIZATION'] = 'true'
+        if dump_list(schema, rows) != schema.dump(rows):
+            parser.exit(1, f'{name}: compiled output differs from schema.dump\n')
+
+        fresh = _best(lambda: schema_class(many=True, **options).dump(rows))
+        cached = _best(lambda: schema.dump(rows))
+        compiled = _best(lambda: dump_list(schema, rows))
+        os.environ.pop('FAST_SERIALIZATION')
+        print(f"{args.rows} {name:<22} fresh {fresh * 1000:8.1f} ms  cached {cached * 1000:8.1f} ms  "
+              f"compiled {compiled * 1000:8.1f} ms ({cached / compiled:4.1f}x)")
+
+if __name__ == '__main__':
+    main()
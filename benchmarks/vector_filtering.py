@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark NumPy vs pure-Python filtering in the JSON repositories.
+
+Runs the same filtered get_all calls (health metrics by type and date range,
+appointments by status and date range, reminders by type, state and time
+window) against synthetic collections of increasing size, once with the
+NumPy path disabled and once forced on, and reports the time per query and
+the one-off cost of building the NumPy columns after a change. The point
+where NumPy starts winning is the sensible JSON_VECTOR_FILTER_MIN_ROWS.
+
+Usage:
+    python benchmarks/vector_filtering.py [--rows 100 500 1000 2000 5000 20000 100000]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, date, timedelta
+from datetime import time as time_of_day
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import data_loader  # noqa: E402
+from utils import json_repository  # noqa: E402
+from utils.vector_filter import NUMPY_AVAILABLE  # noqa: E402
+
+START = datetime(2025, 1, 1, 8, 0)
+
+def _populate(count):
+    rng = random.Random(count)
+    data_loader.save_dummy_data([
+        {
+            'id': i,
+            'metric_type': rng.choice(('blood_pressure', 'glucose', 'weight')),
+            'value': rng.randint(60, 180),
+            'unit': 'mg/dL',
+            'recorded_at': START + timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+        }
+        for i in range(1, count + 1)
+    ], 'health_metrics')
+    data_loader.save_dummy_data([
+        {
+            'id': i,
+            'title': f'Appointment {i}',
+            'status': rng.choice(('scheduled', 'completed', 'cancelled')),
+            'date': date(2025, 1, 1) + timedelta(days=rng.randint(0, 365)),
+            'time': time_of_day(rng.randint(8, 17), rng.choice((0, 15, 30, 45))),
+        }
+        for i in range(1, count + 1)
+    ], 'appointments')
+    data_loader.save_dummy_data([
+        {
+            'id': i,
+            'title': f'Reminder {i}',
+            'reminder_type': rng.choice(('medication', 'appointment', 'custom')),
+            'is_active': rng.random() < 0.8,
+            'reminder_time': START + timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+        }
+        for i in range(1, count + 1)
+    ], 'reminders')
+
+QUERIES = (
+    ('health_metrics', json_repository.JsonHealthMetricRepository,
+     {'metric_type': 'glucose', 'from_date': '2025-03-01', 'to_date': '2025-03-07'}),
+    ('appointments', json_repository.JsonAppointmentRepository,
+     {'status': 'scheduled', 'from_date': '2025-03-01', 'to_date': '2025-03-07'}),
+    ('reminders', json_repository.JsonReminderRepository,
+     {'reminder_type': 'medication', 'is_active': 'true',
+      'from_time': '2025-03-01T00:00:00', 'to_time': '2025-03-07T23:59:59'}),
+)
+
+def _per_query(func, repeat):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def run(count):
+    store = tempfile.mkdtemp(prefix='vector-filter-bench-')
+    data_loader.STORE_DIR = store
+    try:
+        _populate(count)
+        repeat = max(3, 20000 // count)
+        for name, repository, filters in QUERIES:
+            collection = getattr(json_repository, f'_{name}')
+            os.environ['JSON_VECTOR_FILTER_MIN_ROWS'] = str(count + 1)
+            python = _per_query(lambda: repository.get_all(filters), repeat)
+            os.environ['JSON_VECTOR_FILTER_MIN_ROWS'] = '0'
+            vector = _per_query(lambda: repository.get_all(filters), repeat)
+
+            def rebuild():
+                collection._frame = None
+                collection.vector_frame()
+            build = _per_query(rebuild, max(1, repeat // 10))
+            print(f"{count:>7} {name:<15} python {python * 1000:8.3f} ms  numpy {vector * 1000:8.3f} ms "
+                  f"({python / vector:5.1f}x)   column build after a change {build * 1000:8.2f} ms")
+    finally:
+        os.environ.pop('JSON_VECTOR_FILTER_MIN_ROWS', None)
+        data_loader.invalidate_cache()
+        shutil.rmtree(store, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 500, 1000, 2000, 5000, 20000, 100000])
+    args = parser.parse_args()
+    if not NUMPY_AVAILABLE:
+        parser.exit(1, "NumPy is not installed (pip install numpy)\n")
+    for count in args.rows:
+        run(count)
+
+if __name__ == '__main__':
+    main()
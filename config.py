@@ -1,5 +1,8 @@
 import os
 
+from database import replica_binds
+from utils.db_pool import engine_options
+
 class Config:
     """Base configuration."""
     # Use environment variables with fallbacks
@@ -8,10 +11,21 @@ class Config:
     # Database configuration
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///health_management.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {
+    
+    # Connection pool per environment; DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    # DB_POOL_RECYCLE and DB_POOL_PRE_PING override these
+    DATABASE_POOL = {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
         "pool_recycle": 300,
         "pool_pre_ping": True,
     }
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI, DATABASE_POOL)
+    
+    # Read replicas for GET requests and how long a client reads from the primary after writing
+    SQLALCHEMY_BINDS = replica_binds(os.environ.get('DATABASE_REPLICA_URLS'))
+    SQLALCHEMY_REPLICA_STICKY_SECONDS = float(os.environ.get('DATABASE_REPLICA_STICKY_SECONDS', '5'))
     
     # API settings
     API_TITLE = 'Health Management API'
@@ -25,6 +39,15 @@ class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     SQLALCHEMY_ECHO = True
+    
+    DATABASE_POOL = {
+        "pool_size": 2,
+        "max_overflow": 5,
+        "pool_timeout": 30,
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(Config.SQLALCHEMY_DATABASE_URI, DATABASE_POOL)
 
 class ProductionConfig(Config):
     """Production configuration."""
@@ -35,11 +58,24 @@ class ProductionConfig(Config):
     SESSION_COOKIE_HTTPONLY = True
     REMEMBER_COOKIE_SECURE = True
     REMEMBER_COOKIE_HTTPONLY = True
+    
+    # Per gunicorn worker process, so the database must allow
+    # workers * (pool_size + max_overflow) connections; fail fast instead of
+    # queueing requests behind an exhausted pool
+    DATABASE_POOL = {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(Config.SQLALCHEMY_DATABASE_URI, DATABASE_POOL)
 
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI, Config.DATABASE_POOL)
 
 # Configuration dictionary
 config = {
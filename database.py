@@ -1,13 +1,99 @@
 """Database initialization and configuration module."""
+import random
+import time
+
+from flask import current_app, has_request_context, request, session as flask_session
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_marshmallow import Marshmallow
 from flask_migrate import Migrate
+from sqlalchemy import event
 from sqlalchemy.orm import DeclarativeBase
 
+# Bind keys of read replicas in SQLALCHEMY_BINDS start with this prefix
+REPLICA_BIND_PREFIX = 'replica'
+
+# Flask session key holding the time until which a client's reads go to the primary
+PRIMARY_UNTIL_KEY = '_db_primary_until'
+
+# Request methods whose queries may be served by a replica
+READ_METHODS = ('GET', 'HEAD')
+
+def replica_binds(urls):
+    """
+    Build SQLALCHEMY_BINDS entries for read replicas.
+
+    Args:
+        urls (str): Comma-separated database URLs, e.g. from DATABASE_REPLICA_URLS.
+
+    Returns:
+        dict: {'replica_0': url, 'replica_1': url, ...}
+    """
+    urls = [url.strip() for url in (urls or '').split(',') if url.strip()]
+    return {f'{REPLICA_BIND_PREFIX}_{i}': url for i, url in enumerate(urls)}
+
+class RoutingSession(Session):
+    """
+    Session that sends the reads of GET requests to a read replica.
+
+    A SELECT goes to a replica when all of these hold:
+
+    - replicas are configured (SQLALCHEMY_BINDS keys starting with 'replica')
+    - it runs while handling a GET or HEAD request
+    - it is not a SELECT ... FOR UPDATE and not part of a flush
+    - this session has not written anything yet
+    - the client has not written anything in the last
+      SQLALCHEMY_REPLICA_STICKY_SECONDS (read-your-writes)
+
+    Everything else, including every write and commit, uses the primary. One
+    replica is picked per session, so a request never mixes replicas.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._reads_from_replica(clause):
+            replica = self._replica()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self, clause):
+        if clause is None or not getattr(clause, 'is_select', False):
+            return False
+        if getattr(clause, '_for_update_arg', None) is not None:
+            return False
+        if self._flushing or self.info.get('primary_only'):
+            return False
+        if not has_request_context() or request.method not in READ_METHODS:
+            return False
+        return flask_session.get(PRIMARY_UNTIL_KEY, 0) <= time.time()
+
+    def _replica(self):
+        if 'replica' not in self.info:
+            replicas = [engine for key, engine in self._db.engines.items()
+                        if key and key.startswith(REPLICA_BIND_PREFIX)]
+            self.info['replica'] = random.choice(replicas) if replicas else None
+        return self.info['replica']
+
+def _mark_written(session):
+    """Send the rest of this session, and the client's next reads, to the primary."""
+    session.info['primary_only'] = True
+    if has_request_context() and session._replica() is not None:
+        sticky_seconds = current_app.config.get('SQLALCHEMY_REPLICA_STICKY_SECONDS', 5)
+        flask_session[PRIMARY_UNTIL_KEY] = time.time() + sticky_seconds
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    _mark_written(session)
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _after_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_written(orm_execute_state.session)
+
 class Base(DeclarativeBase):
     pass
 
 # Initialize extensions
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
 ma = Marshmallow()
-migrate = Migrate()
\ No newline at end of file
+migrate = Migrate()
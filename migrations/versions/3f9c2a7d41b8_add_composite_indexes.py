@@ -0,0 +1,43 @@
+"""Add composite indexes for the per-user list queries
+
+Revision ID: 3f9c2a7d41b8
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+The tables themselves are created by db.create_all() at startup (which also
+creates these indexes on a fresh database), so this revision only adds the
+indexes to existing databases and skips any that are already there.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d41b8'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns)
+INDEXES = (
+    ('ix_medication_user_id_status', 'medication', ['user_id', 'status']),
+    ('ix_medication_log_medication_id_user_id_taken_at', 'medication_log', ['medication_id', 'user_id', 'taken_at']),
+    ('ix_health_metric_user_id_recorded_at', 'health_metric', ['user_id', 'recorded_at']),
+    ('ix_health_metric_user_id_metric_type_recorded_at', 'health_metric', ['user_id', 'metric_type', 'recorded_at']),
+    ('ix_appointment_user_id_date_time', 'appointment', ['user_id', 'date', 'time']),
+    ('ix_appointment_user_id_status_date_time', 'appointment', ['user_id', 'status', 'date', 'time']),
+    ('ix_reminder_user_id_reminder_time', 'reminder', ['user_id', 'reminder_time']),
+    ('ix_reminder_user_id_reminder_type_reminder_time', 'reminder', ['user_id', 'reminder_type', 'reminder_time']),
+    ('ix_reminder_is_active_reminder_time', 'reminder', ['is_active', 'reminder_time']),
+)
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,60 @@
+"""Add rollup tables for compacted health metrics and medication logs
+
+Revision ID: 8b1e5d3c9a27
+Revises: 3f9c2a7d41b8
+Create Date: 2026-10-17 12:00:00.000000
+
+Fresh databases get these tables from db.create_all() at startup; this
+revision adds them to existing databases and skips any that are already there.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e5d3c9a27'
+down_revision = '3f9c2a7d41b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'health_metric_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('metric_type', sa.String(length=50), nullable=False),
+        sa.Column('granularity', sa.String(length=10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('unit', sa.String(length=20), nullable=True),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('min_value', sa.Float(), nullable=True),
+        sa.Column('max_value', sa.Float(), nullable=True),
+        sa.Column('sum_value', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'metric_type', 'granularity', 'bucket_start',
+                            name='uq_health_metric_rollup_bucket'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'medication_log_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('medication_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('first_at', sa.DateTime(), nullable=True),
+        sa.Column('last_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('medication_id', 'user_id', 'day', 'status', name='uq_medication_log_rollup_day'),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_table('medication_log_rollup', if_exists=True)
+    op.drop_table('health_metric_rollup', if_exists=True)
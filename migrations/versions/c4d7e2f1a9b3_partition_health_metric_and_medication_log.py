@@ -0,0 +1,33 @@
+"""Partition health_metric and medication_log by month on PostgreSQL
+
+Revision ID: c4d7e2f1a9b3
+Revises: 8b1e5d3c9a27
+Create Date: 2026-10-17 15:00:00.000000
+
+Only applies when DATABASE_PARTITIONING is enabled and the database is
+PostgreSQL; otherwise the plain tables are kept. Both tables are rebuilt
+with every row copied, so run it in a maintenance window. To enable
+partitioning after this revision was applied without it, downgrade to
+8b1e5d3c9a27 and upgrade again with DATABASE_PARTITIONING=true.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from services.partition_service import partition_tables, partitioning_enabled, unpartition_tables
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d7e2f1a9b3'
+down_revision = '8b1e5d3c9a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if partitioning_enabled():
+        partition_tables(op.get_bind())
+
+
+def downgrade():
+    unpartition_tables(op.get_bind())
@@ -0,0 +1,45 @@
+"""Add due-queue lease columns to reminder
+
+Revision ID: d5e8f3a2b6c4
+Revises: c4d7e2f1a9b3
+Create Date: 2026-10-17 18:00:00.000000
+
+Fresh databases get these columns from db.create_all() at startup; this
+revision adds them to existing databases and skips any that are already there.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e8f3a2b6c4'
+down_revision = 'c4d7e2f1a9b3'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    sa.Column('lease_owner', sa.String(length=100), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+    sa.Column('last_fired_at', sa.DateTime(), nullable=True),
+)
+
+
+def _existing_columns():
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns('reminder')}
+
+
+def upgrade():
+    existing = _existing_columns()
+    with op.batch_alter_table('reminder') as batch_op:
+        for column in COLUMNS:
+            if column.name not in existing:
+                batch_op.add_column(column.copy())
+
+
+def downgrade():
+    existing = _existing_columns()
+    with op.batch_alter_table('reminder') as batch_op:
+        for column in reversed(COLUMNS):
+            if column.name in existing:
+                batch_op.drop_column(column.name)
@@ -0,0 +1,48 @@
+"""Add notification table for web push notifications
+
+Revision ID: e6f9a4b3c7d5
+Revises: d5e8f3a2b6c4
+Create Date: 2026-10-17 20:00:00.000000
+
+Web push notifications used to be kept in data/notifications.json, shared by
+every user; they are short-lived, so the file's contents are not migrated.
+Fresh databases get this table from db.create_all() at startup; this revision
+adds it to existing databases and skips it if it is already there.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f9a4b3c7d5'
+down_revision = 'd5e8f3a2b6c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'notification',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('reminder_id', sa.Integer(), nullable=True),
+        sa.Column('type', sa.String(length=20), nullable=False),
+        sa.Column('title', sa.String(length=100), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('read', sa.Boolean(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_notification_user_id_read_timestamp', 'notification',
+                    ['user_id', 'read', 'timestamp'], if_not_exists=True)
+    op.create_index('ix_notification_timestamp', 'notification', ['timestamp'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_notification_timestamp', table_name='notification', if_exists=True)
+    op.drop_index('ix_notification_user_id_read_timestamp', table_name='notification', if_exists=True)
+    op.drop_table('notification', if_exists=True)
@@ -51,6 +51,11 @@ class Medication(db.Model):
     # Relationship to medication logs
     logs = db.relationship('MedicationLog', backref='medication', lazy=True, cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Medication list, optionally by status
+        db.Index('ix_medication_user_id_status', 'user_id', 'status'),
+    )
+    
     def __repr__(self):
         return f'<Medication {self.name}>'
 
@@ -63,6 +68,11 @@ class MedicationLog(db.Model):
     status = db.Column(db.String(20), default='taken')  # 'taken', 'skipped', 'missed'
     notes = db.Column(db.Text, nullable=True)
     
+    __table_args__ = (
+        # Logs of one medication, in the order they were taken
+        db.Index('ix_medication_log_medication_id_user_id_taken_at', 'medication_id', 'user_id', 'taken_at'),
+    )
+    
     def __repr__(self):
         return f'<MedicationLog {self.medication_id} - {self.taken_at}>'
 
@@ -80,6 +90,12 @@ class HealthMetric(db.Model):
     systolic = db.Column(db.Float, nullable=True)  # Only for blood pressure
     diastolic = db.Column(db.Float, nullable=True)  # Only for blood pressure
     
+    __table_args__ = (
+        # Metric list newest first, with or without a metric type filter
+        db.Index('ix_health_metric_user_id_recorded_at', 'user_id', 'recorded_at'),
+        db.Index('ix_health_metric_user_id_metric_type_recorded_at', 'user_id', 'metric_type', 'recorded_at'),
+    )
+    
     def __repr__(self):
         return f'<HealthMetric {self.metric_type} - {self.value} {self.unit}>'
 
@@ -98,6 +114,12 @@ class Appointment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Appointment list by date and time, with or without a status filter
+        db.Index('ix_appointment_user_id_date_time', 'user_id', 'date', 'time'),
+        db.Index('ix_appointment_user_id_status_date_time', 'user_id', 'status', 'date', 'time'),
+    )
+    
     def __repr__(self):
         return f'<Appointment {self.title} - {self.date}>'
 
@@ -116,5 +138,86 @@ class Reminder(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Due-queue lease: the worker delivering this reminder, and until when (see services/reminder_queue.py)
+    lease_owner = db.Column(db.String(100), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    last_fired_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        # Reminder list by time, with or without a type filter
+        db.Index('ix_reminder_user_id_reminder_time', 'user_id', 'reminder_time'),
+        db.Index('ix_reminder_user_id_reminder_type_reminder_time', 'user_id', 'reminder_type', 'reminder_time'),
+        # Due and upcoming active reminders, claimed from the due-queue
+        db.Index('ix_reminder_is_active_reminder_time', 'is_active', 'reminder_time'),
+    )
+    
     def __repr__(self):
         return f'<Reminder {self.title} - {self.reminder_time}>'
+
+# Health Metric Rollup Model: hourly and daily aggregates of raw health metrics
+# older than the retention horizon (see services/rollup_service.py)
+class HealthMetricRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    metric_type = db.Column(db.String(50), nullable=False)
+    granularity = db.Column(db.String(10), nullable=False)  # 'hour', 'day'
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    unit = db.Column(db.String(20), nullable=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    min_value = db.Column(db.Float, nullable=True)
+    max_value = db.Column(db.Float, nullable=True)
+    sum_value = db.Column(db.Float, nullable=True)  # mean = sum_value / count
+    
+    __table_args__ = (
+        # One row per bucket; also serves range queries per user and metric type
+        db.UniqueConstraint('user_id', 'metric_type', 'granularity', 'bucket_start',
+                            name='uq_health_metric_rollup_bucket'),
+    )
+    
+    @property
+    def mean_value(self):
+        return self.sum_value / self.count if self.count and self.sum_value is not None else None
+    
+    def __repr__(self):
+        return f'<HealthMetricRollup {self.metric_type} {self.granularity} {self.bucket_start}>'
+
+# Medication Log Rollup Model: daily counts per status of medication logs
+# older than the retention horizon
+class MedicationLogRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    medication_id = db.Column(db.Integer, nullable=False)  # Rollups are removed with their medication
+    day = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False)  # 'taken', 'skipped', 'missed'
+    count = db.Column(db.Integer, nullable=False, default=0)
+    first_at = db.Column(db.DateTime, nullable=True)
+    last_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('medication_id', 'user_id', 'day', 'status', name='uq_medication_log_rollup_day'),
+    )
+    
+    def __repr__(self):
+        return f'<MedicationLogRollup {self.medication_id} {self.day} {self.status}>'
+
+# Notification Model: web push notifications waiting to be shown in the browser
+class Notification(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    reminder_id = db.Column(db.Integer, nullable=True)  # Kept after the reminder is deleted
+    type = db.Column(db.String(20), nullable=False, default='reminder')  # 'reminder', 'test'
+    title = db.Column(db.String(100), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    data = db.Column(db.JSON, nullable=True)  # The reminder's details, for the browser
+    read = db.Column(db.Boolean, nullable=False, default=False)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # A user's unread notifications, newest first
+        db.Index('ix_notification_user_id_read_timestamp', 'user_id', 'read', 'timestamp'),
+        # Expired notifications, removed by the TTL cleanup
+        db.Index('ix_notification_timestamp', 'timestamp'),
+    )
+    
+    def __repr__(self):
+        return f'<Notification {self.title} - {self.timestamp}>'
@@ -6,12 +6,20 @@ from datetime import datetime, date
 
 from database import db
 from models import Appointment
-from schemas import AppointmentSchema
+from schemas import AppointmentSchema, get_schema
+from utils.fieldsets import load_fields, parse_fields
+from utils.pagination import paginate, pagination_requested
+from utils.serialization import dump_list
 
 class AppointmentListResource(Resource):
     @login_required
     def get(self):
-        """Get all appointments for current user"""
+        """Get all appointments for current user, or one page of them if limit/cursor is given"""
+        try:
+            fields = parse_fields(request.args, AppointmentSchema)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
         # Filter by status if provided
         status = request.args.get('status')
         from_date = request.args.get('from_date')
@@ -35,12 +43,23 @@ class AppointmentListResource(Resource):
                 query = query.filter(Appointment.date <= to_date_obj)
             except ValueError:
                 return {'message': 'Invalid to_date format. Use YYYY-MM-DD'}, 400
+        
+        query = load_fields(query, Appointment, fields, required=(Appointment.date, Appointment.time, Appointment.id))
+        appointment_schema = get_schema(AppointmentSchema, many=True, only=fields)
+        
+        if pagination_requested(request.args):
+            try:
+                appointments, next_cursor = paginate(
+                    query, (Appointment.date, Appointment.time, Appointment.id), request.args
+                )
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            return {'items': dump_list(appointment_schema, appointments), 'next_cursor': next_cursor}
             
         # Order by date and time
         appointments = query.order_by(Appointment.date.asc(), Appointment.time.asc()).all()
         
-        appointment_schema = AppointmentSchema(many=True)
-        return appointment_schema.dump(appointments)
+        return dump_list(appointment_schema, appointments)
     
     @login_required
     def post(self):
@@ -51,7 +70,7 @@ class AppointmentListResource(Resource):
             return {'message': 'No input data provided'}, 400
             
         try:
-            appointment_schema = AppointmentSchema()
+            appointment_schema = get_schema(AppointmentSchema)
             appointment = appointment_schema.load(json_data)
             appointment.user_id = current_user.id
             
@@ -67,13 +86,19 @@ class AppointmentListResource(Resource):
 class AppointmentResource(Resource):
     @login_required
     def get(self, appointment_id):
-        """Get an appointment by ID for current user"""
-        appointment = Appointment.query.filter_by(id=appointment_id, user_id=current_user.id).first()
+        """Get an appointment by ID for current user, limited to the fields given in ?fields= if any"""
+        try:
+            fields = parse_fields(request.args, AppointmentSchema)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
+        query = Appointment.query.filter_by(id=appointment_id, user_id=current_user.id)
+        appointment = load_fields(query, Appointment, fields).first()
         
         if not appointment:
             return {'message': 'Appointment not found'}, 404
             
-        appointment_schema = AppointmentSchema()
+        appointment_schema = get_schema(AppointmentSchema, only=fields)
         return appointment_schema.dump(appointment)
     
     @login_required
@@ -90,7 +115,7 @@ class AppointmentResource(Resource):
             return {'message': 'Appointment not found'}, 404
             
         try:
-            appointment_schema = AppointmentSchema(partial=True)
+            appointment_schema = get_schema(AppointmentSchema, partial=True)
             appointment_data = appointment_schema.load(json_data, instance=appointment)
             
             db.session.commit()
@@ -130,5 +155,5 @@ class AppointmentStatusResource(Resource):
         appointment.status = json_data['status']
         db.session.commit()
         
-        appointment_schema = AppointmentSchema()
+        appointment_schema = get_schema(AppointmentSchema)
         return appointment_schema.dump(appointment)
\ No newline at end of file
@@ -2,29 +2,84 @@ from flask import request, jsonify
 from flask_restful import Resource
 from flask_login import login_required, current_user
 from marshmallow import ValidationError
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from database import db
 from models import HealthMetric
-from schemas import HealthMetricSchema
+from schemas import HealthMetricSchema, get_schema
+from services.rollup_service import GRANULARITIES, health_metrics_compacted_before, summarize_health_metrics
+from utils.batch import (
+    batch_response, delete_rows, find_existing, insert_rows, parse_batch, update_rows, validate_ids, validate_rows,
+    validate_updates
+)
+from utils.fieldsets import load_fields, parse_fields
+from utils.pagination import paginate, pagination_requested
+from utils.serialization import dump_list
 
 class HealthMetricListResource(Resource):
     @login_required
     def get(self):
-        """Get all health metrics for current user"""
+        """
+        Get all health metrics for current user, or one page of them if limit/cursor is given.
+
+        Optional from_date/to_date (YYYY-MM-DD, inclusive) limit the range
+        of recorded_at; on a partitioned table only those months are scanned.
+        Readings older than the retention horizon are only kept as rollups:
+        when the range reaches back before them, the X-Compacted-Before
+        header (and 'compacted_before' in a page) gives the time before which
+        the list is incomplete and /api/health-metrics/summary covers it.
+        """
+        try:
+            fields = parse_fields(request.args, HealthMetricSchema)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
         # Filter by metric type if provided
         metric_type = request.args.get('type')
+        from_date = request.args.get('from_date')
+        to_date = request.args.get('to_date')
         
         query = HealthMetric.query.filter_by(user_id=current_user.id)
         
         if metric_type:
             query = query.filter_by(metric_type=metric_type)
+        
+        start = None
+        try:
+            if from_date:
+                start = datetime.strptime(from_date, '%Y-%m-%d')
+                query = query.filter(HealthMetric.recorded_at >= start)
+            if to_date:
+                end = datetime.strptime(to_date, '%Y-%m-%d') + timedelta(days=1)
+                query = query.filter(HealthMetric.recorded_at < end)
+        except ValueError:
+            return {'message': 'Invalid date format. Use YYYY-MM-DD'}, 400
+        
+        query = load_fields(query, HealthMetric, fields, required=(HealthMetric.recorded_at, HealthMetric.id))
+        metric_schema = get_schema(HealthMetricSchema, many=True, only=fields)
+        
+        # Older readings were compacted into rollups and are missing from the list
+        compacted_before = health_metrics_compacted_before(current_user.id, metric_type)
+        if compacted_before is not None and start is not None and start >= compacted_before:
+            compacted_before = None
+        headers = {'X-Compacted-Before': compacted_before.isoformat()} if compacted_before else {}
+        
+        if pagination_requested(request.args):
+            try:
+                metrics, next_cursor = paginate(
+                    query, (HealthMetric.recorded_at, HealthMetric.id), request.args, descending=True
+                )
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            page = {'items': dump_list(metric_schema, metrics), 'next_cursor': next_cursor}
+            if compacted_before:
+                page['compacted_before'] = compacted_before.isoformat()
+            return page, 200, headers
             
         # Order by most recent first
         metrics = query.order_by(HealthMetric.recorded_at.desc()).all()
         
-        metric_schema = HealthMetricSchema(many=True)
-        return metric_schema.dump(metrics)
+        return dump_list(metric_schema, metrics), 200, headers
     
     @login_required
     def post(self):
@@ -35,7 +90,7 @@ class HealthMetricListResource(Resource):
             return {'message': 'No input data provided'}, 400
             
         try:
-            metric_schema = HealthMetricSchema()
+            metric_schema = get_schema(HealthMetricSchema)
             metric = metric_schema.load(json_data)
             metric.user_id = current_user.id
             
@@ -51,13 +106,19 @@ class HealthMetricListResource(Resource):
 class HealthMetricResource(Resource):
     @login_required
     def get(self, metric_id):
-        """Get a health metric by ID for current user"""
-        metric = HealthMetric.query.filter_by(id=metric_id, user_id=current_user.id).first()
+        """Get a health metric by ID for current user, limited to the fields given in ?fields= if any"""
+        try:
+            fields = parse_fields(request.args, HealthMetricSchema)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
+        query = HealthMetric.query.filter_by(id=metric_id, user_id=current_user.id)
+        metric = load_fields(query, HealthMetric, fields).first()
         
         if not metric:
             return {'message': 'Health metric not found'}, 404
             
-        metric_schema = HealthMetricSchema()
+        metric_schema = get_schema(HealthMetricSchema, only=fields)
         return metric_schema.dump(metric)
     
     @login_required
@@ -74,7 +135,7 @@ class HealthMetricResource(Resource):
             return {'message': 'Health metric not found'}, 404
             
         try:
-            metric_schema = HealthMetricSchema(partial=True)
+            metric_schema = get_schema(HealthMetricSchema, partial=True)
             metric_data = metric_schema.load(json_data, instance=metric)
             
             db.session.commit()
@@ -95,4 +156,122 @@ class HealthMetricResource(Resource):
             
         db.session.delete(metric)
         db.session.commit()
-        return '', 204
\ No newline at end of file
+        return '', 204
+
+class HealthMetricBatchResource(Resource):
+    @login_required
+    def post(self):
+        """
+        Create many health metrics for current user in one transaction.
+
+        Every row is validated; the valid ones are inserted with a single
+        multi-row INSERT and the response lists the result of each row. With
+        atomic=true nothing is inserted unless every row is valid.
+        """
+        try:
+            rows = parse_batch(request.get_json(silent=True))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
+        metric_schema = get_schema(HealthMetricSchema, load_instance=False, exclude=('id',))
+        valid, errors = validate_rows(metric_schema, rows, {'user_id': current_user.id})
+        if errors and request.args.get('atomic', 'false').lower() in ['true', '1', 'yes']:
+            valid = []
+        
+        try:
+            ids = insert_rows(HealthMetric, [data for _, data in valid]) if valid else []
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'message': str(e)}, 500
+        
+        return batch_response(len(rows), valid, errors, ids)
+    
+    @login_required
+    def put(self):
+        """
+        Update many of current user's health metrics in one transaction.
+
+        Each row holds the 'id' of a metric and the fields to change. Rows
+        that are invalid or name no metric of the user are reported and
+        skipped; with atomic=true nothing is changed unless every row applies.
+        """
+        try:
+            rows = parse_batch(request.get_json(silent=True))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
+        metric_schema = get_schema(HealthMetricSchema, load_instance=False, partial=True)
+        valid, errors = validate_updates(metric_schema, rows)
+        valid, missing = find_existing(HealthMetric, valid, HealthMetric.user_id == current_user.id)
+        if (errors or missing) and request.args.get('atomic', 'false').lower() in ['true', '1', 'yes']:
+            valid = []
+        
+        try:
+            if valid:
+                update_rows(HealthMetric, [data for _, data in valid])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'message': str(e)}, 500
+        
+        return batch_response(len(rows), valid, errors, [data['id'] for _, data in valid], 'updated', missing)
+    
+    @login_required
+    def delete(self):
+        """
+        Delete many of current user's health metrics, given as a list of IDs, in one transaction.
+
+        IDs naming no metric of the user are reported and skipped; with
+        atomic=true nothing is deleted unless every ID can be.
+        """
+        try:
+            rows = parse_batch(request.get_json(silent=True))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
+        valid, errors = validate_ids(rows)
+        valid, missing = find_existing(HealthMetric, valid, HealthMetric.user_id == current_user.id)
+        if (errors or missing) and request.args.get('atomic', 'false').lower() in ['true', '1', 'yes']:
+            valid = []
+        
+        ids = [data['id'] for _, data in valid]
+        try:
+            if ids:
+                delete_rows(HealthMetric, ids)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'message': str(e)}, 500
+        
+        return batch_response(len(rows), valid, errors, ids, 'deleted', missing)
+
+class HealthMetricSummaryResource(Resource):
+    @login_required
+    def get(self):
+        """
+        Get hourly or daily statistics (count, min, max, mean) of current user's health metrics.
+
+        Long ranges are served from the rollups of compacted readings and the
+        raw readings that are still kept, so the whole history is covered.
+        Query arguments: type, from_date and to_date (YYYY-MM-DD, inclusive),
+        granularity ('hour' or 'day'; by default 'day' for ranges over a week).
+        """
+        metric_type = request.args.get('type')
+        from_date = request.args.get('from_date')
+        to_date = request.args.get('to_date')
+        
+        try:
+            start = datetime.strptime(from_date, '%Y-%m-%d') if from_date else None
+            end = datetime.strptime(to_date, '%Y-%m-%d') + timedelta(days=1) if to_date else None
+        except ValueError:
+            return {'message': 'Invalid date format. Use YYYY-MM-DD'}, 400
+        
+        granularity = request.args.get('granularity')
+        if granularity is None:
+            short_range = start is not None and end is not None and end - start <= timedelta(days=7)
+            granularity = 'hour' if short_range else 'day'
+        if granularity not in GRANULARITIES:
+            return {'message': f"granularity must be one of {', '.join(GRANULARITIES)}"}, 400
+        
+        return summarize_health_metrics(current_user.id, metric_type, start, end, granularity)
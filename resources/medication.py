@@ -3,18 +3,150 @@ from flask_restful import Resource
 from flask_login import login_required, current_user
 from marshmallow import ValidationError
 from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from database import db
-from models import Medication, MedicationLog
-from schemas import MedicationSchema, MedicationLogSchema
+from models import Medication, MedicationLog, MedicationLogRollup
+from schemas import MedicationSchema, MedicationLogSchema, get_schema
+from utils.batch import (
+    batch_response, delete_rows, find_existing, insert_rows, parse_batch, update_rows, validate_ids, validate_rows,
+    validate_updates
+)
+from utils.fieldsets import load_fields, parse_fields, schema_fields
+from utils.pagination import paginate, pagination_requested
+from utils.serialization import dump_list
+from services.rollup_service import medication_logs_compacted_before, summarize_medication_logs
+
+def _parse_log_options(args, fields=None):
+    """
+    Read the log options of the medication list from the request's query arguments.
+
+    Asking for the 'logs' field in a sparse fieldset counts as include=logs.
+
+    Returns:
+        tuple: (include logs, most recent logs per medication or None for all)
+
+    Raises:
+        ValueError: If 'logs_limit' is not a positive integer.
+    """
+    include = 'logs' in [part.strip() for part in args.get('include', '').split(',')]
+    include = include or (fields is not None and 'logs' in fields)
+    logs_limit = args.get('logs_limit')
+    if not include or logs_limit is None:
+        return include, None
+    try:
+        logs_limit = int(logs_limit)
+    except (TypeError, ValueError):
+        raise ValueError('logs_limit must be a positive integer')
+    if logs_limit < 1:
+        raise ValueError('logs_limit must be a positive integer')
+    return include, logs_limit
+
+def _load_recent_logs(medications, user_id, logs_limit):
+    """
+    Attach the most recent ``logs_limit`` logs to each medication with one query.
+
+    Logs are ranked per medication with ROW_NUMBER() and only the top ones are
+    fetched. They are set as the loaded value of ``Medication.logs`` without
+    being recorded as a change, so nothing is deleted on the next flush.
+    """
+    rank = func.row_number().over(
+        partition_by=MedicationLog.medication_id,
+        order_by=(MedicationLog.taken_at.desc(), MedicationLog.id.desc()),
+    ).label('rank')
+    ranked = db.session.query(MedicationLog, rank).filter(
+        MedicationLog.medication_id.in_([medication.id for medication in medications]),
+        MedicationLog.user_id == user_id,
+    ).subquery()
+    recent_log = aliased(MedicationLog, ranked)
+    logs = db.session.query(recent_log).filter(ranked.c.rank <= logs_limit).order_by(
+        ranked.c.medication_id, ranked.c.rank
+    ).all()
+
+    by_medication = {medication.id: [] for medication in medications}
+    for log in logs:
+        by_medication[log.medication_id].append(log)
+    for medication in medications:
+        set_committed_value(medication, 'logs', by_medication[medication.id])
+
+def _last_taken(medications, user_id):
+    """
+    Return {medication id: time of the latest 'taken' log}.
+
+    Uses one grouped query over the raw logs and one over the daily rollups,
+    for medications whose recent logs have all been compacted.
+    """
+    if not medications:
+        return {}
+    medication_ids = [medication.id for medication in medications]
+    last_taken = dict(db.session.query(MedicationLog.medication_id, func.max(MedicationLog.taken_at)).filter(
+        MedicationLog.medication_id.in_(medication_ids),
+        MedicationLog.user_id == user_id,
+        MedicationLog.status == 'taken',
+    ).group_by(MedicationLog.medication_id).all())
+    rolled_up = db.session.query(MedicationLogRollup.medication_id, func.max(MedicationLogRollup.last_at)).filter(
+        MedicationLogRollup.medication_id.in_([i for i in medication_ids if i not in last_taken]),
+        MedicationLogRollup.user_id == user_id,
+        MedicationLogRollup.status == 'taken',
+    ).group_by(MedicationLogRollup.medication_id).all() if len(last_taken) < len(medication_ids) else []
+    last_taken.update(rolled_up)
+    return last_taken
+
+def _dump_medications(medications, include_logs, logs_limit, fields=None):
+    """
+    Serialize a list of medications with a last_taken_at summary.
+
+    Logs are only included when requested: all of them loaded with a single
+    SELECT ... IN query, or the most recent ``logs_limit`` per medication.
+    With a sparse fieldset, only the requested fields are returned.
+    """
+    if include_logs and logs_limit is not None and medications:
+        _load_recent_logs(medications, current_user.id, logs_limit)
+    
+    medication_schema = get_schema(
+        MedicationSchema, many=True, only=schema_fields(fields, MedicationSchema), exclude=() if include_logs else ('logs',)
+    )
+    results = dump_list(medication_schema, medications)
+    if fields is not None and 'last_taken_at' not in fields:
+        return results
+    last_taken = _last_taken(medications, current_user.id)
+    for medication, result in zip(medications, results):
+        taken_at = last_taken.get(medication.id)
+        result['last_taken_at'] = taken_at.isoformat() if taken_at else None
+    return results
 
 class MedicationListResource(Resource):
     @login_required
     def get(self):
-        """Get all medications for current user"""
-        medications = Medication.query.filter_by(user_id=current_user.id).all()
-        medication_schema = MedicationSchema(many=True)
-        return medication_schema.dump(medications)
+        """
+        Get all medications for current user, or one page of them if limit/cursor is given.
+
+        Each medication carries a last_taken_at summary instead of its logs;
+        pass include=logs for the logs, and logs_limit=N for only the N most
+        recent per medication. fields=a,b,c returns only the listed fields.
+        """
+        try:
+            fields = parse_fields(request.args, MedicationSchema, extra=('last_taken_at',))
+            include_logs, logs_limit = _parse_log_options(request.args, fields)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
+        query = Medication.query.filter_by(user_id=current_user.id)
+        query = load_fields(query, Medication, fields, required=(Medication.id,))
+        if include_logs and logs_limit is None:
+            query = query.options(selectinload(Medication.logs))
+        
+        if pagination_requested(request.args):
+            try:
+                medications, next_cursor = paginate(query, (Medication.id,), request.args)
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            return {'items': _dump_medications(medications, include_logs, logs_limit, fields), 'next_cursor': next_cursor}
+        
+        medications = query.all()
+        return _dump_medications(medications, include_logs, logs_limit, fields)
     
     @login_required
     def post(self):
@@ -25,7 +157,7 @@ class MedicationListResource(Resource):
             return {'message': 'No input data provided'}, 400
             
         try:
-            medication_schema = MedicationSchema()
+            medication_schema = get_schema(MedicationSchema)
             medication = medication_schema.load(json_data)
             medication.user_id = current_user.id
             
@@ -41,13 +173,19 @@ class MedicationListResource(Resource):
 class MedicationResource(Resource):
     @login_required
     def get(self, medication_id):
-        """Get a medication by ID for current user"""
-        medication = Medication.query.filter_by(id=medication_id, user_id=current_user.id).first()
+        """Get a medication by ID for current user, limited to the fields given in ?fields= if any"""
+        try:
+            fields = parse_fields(request.args, MedicationSchema)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
+        query = Medication.query.filter_by(id=medication_id, user_id=current_user.id)
+        medication = load_fields(query, Medication, fields).first()
         
         if not medication:
             return {'message': 'Medication not found'}, 404
             
-        medication_schema = MedicationSchema()
+        medication_schema = get_schema(MedicationSchema, only=fields)
         return medication_schema.dump(medication)
     
     @login_required
@@ -64,7 +202,7 @@ class MedicationResource(Resource):
             return {'message': 'Medication not found'}, 404
             
         try:
-            medication_schema = MedicationSchema(partial=True)
+            medication_schema = get_schema(MedicationSchema, partial=True)
             medication_data = medication_schema.load(json_data, instance=medication)
             
             db.session.commit()
@@ -83,6 +221,7 @@ class MedicationResource(Resource):
         if not medication:
             return {'message': 'Medication not found'}, 404
             
+        MedicationLogRollup.query.filter_by(medication_id=medication_id, user_id=current_user.id).delete()
         db.session.delete(medication)
         db.session.commit()
         return '', 204
@@ -90,15 +229,30 @@ class MedicationResource(Resource):
 class MedicationLogResource(Resource):
     @login_required
     def get(self, medication_id):
-        """Get medication logs for current user's medication"""
+        """
+        Get medication logs for current user's medication, limited to the fields given in ?fields= if any.
+
+        Logs older than the retention horizon are only kept as daily rollups;
+        the X-Compacted-Before header then gives the time before which the
+        list is incomplete and the logs summary endpoint covers it.
+        """
+        try:
+            fields = parse_fields(request.args, MedicationLogSchema)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
         medication = Medication.query.filter_by(id=medication_id, user_id=current_user.id).first()
         
         if not medication:
             return {'message': 'Medication not found'}, 404
         
-        logs = MedicationLog.query.filter_by(medication_id=medication_id, user_id=current_user.id).all()
-        log_schema = MedicationLogSchema(many=True)
-        return log_schema.dump(logs)
+        query = MedicationLog.query.filter_by(medication_id=medication_id, user_id=current_user.id)
+        logs = load_fields(query, MedicationLog, fields).all()
+        log_schema = get_schema(MedicationLogSchema, many=True, only=fields)
+        
+        compacted_before = medication_logs_compacted_before(current_user.id, medication_id)
+        headers = {'X-Compacted-Before': compacted_before.isoformat()} if compacted_before else {}
+        return dump_list(log_schema, logs), 200, headers
     
     @login_required
     def post(self, medication_id):
@@ -114,7 +268,7 @@ class MedicationLogResource(Resource):
             return {'message': 'No input data provided'}, 400
             
         try:
-            log_schema = MedicationLogSchema()
+            log_schema = get_schema(MedicationLogSchema)
             log = log_schema.load(json_data)
             log.medication_id = medication_id
             log.user_id = current_user.id
@@ -128,6 +282,143 @@ class MedicationLogResource(Resource):
         except Exception as e:
             return {'message': str(e)}, 500
 
+class MedicationLogBatchResource(Resource):
+    @login_required
+    def post(self, medication_id):
+        """
+        Create many logs for current user's medication in one transaction.
+
+        Every row is validated; the valid ones are inserted with a single
+        multi-row INSERT and the response lists the result of each row. With
+        atomic=true nothing is inserted unless every row is valid.
+        """
+        medication = Medication.query.filter_by(id=medication_id, user_id=current_user.id).first()
+        
+        if not medication:
+            return {'message': 'Medication not found'}, 404
+        
+        try:
+            rows = parse_batch(request.get_json(silent=True))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
+        # The medication and owner come from the URL and session, not the rows
+        log_schema = get_schema(
+            MedicationLogSchema, load_instance=False, exclude=('id',), partial=('medication_id', 'user_id')
+        )
+        valid, errors = validate_rows(log_schema, rows, {'medication_id': medication_id, 'user_id': current_user.id})
+        if errors and request.args.get('atomic', 'false').lower() in ['true', '1', 'yes']:
+            valid = []
+        
+        try:
+            ids = insert_rows(MedicationLog, [data for _, data in valid]) if valid else []
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'message': str(e)}, 500
+        
+        return batch_response(len(rows), valid, errors, ids)
+    
+    @login_required
+    def put(self, medication_id):
+        """
+        Update many logs of current user's medication in one transaction.
+
+        Each row holds the 'id' of a log and the fields to change. Rows that
+        are invalid or name no log of this medication are reported and
+        skipped; with atomic=true nothing is changed unless every row applies.
+        """
+        medication = Medication.query.filter_by(id=medication_id, user_id=current_user.id).first()
+        
+        if not medication:
+            return {'message': 'Medication not found'}, 404
+        
+        try:
+            rows = parse_batch(request.get_json(silent=True))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
+        # Logs cannot be moved to another medication or owner
+        log_schema = get_schema(
+            MedicationLogSchema, load_instance=False, partial=True, exclude=('medication_id', 'user_id')
+        )
+        valid, errors = validate_updates(log_schema, rows)
+        valid, missing = find_existing(
+            MedicationLog, valid, MedicationLog.medication_id == medication_id, MedicationLog.user_id == current_user.id
+        )
+        if (errors or missing) and request.args.get('atomic', 'false').lower() in ['true', '1', 'yes']:
+            valid = []
+        
+        try:
+            if valid:
+                update_rows(MedicationLog, [data for _, data in valid])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'message': str(e)}, 500
+        
+        return batch_response(len(rows), valid, errors, [data['id'] for _, data in valid], 'updated', missing)
+    
+    @login_required
+    def delete(self, medication_id):
+        """
+        Delete many logs of current user's medication, given as a list of IDs, in one transaction.
+
+        IDs naming no log of this medication are reported and skipped; with
+        atomic=true nothing is deleted unless every ID can be.
+        """
+        medication = Medication.query.filter_by(id=medication_id, user_id=current_user.id).first()
+        
+        if not medication:
+            return {'message': 'Medication not found'}, 404
+        
+        try:
+            rows = parse_batch(request.get_json(silent=True))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
+        valid, errors = validate_ids(rows)
+        valid, missing = find_existing(
+            MedicationLog, valid, MedicationLog.medication_id == medication_id, MedicationLog.user_id == current_user.id
+        )
+        if (errors or missing) and request.args.get('atomic', 'false').lower() in ['true', '1', 'yes']:
+            valid = []
+        
+        ids = [data['id'] for _, data in valid]
+        try:
+            if ids:
+                delete_rows(MedicationLog, ids)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'message': str(e)}, 500
+        
+        return batch_response(len(rows), valid, errors, ids, 'deleted', missing)
+
+class MedicationLogSummaryResource(Resource):
+    @login_required
+    def get(self, medication_id):
+        """
+        Get daily log counts per status for current user's medication.
+
+        Covers the whole history, including logs already compacted into
+        daily rollups. Optional from_date/to_date (YYYY-MM-DD) limit the range.
+        """
+        medication = Medication.query.filter_by(id=medication_id, user_id=current_user.id).first()
+        
+        if not medication:
+            return {'message': 'Medication not found'}, 404
+        
+        try:
+            from_date = request.args.get('from_date')
+            to_date = request.args.get('to_date')
+            start = datetime.strptime(from_date, '%Y-%m-%d').date() if from_date else None
+            end = datetime.strptime(to_date, '%Y-%m-%d').date() if to_date else None
+        except ValueError:
+            return {'message': 'Invalid date format. Use YYYY-MM-DD'}, 400
+        
+        return summarize_medication_logs(current_user.id, medication_id, start, end)
+
 class MedicationStatusResource(Resource):
     @login_required
     def put(self, medication_id):
@@ -145,5 +436,5 @@ class MedicationStatusResource(Resource):
         medication.status = json_data['status']
         db.session.commit()
         
-        medication_schema = MedicationSchema()
+        medication_schema = get_schema(MedicationSchema)
         return medication_schema.dump(medication)
\ No newline at end of file
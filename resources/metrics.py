@@ -0,0 +1,27 @@
+import os
+
+from flask_restful import Resource
+from flask_login import login_required
+
+from database import db, REPLICA_BIND_PREFIX
+from utils.db_pool import pool_stats
+
+class PoolMetricsResource(Resource):
+    @login_required
+    def get(self):
+        """
+        Get connection pool metrics of this worker process
+        ---
+        responses:
+          200:
+            description: Pool gauges (size, in_use, idle, overflow) and checkout
+                         counters (checkouts, waits, timeouts, checkout latency)
+                         for the primary database and each read replica
+        """
+        engines = {}
+        for key, engine in db.engines.items():
+            if key is None:
+                engines['primary'] = pool_stats(engine)
+            elif key.startswith(REPLICA_BIND_PREFIX):
+                engines[key] = pool_stats(engine)
+        return {'pid': os.getpid(), 'engines': engines}, 200
@@ -3,30 +3,50 @@ API resources for notification management and push notifications.
 """
 from flask import request, jsonify
 from flask_restful import Resource
+from flask_login import login_required, current_user
 from datetime import datetime
 import logging
 
+from schemas import NotificationSchema, get_schema
 from services.notification_service import notification_service
 
 logger = logging.getLogger(__name__)
 
 class NotificationListResource(Resource):
+    @login_required
     def get(self):
         """
-        Get pending notifications for the user
+        Get the newest pending notifications for the current user
         ---
         responses:
           200:
-            description: List of pending notifications
+            description: List of up to 100 unread notifications, oldest first
         """
         try:
-            notifications = notification_service.get_pending_notifications()
-            return notifications, 200
+            notifications = notification_service.get_pending_notifications(current_user.id)
+            return get_schema(NotificationSchema, many=True).dump(notifications), 200
         except Exception as e:
             logger.error(f"Error retrieving notifications: {str(e)}")
             return {'error': 'Failed to retrieve notifications'}, 500
+    
+    @login_required
+    def put(self):
+        """
+        Mark all of the current user's notifications as read
+        ---
+        responses:
+          200:
+            description: Notifications marked as read
+        """
+        try:
+            updated = notification_service.mark_all_notifications_read(current_user.id)
+            return {'message': 'Notifications marked as read', 'updated': updated}, 200
+        except Exception as e:
+            logger.error(f"Error marking notifications as read: {str(e)}")
+            return {'error': 'Failed to update notifications'}, 500
 
 class NotificationResource(Resource):
+    @login_required
     def put(self, notification_id):
         """
         Mark notification as read
@@ -34,7 +54,7 @@ class NotificationResource(Resource):
         parameters:
           - in: path
             name: notification_id
-            type: string
+            type: integer
             required: true
         responses:
           200:
@@ -43,7 +63,7 @@ class NotificationResource(Resource):
             description: Notification not found
         """
         try:
-            success = notification_service.mark_notification_read(notification_id)
+            success = notification_service.mark_notification_read(current_user.id, notification_id)
             if success:
                 return {'message': 'Notification marked as read'}, 200
             else:
@@ -53,6 +73,7 @@ class NotificationResource(Resource):
             return {'error': 'Failed to update notification'}, 500
 
 class NotificationTestResource(Resource):
+    @login_required
     def post(self):
         """
         Send a test notification
@@ -62,7 +83,7 @@ class NotificationTestResource(Resource):
             description: Test notification sent
         """
         try:
-            success = notification_service.send_test_notification()
+            success = notification_service.send_test_notification(current_user.id)
             if success:
                 return {'message': 'Test notification sent successfully'}, 200
             else:
@@ -84,7 +105,7 @@ class NotificationSettingsResource(Resource):
             status = {
                 'email_enabled': notification_service.email_service.is_enabled(),
                 'push_enabled': True,  # Browser push is always available
-                'active_reminders': len(notification_service.active_timers),
+                'active_reminders': len(notification_service.scheduler),
                 'sendgrid_configured': notification_service.email_service.is_enabled()
             }
             return status, 200
@@ -6,12 +6,21 @@ from datetime import datetime
 
 from database import db
 from models import Reminder
-from schemas import ReminderSchema
+from schemas import ReminderSchema, get_schema
+from services.notification_service import notification_service
+from utils.fieldsets import load_fields, parse_fields
+from utils.pagination import paginate, pagination_requested
+from utils.serialization import dump_list
 
 class ReminderListResource(Resource):
     @login_required
     def get(self):
-        """Get all reminders for current user"""
+        """Get all reminders for current user, or one page of them if limit/cursor is given"""
+        try:
+            fields = parse_fields(request.args, ReminderSchema)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
         # Filter by type if provided
         reminder_type = request.args.get('type')
         is_active = request.args.get('active')
@@ -24,12 +33,21 @@ class ReminderListResource(Resource):
         if is_active is not None:
             is_active_bool = is_active.lower() in ['true', '1', 'yes']
             query = query.filter_by(is_active=is_active_bool)
+        
+        query = load_fields(query, Reminder, fields, required=(Reminder.reminder_time, Reminder.id))
+        reminder_schema = get_schema(ReminderSchema, many=True, only=fields)
+        
+        if pagination_requested(request.args):
+            try:
+                reminders, next_cursor = paginate(query, (Reminder.reminder_time, Reminder.id), request.args)
+            except ValueError as e:
+                return {'message': str(e)}, 400
+            return {'items': dump_list(reminder_schema, reminders), 'next_cursor': next_cursor}
             
         # Order by reminder time
         reminders = query.order_by(Reminder.reminder_time.asc()).all()
         
-        reminder_schema = ReminderSchema(many=True)
-        return reminder_schema.dump(reminders)
+        return dump_list(reminder_schema, reminders)
     
     @login_required
     def post(self):
@@ -40,12 +58,14 @@ class ReminderListResource(Resource):
             return {'message': 'No input data provided'}, 400
             
         try:
-            reminder_schema = ReminderSchema()
+            reminder_schema = get_schema(ReminderSchema)
             reminder = reminder_schema.load(json_data)
             reminder.user_id = current_user.id
             
             db.session.add(reminder)
             db.session.commit()
+            if reminder.is_active:
+                notification_service.schedule_reminder(reminder.id)
             return reminder_schema.dump(reminder), 201
                 
         except ValidationError as err:
@@ -56,13 +76,19 @@ class ReminderListResource(Resource):
 class ReminderResource(Resource):
     @login_required
     def get(self, reminder_id):
-        """Get a reminder by ID for current user"""
-        reminder = Reminder.query.filter_by(id=reminder_id, user_id=current_user.id).first()
+        """Get a reminder by ID for current user, limited to the fields given in ?fields= if any"""
+        try:
+            fields = parse_fields(request.args, ReminderSchema)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        
+        query = Reminder.query.filter_by(id=reminder_id, user_id=current_user.id)
+        reminder = load_fields(query, Reminder, fields).first()
         
         if not reminder:
             return {'message': 'Reminder not found'}, 404
             
-        reminder_schema = ReminderSchema()
+        reminder_schema = get_schema(ReminderSchema, only=fields)
         return reminder_schema.dump(reminder)
     
     @login_required
@@ -79,10 +105,14 @@ class ReminderResource(Resource):
             return {'message': 'Reminder not found'}, 404
             
         try:
-            reminder_schema = ReminderSchema(partial=True)
+            reminder_schema = get_schema(ReminderSchema, partial=True)
             reminder_data = reminder_schema.load(json_data, instance=reminder)
             
             db.session.commit()
+            if reminder.is_active:
+                notification_service.schedule_reminder(reminder.id)
+            else:
+                notification_service.cancel_reminder(reminder.id)
             return reminder_schema.dump(reminder_data)
             
         except ValidationError as err:
@@ -100,4 +130,5 @@ class ReminderResource(Resource):
             
         db.session.delete(reminder)
         db.session.commit()
+        notification_service.cancel_reminder(reminder_id)
         return '', 204
\ No newline at end of file
@@ -1,6 +1,45 @@
+import threading
+
 from marshmallow import Schema, fields, validate, ValidationError, validates, validates_schema
 from database import ma
-from models import Medication, MedicationLog, HealthMetric, Appointment, Reminder
+from models import Medication, MedicationLog, HealthMetric, Appointment, Reminder, Notification
+
+# Schema instances reused across requests, kept per thread because loading
+# into an existing instance stores it on the schema for the duration of the call
+_schema_cache = threading.local()
+_SCHEMA_CACHE_SIZE = 256
+
+def _option_key(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(value)
+    return value
+
+def get_schema(schema_class, **options):
+    """
+    Return a cached instance of a schema, built once per thread and set of options.
+
+    Building a schema resolves and binds all of its fields, which costs more
+    than dumping a handful of rows, so resources reuse instances instead of
+    constructing one per request.
+
+    Args:
+        schema_class: The schema class, e.g. MedicationSchema.
+        **options: Constructor arguments (many, only, exclude, partial).
+
+    Returns:
+        Schema: An instance that must not be modified by the caller.
+    """
+    cache = getattr(_schema_cache, 'schemas', None)
+    if cache is None:
+        cache = _schema_cache.schemas = {}
+    key = (schema_class, tuple(sorted((name, _option_key(value)) for name, value in options.items())))
+    schema = cache.get(key)
+    if schema is None:
+        if len(cache) >= _SCHEMA_CACHE_SIZE:
+            # Sparse fieldsets can produce many combinations; start over
+            cache.clear()
+        schema = cache[key] = schema_class(**options)
+    return schema
 
 # Medication Log Schema
 class MedicationLogSchema(ma.SQLAlchemyAutoSchema):
@@ -55,7 +94,16 @@ class ReminderSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Reminder
         load_instance = True
+        # Due-queue bookkeeping, managed by the reminder queue
+        exclude = ('lease_owner', 'lease_expires_at')
+        dump_only = ('last_fired_at',)
         
     reminder_type = fields.String(validate=validate.OneOf(['medication', 'appointment', 'health_check']))
     notification_method = fields.String(validate=validate.OneOf(['app', 'email', 'sms']))
     repeat_interval = fields.String(validate=validate.OneOf(['once', 'daily', 'weekly', 'monthly', 'custom']))
+
+# Notification Schema
+class NotificationSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Notification
+        exclude = ('user_id',)
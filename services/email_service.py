@@ -4,12 +4,15 @@ Email notification service using SendGrid for health management reminders.
 import os
 import logging
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email, To, Content
+from sendgrid.helpers.mail import Mail, Email, To, Content, Personalization, Substitution
 
 logger = logging.getLogger(__name__)
 
+# Most emails SendGrid accepts in one request
+MAX_PERSONALIZATIONS = 1000
+
 class EmailService:
     """Service for sending email notifications via SendGrid."""
     
@@ -75,6 +78,62 @@ class EmailService:
             logger.error(f"Error sending reminder email: {str(e)}")
             return False
     
+    def send_reminder_emails(self, messages: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Send one reminder email per (recipient, reminder) pair, batched into few API calls.
+        
+        Each SendGrid request carries up to MAX_PERSONALIZATIONS emails: the
+        templates are sent once with placeholders, and every email fills them
+        in with its own reminder's values.
+        
+        Args:
+            messages: (recipient email address, reminder data) pairs
+            
+        Returns:
+            int: Number of emails accepted by SendGrid
+        """
+        if not self.is_enabled():
+            logger.warning("Email service not enabled. Cannot send reminder emails.")
+            return 0
+        
+        html_template = self._render_html('-title-', '-time-', '-message-', '-icon-', '-type-')
+        text_template = self._render_text('-title-', '-time-', '-message-', '-type-')
+        sent = 0
+        for start in range(0, len(messages), MAX_PERSONALIZATIONS):
+            batch = messages[start:start + MAX_PERSONALIZATIONS]
+            try:
+                message = Mail(from_email=Email(self.from_email), subject='Health Reminder')
+                message.content = [
+                    Content("text/plain", text_template),
+                    Content("text/html", html_template)
+                ]
+                for to_email, reminder_data in batch:
+                    reminder_type = reminder_data.get('reminder_type', 'general')
+                    personalization = Personalization()
+                    personalization.add_to(To(to_email))
+                    personalization.subject = self._get_email_subject(reminder_data)
+                    for key, value in (
+                        ('-title-', reminder_data.get('title', 'Health Reminder')),
+                        ('-time-', self._format_time(reminder_data)),
+                        ('-message-', reminder_data.get('message', '')),
+                        ('-icon-', self._get_type_icon(reminder_type)),
+                        ('-type-', reminder_type.replace('_', ' ').title()),
+                    ):
+                        personalization.add_substitution(Substitution(key, str(value)))
+                    message.add_personalization(personalization)
+                
+                response = self.sg.send(message)
+                
+                if response.status_code in [200, 202]:
+                    sent += len(batch)
+                    logger.info(f"Sent {len(batch)} reminder emails in one request")
+                else:
+                    logger.error(f"Failed to send {len(batch)} emails. Status code: {response.status_code}")
+                    
+            except Exception as e:
+                logger.error(f"Error sending reminder emails: {str(e)}")
+        return sent
+    
     def _get_email_subject(self, reminder_data: Dict[str, Any]) -> str:
         """Generate email subject based on reminder type."""
         reminder_type = reminder_data.get('reminder_type', 'general')
@@ -89,22 +148,30 @@ class EmailService:
         else:
             return f"🔔 Health Reminder: {title}"
     
-    def _get_email_html_content(self, reminder_data: Dict[str, Any]) -> str:
-        """Generate HTML email content."""
-        reminder_type = reminder_data.get('reminder_type', 'general')
-        title = reminder_data.get('title', 'Health Reminder')
-        message = reminder_data.get('message', '')
+    def _format_time(self, reminder_data: Dict[str, Any]) -> str:
+        """Format the reminder time for display."""
         reminder_time = reminder_data.get('reminder_time', datetime.now())
         
-        # Format reminder time
         if isinstance(reminder_time, str):
             try:
                 reminder_time = datetime.fromisoformat(reminder_time.replace('Z', '+00:00'))
             except:
                 reminder_time = datetime.now()
         
-        formatted_time = reminder_time.strftime("%B %d, %Y at %I:%M %p")
+        return reminder_time.strftime("%B %d, %Y at %I:%M %p")
+    
+    def _get_email_html_content(self, reminder_data: Dict[str, Any]) -> str:
+        """Generate HTML email content."""
+        reminder_type = reminder_data.get('reminder_type', 'general')
+        title = reminder_data.get('title', 'Health Reminder')
+        message = reminder_data.get('message', '')
+        formatted_time = self._format_time(reminder_data)
         
+        return self._render_html(title, formatted_time, message,
+                                 self._get_type_icon(reminder_type), reminder_type.replace('_', ' ').title())
+    
+    def _render_html(self, title: str, formatted_time: str, message: str, icon: str, type_label: str) -> str:
+        """Fill in the HTML email template."""
         html_content = f"""
         <!DOCTYPE html>
         <html>
@@ -131,10 +198,10 @@ class EmailService:
                 </div>
                 <div class="content">
                     <div class="reminder-card">
-                        <h2>{self._get_type_icon(reminder_type)} {title}</h2>
+                        <h2>{icon} {title}</h2>
                         <p><strong>Scheduled for:</strong> {formatted_time}</p>
                         <p><strong>Message:</strong> {message}</p>
-                        <p><strong>Type:</strong> {reminder_type.replace('_', ' ').title()}</p>
+                        <p><strong>Type:</strong> {type_label}</p>
                     </div>
                     <div style="text-align: center;">
                         <a href="#" class="button">View in Health App</a>
@@ -155,24 +222,19 @@ class EmailService:
         reminder_type = reminder_data.get('reminder_type', 'general')
         title = reminder_data.get('title', 'Health Reminder')
         message = reminder_data.get('message', '')
-        reminder_time = reminder_data.get('reminder_time', datetime.now())
-        
-        # Format reminder time
-        if isinstance(reminder_time, str):
-            try:
-                reminder_time = datetime.fromisoformat(reminder_time.replace('Z', '+00:00'))
-            except:
-                reminder_time = datetime.now()
-        
-        formatted_time = reminder_time.strftime("%B %d, %Y at %I:%M %p")
+        formatted_time = self._format_time(reminder_data)
         
+        return self._render_text(title, formatted_time, message, reminder_type.replace('_', ' ').title())
+    
+    def _render_text(self, title: str, formatted_time: str, message: str, type_label: str) -> str:
+        """Fill in the plain text email template."""
         text_content = f"""
 Health Management System - Reminder
 
 {title}
 
 Scheduled for: {formatted_time}
-Type: {reminder_type.replace('_', ' ').title()}
+Type: {type_label}
 
 Message: {message}
 
@@ -3,28 +3,66 @@ Push notification service for browser notifications and reminder management.
 """
 import os
 import logging
+import threading
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
-from threading import Timer
-import json
+
+from flask import current_app
+from sqlalchemy import delete, insert, update
 
 from database import db
-from models import Reminder
+from models import Notification, Reminder
 from services.email_service import EmailService
+from services.reminder_queue import ReminderQueue
+from services.scheduler import HeapScheduler
 
 logger = logging.getLogger(__name__)
 
+# Scheduler key of the periodic due-queue poll
+POLL_KEY = 'poll'
+
+# Unread notifications returned per request, newest first
+PENDING_NOTIFICATIONS_LIMIT = 100
+
+# How often delivering processes delete expired notifications
+NOTIFICATION_PURGE_INTERVAL = timedelta(hours=1)
+
 class NotificationService:
     """Service for managing push notifications and reminder alerts."""
     
     def __init__(self):
         self.email_service = EmailService()
-        self.active_timers = {}  # Store active reminder timers
+        # Due reminders live in the database; the queue leases them to one worker at a time
+        self.queue = ReminderQueue()
+        self.claim_batch_size = int(os.environ.get('REMINDER_CLAIM_BATCH_SIZE', '500'))
+        # Reminders due this soon are sent with the batch being sent now
+        self.batch_window = timedelta(seconds=int(os.environ.get('REMINDER_BATCH_WINDOW_SECONDS', '5')))
+        # How often the database is checked for reminders created or released elsewhere
+        self.poll_interval = timedelta(seconds=int(os.environ.get('REMINDER_POLL_SECONDS', '30')))
+        # One thread waits for the next due time of every known reminder, keyed by reminder ID
+        self.scheduler = HeapScheduler(name='reminder-scheduler',
+                                       delivery_threads=int(os.environ.get('REMINDER_DELIVERY_THREADS', '4')))
+        # Whether this process delivers reminders; with REMINDER_WORKER=external
+        # only the reminder worker does, and web processes just enqueue them
+        self.delivering = False
+        self._processing_lock = threading.Lock()
+        self._processing = False
+        self._process_again = False
+        # Web notifications are deleted this long after they were sent
+        self.notification_ttl = timedelta(days=int(os.environ.get('NOTIFICATION_TTL_DAYS', '30')))
+        self._last_purge = None
         logger.info("Notification service initialized")
     
     def schedule_reminder(self, reminder_id: int) -> bool:
         """
-        Schedule a reminder for future notification.
+        Wake up at a reminder's due time to deliver it from the due-queue.
+        
+        Replaces the reminder's earlier wake-up, if any. The reminder is sent
+        by whichever worker claims it first, so scheduling the same reminder
+        in several processes is harmless. In a process that does not deliver
+        reminders, the committed reminder row is already enqueued and the
+        delivering processes pick it up when they next poll. Must be called
+        within an application context.
         
         Args:
             reminder_id: ID of the reminder to schedule
@@ -38,21 +76,12 @@ class NotificationService:
                 logger.warning(f"Reminder {reminder_id} not found or inactive")
                 return False
             
-            # Calculate time until reminder
-            now = datetime.utcnow()
-            time_until_reminder = (reminder.reminder_time - now).total_seconds()
-            
-            if time_until_reminder <= 0:
-                # Reminder is overdue, send immediately
-                self.send_reminder_notification(reminder_id)
+            if not self.delivering:
                 return True
             
-            # Schedule the reminder
-            timer = Timer(time_until_reminder, self.send_reminder_notification, args=[reminder_id])
-            timer.start()
-            
-            # Store timer reference
-            self.active_timers[reminder_id] = timer
+            # Overdue reminders are due right away and sent as soon as possible
+            app = current_app._get_current_object()
+            self.scheduler.schedule(reminder_id, reminder.reminder_time, self._process_due_in, app)
             
             logger.info(f"Reminder {reminder_id} scheduled for {reminder.reminder_time}")
             return True
@@ -62,11 +91,14 @@ class NotificationService:
             return False
     
     def cancel_reminder(self, reminder_id: int) -> bool:
-        """Cancel a scheduled reminder."""
+        """
+        Cancel a reminder's wake-up in this process.
+        
+        Deactivated and deleted reminders are never claimed from the
+        due-queue, so this only saves a needless wake-up.
+        """
         try:
-            if reminder_id in self.active_timers:
-                self.active_timers[reminder_id].cancel()
-                del self.active_timers[reminder_id]
+            if self.scheduler.cancel(reminder_id):
                 logger.info(f"Cancelled reminder {reminder_id}")
                 return True
             return False
@@ -74,23 +106,87 @@ class NotificationService:
             logger.error(f"Error cancelling reminder {reminder_id}: {str(e)}")
             return False
     
-    def send_reminder_notification(self, reminder_id: int) -> bool:
+    def _process_due_in(self, app):
+        """Deliver due reminders from a scheduler delivery thread."""
+        with app.app_context():
+            self.process_due()
+    
+    def process_due(self) -> int:
         """
-        Send notification for a specific reminder.
+        Claim due reminders from the due-queue and send them, until none are left.
+        
+        Reminders due within the next REMINDER_BATCH_WINDOW_SECONDS are
+        claimed too, so reminders clustered around the same minute go out
+        together as one batch. Runs in one thread per process at a time; a
+        call made while another is running makes that one check the queue
+        again instead.
         
-        Args:
-            reminder_id: ID of the reminder to send
-            
         Returns:
-            bool: True if notification sent successfully
+            int: The number of notifications sent by this call.
         """
+        with self._processing_lock:
+            if self._processing:
+                self._process_again = True
+                return 0
+            self._processing = True
+        
+        sent = 0
         try:
-            reminder = db.session.get(Reminder, reminder_id)
-            if not reminder:
-                logger.warning(f"Reminder {reminder_id} not found")
-                return False
+            while True:
+                with self._processing_lock:
+                    self._process_again = False
+                claimed = self.queue.claim(self.claim_batch_size, window=self.batch_window)
+                try:
+                    sent += self.send_reminder_notifications(claimed)
+                except Exception:
+                    self.queue.release([reminder.id for reminder in claimed])
+                    raise
+                if len(claimed) < self.claim_batch_size:
+                    with self._processing_lock:
+                        if not self._process_again:
+                            self._processing = False
+                            return sent
+        except Exception as e:
+            with self._processing_lock:
+                self._processing = False
+            logger.error(f"Error processing due reminders: {str(e)}")
+            return sent
+    
+    def send_reminder_notifications(self, reminders: List[Any]) -> int:
+        """
+        Send notifications for a batch of reminders claimed from the due-queue.
+        
+        The whole batch is advanced to its next occurrences (or deactivated)
+        with one UPDATE, and its web notifications are inserted in the same
+        transaction, so each reminder notifies its user exactly once.
+        Reminders that UPDATE skips (edited, deactivated or deleted since they
+        were claimed) get no notification and no email. The
+        emails are sent after the commit, in as few requests as possible, so
+        one is lost rather than repeated if this process dies while sending.
+        
+        Args:
+            reminders: Rows returned by ReminderQueue.claim()
             
-            # Prepare reminder data
+        Returns:
+            int: Number of notifications sent
+        """
+        if not reminders:
+            return 0
+        
+        now = datetime.utcnow()
+        fired_ids = {reminder.id for reminder in reminders if self.queue.should_fire(reminder, now)}
+        completed = self.queue.complete(reminders, fired_ids, now, commit=False)
+        # Only the reminders complete() advanced are sent; the others were
+        # changed, deactivated or deleted during the lease, or lost it
+        batch = [reminder for reminder in reminders if reminder.id in completed]
+        
+        # Prepare reminder data
+        due = []
+        notifications = []
+        for reminder in batch:
+            if reminder.id not in fired_ids:
+                logger.info(f"Skipped reminder {reminder.id} due at {reminder.reminder_time} (missed)")
+                continue
             reminder_data = {
                 'id': reminder.id,
                 'reminder_type': reminder.reminder_type,
@@ -99,152 +195,161 @@ class NotificationService:
                 'reminder_time': reminder.reminder_time,
                 'target_id': reminder.target_id
             }
-            
-            # Send email notification if configured
-            email_sent = False
-            user_email = os.environ.get('USER_EMAIL')  # Get user email from environment
-            if user_email and self.email_service.is_enabled():
-                email_sent = self.email_service.send_reminder_email(user_email, reminder_data)
-            
-            # Store notification in database for web push
-            self.store_notification(reminder_data)
-            
-            # Handle recurring reminders
-            if reminder.repeat_interval and reminder.repeat_interval != 'once':
-                self.schedule_recurring_reminder(reminder)
-            
-            logger.info(f"Notification sent for reminder {reminder_id} (email: {email_sent})")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error sending notification for reminder {reminder_id}: {str(e)}")
-            return False
-    
-    def store_notification(self, reminder_data: Dict[str, Any]) -> bool:
-        """Store notification data for web push retrieval."""
+            due.append(reminder_data)
+            notifications.append(self._notification_values(reminder.user_id, reminder_data, 'reminder', now))
+        
+        # Store notifications for web push, together with advancing the reminders
         try:
-            # Create notifications table entry or use a simple file-based approach
-            notification_file = 'data/notifications.json'
-            
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(notification_file), exist_ok=True)
-            
-            # Load existing notifications
-            notifications = []
-            if os.path.exists(notification_file):
-                try:
-                    with open(notification_file, 'r') as f:
-                        notifications = json.load(f)
-                except:
-                    notifications = []
-            
-            # Add new notification
-            notification = {
-                'id': f"reminder_{reminder_data['id']}_{int(datetime.now().timestamp())}",
-                'type': 'reminder',
-                'title': reminder_data['title'],
-                'body': reminder_data['message'],
-                'data': reminder_data,
-                'timestamp': datetime.now().isoformat(),
-                'read': False
-            }
-            
-            notifications.append(notification)
-            
-            # Keep only last 100 notifications
-            notifications = notifications[-100:]
-            
-            # Save back to file
-            with open(notification_file, 'w') as f:
-                json.dump(notifications, f, indent=2, default=str)
+            if notifications:
+                db.session.execute(insert(Notification), notifications)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        # Handle recurring reminders
+        if self.delivering:
+            app = current_app._get_current_object()
+            for reminder_id, next_time in completed.items():
+                if next_time is not None:
+                    self.scheduler.schedule(reminder_id, next_time, self._process_due_in, app)
+        
+        if not due:
+            return 0
+        
+        # Send email notifications if configured
+        emails_sent = 0
+        user_email = os.environ.get('USER_EMAIL')  # Get user email from environment
+        if user_email and self.email_service.is_enabled():
+            emails_sent = self.email_service.send_reminder_emails([(user_email, data) for data in due])
+        
+        logger.info(f"Notifications sent for {len(due)} reminders (emails: {emails_sent})")
+        return len(due)
+    
+    def store_notification(self, user_id: int, reminder_data: Dict[str, Any],
+                           notification_type: str = 'reminder') -> bool:
+        """
+        Store a notification for web push retrieval by one user.
+        
+        Args:
+            user_id: ID of the user to notify
+            reminder_data: The reminder's id, reminder_type, title, message,
+                reminder_time and target_id
+            notification_type: 'reminder' or 'test'
             
-            logger.info(f"Notification stored for web push")
+        Returns:
+            bool: True if the notification was stored, False otherwise
+        """
+        try:
+            db.session.execute(insert(Notification), [
+                self._notification_values(user_id, reminder_data, notification_type, datetime.utcnow())
+            ])
+            db.session.commit()
             return True
-            
         except Exception as e:
+            db.session.rollback()
             logger.error(f"Error storing notification: {str(e)}")
             return False
     
-    def get_pending_notifications(self) -> List[Dict[str, Any]]:
-        """Get all pending notifications for web push."""
-        try:
-            notification_file = 'data/notifications.json'
-            if not os.path.exists(notification_file):
-                return []
-            
-            with open(notification_file, 'r') as f:
-                notifications = json.load(f)
-            
-            # Return unread notifications
-            return [n for n in notifications if not n.get('read', False)]
-            
-        except Exception as e:
-            logger.error(f"Error retrieving notifications: {str(e)}")
-            return []
+    @staticmethod
+    def _notification_values(user_id: int, reminder_data: Dict[str, Any], notification_type: str,
+                             now: datetime) -> Dict[str, Any]:
+        """Build the Notification row of a reminder's notification."""
+        data = dict(reminder_data)
+        if isinstance(data.get('reminder_time'), datetime):
+            data['reminder_time'] = data['reminder_time'].isoformat()
+        return {
+            'user_id': user_id,
+            'reminder_id': reminder_data['id'] if isinstance(reminder_data['id'], int) else None,
+            'type': notification_type,
+            'title': reminder_data['title'],
+            'body': reminder_data['message'],
+            'data': data,
+            'read': False,
+            'timestamp': now,
+        }
     
-    def mark_notification_read(self, notification_id: str) -> bool:
-        """Mark a notification as read."""
+    def get_pending_notifications(self, user_id: int, limit: int = PENDING_NOTIFICATIONS_LIMIT) -> List[Notification]:
+        """
+        Get a user's newest unread notifications, oldest first.
+        
+        Reads at most ``limit`` rows from the (user_id, read, timestamp)
+        index, so the cost does not grow with the number of notifications.
+        """
+        notifications = Notification.query.filter(
+            Notification.user_id == user_id,
+            Notification.read == False,
+        ).order_by(Notification.timestamp.desc(), Notification.id.desc()).limit(limit).all()
+        notifications.reverse()
+        return notifications
+    
+    def mark_notification_read(self, user_id: int, notification_id: int) -> bool:
+        """
+        Mark one of a user's notifications as read.
+        
+        Returns:
+            bool: False if the user has no notification with this ID
+        """
         try:
-            notification_file = 'data/notifications.json'
-            if not os.path.exists(notification_file):
-                return False
-            
-            with open(notification_file, 'r') as f:
-                notifications = json.load(f)
-            
-            # Find and mark notification as read
-            for notification in notifications:
-                if notification['id'] == notification_id:
-                    notification['read'] = True
-                    break
-            
-            # Save back to file
-            with open(notification_file, 'w') as f:
-                json.dump(notifications, f, indent=2, default=str)
-            
-            return True
-            
+            result = db.session.execute(update(Notification).where(
+                Notification.id == notification_id,
+                Notification.user_id == user_id,
+            ).values(read=True).execution_options(synchronize_session=False))
+            db.session.commit()
+            return result.rowcount > 0
         except Exception as e:
+            db.session.rollback()
             logger.error(f"Error marking notification as read: {str(e)}")
             return False
     
-    def schedule_recurring_reminder(self, reminder: Reminder) -> bool:
-        """Schedule the next occurrence of a recurring reminder."""
+    def mark_all_notifications_read(self, user_id: int) -> int:
+        """Mark all of a user's unread notifications as read; returns how many were."""
+        result = db.session.execute(update(Notification).where(
+            Notification.user_id == user_id,
+            Notification.read == False,
+        ).values(read=True).execution_options(synchronize_session=False))
+        db.session.commit()
+        return result.rowcount
+    
+    def purge_expired_notifications(self, now: Optional[datetime] = None) -> int:
+        """
+        Delete notifications older than NOTIFICATION_TTL_DAYS, read or not.
+        
+        Returns:
+            int: The number of notifications deleted.
+        """
+        if self.notification_ttl <= timedelta(0):
+            return 0
+        cutoff = (now or datetime.utcnow()) - self.notification_ttl
         try:
-            if reminder.repeat_interval == 'daily':
-                next_time = reminder.reminder_time + timedelta(days=1)
-            elif reminder.repeat_interval == 'weekly':
-                next_time = reminder.reminder_time + timedelta(weeks=1)
-            elif reminder.repeat_interval == 'monthly':
-                next_time = reminder.reminder_time + timedelta(days=30)  # Approximate
-            else:
-                return False
-            
-            # Update reminder time
-            reminder.reminder_time = next_time
+            result = db.session.execute(delete(Notification).where(
+                Notification.timestamp < cutoff,
+            ).execution_options(synchronize_session=False))
             db.session.commit()
-            
-            # Schedule next occurrence
-            return self.schedule_reminder(reminder.id)
-            
-        except Exception as e:
-            logger.error(f"Error scheduling recurring reminder: {str(e)}")
-            return False
+        except Exception:
+            db.session.rollback()
+            raise
+        if result.rowcount:
+            logger.info(f"Deleted {result.rowcount} notifications older than {cutoff}")
+        return result.rowcount
     
     def initialize_all_reminders(self) -> int:
-        """Initialize all active reminders on application startup."""
+        """
+        Start delivering reminders from the due-queue on application startup.
+        
+        Reminders that became due while no worker was running are caught up
+        right away, according to the queue's catch-up policy. After that the
+        database is polled every REMINDER_POLL_SECONDS for reminders created,
+        moved or released by other processes.
+        
+        Returns:
+            int: The number of due and upcoming reminders scheduled.
+        """
         try:
-            now = datetime.utcnow()
-            active_reminders = db.session.query(Reminder).filter(
-                Reminder.is_active == True,
-                Reminder.reminder_time > now
-            ).all()
-            
-            scheduled_count = 0
-            for reminder in active_reminders:
-                if self.schedule_reminder(reminder.id):
-                    scheduled_count += 1
-            
+            app = current_app._get_current_object()
+            self.delivering = True
+            scheduled_count = self._schedule_upcoming(app)
+            self.scheduler.schedule(POLL_KEY, datetime.utcnow() + self.poll_interval, self._poll, app)
             logger.info(f"Initialized {scheduled_count} active reminders")
             return scheduled_count
             
@@ -252,19 +357,52 @@ class NotificationService:
             logger.error(f"Error initializing reminders: {str(e)}")
             return 0
     
-    def send_test_notification(self) -> bool:
-        """Send a test notification to verify the service is working."""
+    def stop_delivery(self, timeout: Optional[float] = None):
+        """Stop delivering reminders, waiting for the ones being sent."""
+        self.delivering = False
+        self.scheduler.stop(timeout, wait=True)
+    
+    def _schedule_upcoming(self, app) -> int:
+        """Schedule the reminders that are due, or will be before the next poll."""
+        upcoming = self.queue.upcoming(datetime.utcnow() + self.poll_interval)
+        for reminder_id, reminder_time in upcoming:
+            self.scheduler.schedule(reminder_id, reminder_time, self._process_due_in, app)
+        return len(upcoming)
+    
+    def _poll(self, app):
+        """Deliver due reminders and pick up upcoming ones, then schedule the next poll."""
+        with app.app_context():
+            try:
+                self.process_due()
+                self._schedule_upcoming(app)
+                self._purge_notifications_if_due()
+            except Exception as e:
+                logger.error(f"Error polling due reminders: {str(e)}")
+            finally:
+                self.scheduler.schedule(POLL_KEY, datetime.utcnow() + self.poll_interval, self._poll, app)
+    
+    def _purge_notifications_if_due(self):
+        """Delete expired notifications, at most once per NOTIFICATION_PURGE_INTERVAL."""
+        now = datetime.utcnow()
+        if self._last_purge is not None and now - self._last_purge < NOTIFICATION_PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        self.purge_expired_notifications(now)
+    
+    def send_test_notification(self, user_id: int) -> bool:
+        """Send a test notification to a user to verify the service is working."""
         test_reminder_data = {
             'id': 'test',
             'reminder_type': 'health_check',
             'title': 'Test Notification',
             'message': 'This is a test notification from your Health Management System.',
-            'reminder_time': datetime.now(),
+            'reminder_time': datetime.utcnow(),
             'target_id': None
         }
         
         # Store test notification
-        self.store_notification(test_reminder_data)
+        if not self.store_notification(user_id, test_reminder_data, 'test'):
+            return False
         
         # Send test email if configured
         user_email = os.environ.get('USER_EMAIL')
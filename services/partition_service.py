@@ -0,0 +1,247 @@
+"""
+Monthly range partitioning of health_metric and medication_log on PostgreSQL.
+
+When DATABASE_PARTITIONING is enabled, both tables are declaratively
+partitioned by month of recorded_at / taken_at:
+
+- one partition per month, named e.g. health_metric_y2025m01
+- a DEFAULT partition (health_metric_default) that catches rows outside
+  the pre-created months, so inserts never fail
+- a primary key of (id, partition column), since PostgreSQL requires the
+  partition key in every unique constraint; the ORM still identifies rows
+  by id alone, which stays unique through the shared sequence
+
+Queries that filter on the partition column (the date range of the health
+metric list, the rollup job's cutoff) only scan the matching months.
+
+Partitions must exist before the month starts. Run the maintenance job
+from a single scheduler, e.g. a monthly cron entry; it creates the next
+DATABASE_PARTITION_MONTHS_AHEAD months (default 3) and moves any rows that
+landed in the DEFAULT partition into their month:
+
+    python -m services.partition_service
+
+SQLite and other databases keep the plain tables; every function here is a
+no-op on them.
+"""
+import argparse
+import json
+import logging
+import os
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.schema import AddConstraint, CreateIndex
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> partition column
+PARTITIONED_TABLES = {
+    'health_metric': 'recorded_at',
+    'medication_log': 'taken_at',
+}
+
+def partitioning_enabled() -> bool:
+    """Check if DATABASE_PARTITIONING asks for partitioned tables."""
+    return os.environ.get('DATABASE_PARTITIONING', 'false').lower() in ('true', '1', 'yes')
+
+def months_ahead_default() -> int:
+    return int(os.environ.get('DATABASE_PARTITION_MONTHS_AHEAD', '3'))
+
+def supports_partitioning(connection) -> bool:
+    return connection.dialect.name == 'postgresql'
+
+def _month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f'{table}_y{month.year:04d}m{month.month:02d}'
+
+def default_partition_name(table: str) -> str:
+    return f'{table}_default'
+
+def is_partitioned(connection, table: str) -> bool:
+    """Check if ``table`` is a partitioned table."""
+    return connection.exec_driver_sql(
+        'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%(table)s)', {'table': table}
+    ).first() is not None
+
+def _exists(connection, name: str) -> bool:
+    return connection.exec_driver_sql('SELECT to_regclass(%(name)s)', {'name': name}).scalar() is not None
+
+def ensure_partitions(connection, table: str, months: Iterable[date]) -> List[str]:
+    """
+    Create the monthly partitions of ``table`` that do not exist yet.
+
+    Rows of a new month that are already in the DEFAULT partition are moved
+    into it. The partition is filled as a standalone table and then
+    attached, which only locks the parent against other DDL, not against
+    reads and writes.
+
+    Args:
+        connection: A connection inside a transaction.
+        table (str): A table of PARTITIONED_TABLES.
+        months: First days of the months to cover.
+
+    Returns:
+        list: The names of the partitions created.
+    """
+    column = PARTITIONED_TABLES[table]
+    default = default_partition_name(table)
+    has_default = _exists(connection, default)
+    created = []
+    for month in sorted(set(months)):
+        name = partition_name(table, month)
+        if _exists(connection, name):
+            continue
+        bounds = {'start': month, 'end': _add_months(month, 1)}
+        connection.exec_driver_sql(f'CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING STORAGE)')
+        if has_default:
+            connection.exec_driver_sql(
+                f'WITH moved AS (DELETE FROM {default} WHERE {column} >= %(start)s AND {column} < %(end)s RETURNING *) '
+                f'INSERT INTO {name} SELECT * FROM moved',
+                bounds,
+            )
+        connection.exec_driver_sql(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{bounds['start']:%Y-%m-%d}') TO ('{bounds['end']:%Y-%m-%d}')"
+        )
+        created.append(name)
+    if not has_default:
+        connection.exec_driver_sql(f'CREATE TABLE {default} PARTITION OF {table} DEFAULT')
+        created.append(default)
+    return created
+
+def _rebuild(connection, table: str, partitioned: bool, months_ahead: int):
+    """
+    Recreate ``table`` as a partitioned or a plain table, keeping its rows.
+
+    The columns, defaults and id sequence are kept; the primary key, foreign
+    keys and indexes are recreated from the models' metadata.
+    """
+    column = PARTITIONED_TABLES[table]
+    old = f'{table}_old'
+    metadata_table = db.metadata.tables[table]
+    # SQLAlchemy creates the id as SERIAL; the sequence must outlive the old table
+    sequence = connection.exec_driver_sql(
+        'SELECT pg_get_serial_sequence(%(table)s, %(column)s)', {'table': table, 'column': 'id'}
+    ).scalar()
+
+    connection.exec_driver_sql(f'ALTER TABLE {table} RENAME TO {old}')
+    partition_by = f' PARTITION BY RANGE ({column})' if partitioned else ''
+    connection.exec_driver_sql(
+        f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING STORAGE INCLUDING COMMENTS){partition_by}'
+    )
+    if partitioned:
+        # The partition column becomes part of the primary key; rows saved
+        # without one get the insert-time default the models would have used
+        connection.exec_driver_sql(f"UPDATE {old} SET {column} = timezone('utc', now()) WHERE {column} IS NULL")
+        connection.exec_driver_sql(f'ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL')
+        months = [_month_start(row[0]) for row in connection.exec_driver_sql(
+            f"SELECT DISTINCT date_trunc('month', {column}) FROM {old}"
+        )]
+        this_month = _month_start(datetime.utcnow())
+        months.extend(_add_months(this_month, offset) for offset in range(months_ahead + 1))
+        ensure_partitions(connection, table, months)
+    connection.exec_driver_sql(f'INSERT INTO {table} SELECT * FROM {old}')
+
+    if sequence:
+        connection.exec_driver_sql(f'ALTER SEQUENCE {sequence} OWNED BY NONE')
+    connection.exec_driver_sql(f'DROP TABLE {old}')
+    if sequence:
+        connection.exec_driver_sql(f'ALTER SEQUENCE {sequence} OWNED BY {table}.id')
+
+    key = f'id, {column}' if partitioned else 'id'
+    connection.exec_driver_sql(f'ALTER TABLE {table} ADD PRIMARY KEY ({key})')
+    for constraint in metadata_table.foreign_key_constraints:
+        connection.execute(AddConstraint(constraint))
+    for index in metadata_table.indexes:
+        connection.execute(CreateIndex(index))
+
+def partition_tables(connection, months_ahead: Optional[int] = None) -> List[str]:
+    """
+    Convert the plain tables of PARTITIONED_TABLES into partitioned ones.
+
+    Tables that are already partitioned are left alone. Converting copies
+    every row, so on a large database run it in a maintenance window.
+
+    Returns:
+        list: The tables converted.
+    """
+    if not supports_partitioning(connection):
+        return []
+    months_ahead = months_ahead_default() if months_ahead is None else months_ahead
+    converted = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(connection, table):
+            _rebuild(connection, table, True, months_ahead)
+            converted.append(table)
+            logger.info(f"Partitioned {table} by month")
+    return converted
+
+def unpartition_tables(connection) -> List[str]:
+    """Convert the partitioned tables of PARTITIONED_TABLES back into plain ones."""
+    if not supports_partitioning(connection):
+        return []
+    converted = []
+    for table in PARTITIONED_TABLES:
+        if is_partitioned(connection, table):
+            _rebuild(connection, table, False, 0)
+            converted.append(table)
+    return converted
+
+def maintain_partitions(connection, months_ahead: Optional[int] = None,
+                        now: Optional[datetime] = None) -> Dict[str, List[str]]:
+    """
+    Pre-create the coming months' partitions and empty the DEFAULT partitions.
+
+    Args:
+        connection: A connection inside a transaction.
+        months_ahead (int, optional): Months after the current one to create;
+            defaults to DATABASE_PARTITION_MONTHS_AHEAD.
+        now: Reference time; defaults to the current UTC time.
+
+    Returns:
+        dict: Partitioned table -> names of the partitions created.
+    """
+    if not supports_partitioning(connection):
+        return {}
+    months_ahead = months_ahead_default() if months_ahead is None else months_ahead
+    this_month = _month_start(now or datetime.utcnow())
+    created = {}
+    for table, column in PARTITIONED_TABLES.items():
+        if not is_partitioned(connection, table):
+            continue
+        months = [_add_months(this_month, offset) for offset in range(months_ahead + 1)]
+        # Rows outside the pre-created months, e.g. back-dated readings
+        default = default_partition_name(table)
+        if _exists(connection, default):
+            months.extend(_month_start(row[0]) for row in connection.exec_driver_sql(
+                f"SELECT DISTINCT date_trunc('month', {column}) FROM {default}"
+            ))
+        created[table] = ensure_partitions(connection, table, months)
+    return created
+
+def main():
+    parser = argparse.ArgumentParser(description='Create upcoming monthly partitions of health_metric and medication_log.')
+    parser.add_argument('--months-ahead', type=int, default=None,
+                        help='Months after the current one to create (default: DATABASE_PARTITION_MONTHS_AHEAD or 3)')
+    args = parser.parse_args()
+
+    # Importing the app must not recreate the tables or start delivering reminders
+    os.environ['DATABASE_RESET_ON_STARTUP'] = 'false'
+    os.environ['REMINDER_WORKER'] = 'external'
+    from app import app
+    with app.app_context():
+        with db.engine.begin() as connection:
+            result = maintain_partitions(connection, args.months_ahead)
+    print(json.dumps(result))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""
+Database-backed due-queue of reminders, shared by every worker process.
+
+The reminder table is the queue: an active reminder is due once its
+reminder_time has passed. A worker claims due reminders by setting a
+lease (lease_owner, lease_expires_at) in a single UPDATE:
+
+- on PostgreSQL, the rows are picked with SELECT ... FOR UPDATE SKIP LOCKED,
+  so concurrent workers claim disjoint rows without waiting on each other
+- on SQLite, the UPDATE runs under the database's single write lock, which
+  serializes claims in the same way
+
+Completing claimed reminders advances them to their next occurrence (or
+deactivates one-off reminders) and clears the leases, in a single UPDATE
+that only touches the reminders whose lease is still held and that were
+not deactivated, deleted or moved to another time since they were claimed.
+That state change happens exactly once, in the same transaction that stores
+the web notifications; emails are sent after it commits, so a crash between
+the two loses an email rather than sending it twice. A worker that dies
+while holding leases delays those reminders until the leases expire
+(REMINDER_LEASE_SECONDS, default 60).
+
+The queue only survives restarts because the tables do: the app drops and
+recreates every table on startup when DATABASE_RESET_ON_STARTUP=true, which
+discards all reminders and leases. It is off by default and must stay off
+wherever reminders are delivered.
+
+Reminders missed while no worker was running are caught up according to
+REMINDER_CATCH_UP:
+
+- 'fire' (default): send one notification for each missed reminder; a
+  recurring reminder skips to its next occurrence after now, so a week of
+  downtime does not send seven daily reminders
+- 'skip': only send reminders that are at most REMINDER_CATCH_UP_GRACE_SECONDS
+  (default 300) late; later ones are just advanced or deactivated
+"""
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Row, case, or_, select, update
+
+from database import db
+from models import Reminder
+
+logger = logging.getLogger(__name__)
+
+CATCH_UP_POLICIES = ('fire', 'skip')
+
+# Columns returned for each claimed reminder: everything needed to send it and advance it
+CLAIMED_COLUMNS = (
+    Reminder.id, Reminder.user_id, Reminder.reminder_type, Reminder.target_id, Reminder.title,
+    Reminder.message, Reminder.reminder_time, Reminder.repeat_interval,
+)
+
+# Recurrence intervals; 'monthly' is approximate
+REPEAT_INTERVALS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+    'monthly': timedelta(days=30),
+}
+
+def next_occurrence(reminder_time: datetime, repeat_interval: Optional[str],
+                    now: datetime) -> Optional[datetime]:
+    """
+    Return the first occurrence of a recurring reminder after ``now``.
+
+    Args:
+        reminder_time (datetime): The occurrence that is due.
+        repeat_interval (str): 'daily', 'weekly', 'monthly', or anything else for one-off reminders.
+        now (datetime): The current time.
+
+    Returns:
+        datetime or None: The next occurrence, or None for one-off reminders.
+    """
+    interval = REPEAT_INTERVALS.get(repeat_interval)
+    if interval is None:
+        return None
+    next_time = reminder_time + interval
+    if next_time <= now:
+        # Skip the occurrences missed while no worker was running
+        next_time += interval * ((now - next_time) // interval + 1)
+    return next_time
+
+class ReminderQueue:
+    """Claims, completes and releases due reminders on behalf of one worker."""
+
+    def __init__(self, worker_id: Optional[str] = None, lease_seconds: Optional[int] = None,
+                 catch_up: Optional[str] = None, grace_seconds: Optional[int] = None):
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        if lease_seconds is None:
+            lease_seconds = int(os.environ.get('REMINDER_LEASE_SECONDS', '60'))
+        self.lease = timedelta(seconds=lease_seconds)
+        self.catch_up = catch_up or os.environ.get('REMINDER_CATCH_UP', 'fire')
+        if self.catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"REMINDER_CATCH_UP must be one of {', '.join(CATCH_UP_POLICIES)}")
+        if grace_seconds is None:
+            grace_seconds = int(os.environ.get('REMINDER_CATCH_UP_GRACE_SECONDS', '300'))
+        self.grace = timedelta(seconds=grace_seconds)
+
+    def claim(self, limit: int = 100, now: Optional[datetime] = None,
+              window: timedelta = timedelta(0)) -> List[Row]:
+        """
+        Lease up to ``limit`` due reminders to this worker and commit.
+
+        A reminder is due when it is active, its reminder_time is at most
+        ``window`` away and it is not leased, or its lease has expired.
+        Claiming and reading the reminders is a single UPDATE ... RETURNING.
+
+        Returns:
+            list: Rows with the columns of CLAIMED_COLUMNS, earliest first.
+        """
+        now = now or datetime.utcnow()
+        due = select(Reminder.id).where(
+            Reminder.is_active == True,
+            Reminder.reminder_time <= now + window,
+            or_(Reminder.lease_expires_at.is_(None), Reminder.lease_expires_at <= now),
+        ).order_by(Reminder.reminder_time, Reminder.id).limit(limit)
+        if db.session.get_bind().dialect.name == 'postgresql':
+            due = due.with_for_update(skip_locked=True)
+
+        statement = update(Reminder).where(Reminder.id.in_(due)).values(
+            lease_owner=self.worker_id,
+            lease_expires_at=now + self.lease,
+        ).returning(*CLAIMED_COLUMNS).execution_options(synchronize_session=False)
+        try:
+            rows = db.session.execute(statement).all()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return sorted(rows, key=lambda row: (row.reminder_time, row.id))
+
+    def should_fire(self, reminder, now: Optional[datetime] = None) -> bool:
+        """Apply the catch-up policy: whether a claimed reminder is still worth sending."""
+        if self.catch_up == 'fire':
+            return True
+        return (now or datetime.utcnow()) - reminder.reminder_time <= self.grace
+
+    def complete(self, reminders: List[Row], fired_ids: Iterable[int],
+                 now: Optional[datetime] = None, commit: bool = True) -> Dict[int, Optional[datetime]]:
+        """
+        Advance claimed reminders to their next occurrence and release them, then commit.
+
+        One-off reminders are deactivated instead. All reminders are updated
+        by one UPDATE statement, which skips any whose lease this worker has
+        lost since it claimed them, and any that were deactivated, deleted or
+        given another reminder_time in the meantime (e.g. by a user's edit);
+        those must not be sent, and the leases still held on them are released.
+
+        Args:
+            reminders: Rows returned by claim().
+            fired_ids: IDs of the reminders whose notification is sent now.
+            now: The current time.
+            commit (bool): If False, the caller commits, e.g. after storing the
+                notifications in the same transaction.
+
+        Returns:
+            dict: ID -> next occurrence (None for one-off reminders) of the
+                  reminders this worker completed.
+        """
+        if not reminders:
+            return {}
+        now = now or datetime.utcnow()
+        next_times = {
+            reminder.id: next_occurrence(reminder.reminder_time, reminder.repeat_interval, now)
+            for reminder in reminders
+        }
+        recurring = {reminder_id: next_time for reminder_id, next_time in next_times.items() if next_time is not None}
+        one_off = [reminder_id for reminder_id, next_time in next_times.items() if next_time is None]
+        fired_ids = list(fired_ids)
+
+        values = {'lease_owner': None, 'lease_expires_at': None}
+        if recurring:
+            values['reminder_time'] = case(recurring, value=Reminder.id, else_=Reminder.reminder_time)
+        if one_off:
+            values['is_active'] = case((Reminder.id.in_(one_off), False), else_=Reminder.is_active)
+        if fired_ids:
+            values['last_fired_at'] = case((Reminder.id.in_(fired_ids), now), else_=Reminder.last_fired_at)
+
+        claimed_times = {reminder.id: reminder.reminder_time for reminder in reminders}
+        statement = update(Reminder).where(
+            Reminder.id.in_(list(next_times)),
+            Reminder.lease_owner == self.worker_id,
+            Reminder.is_active.is_(True),
+            Reminder.reminder_time == case(claimed_times, value=Reminder.id),
+        ).values(**values).returning(Reminder.id).execution_options(synchronize_session=False)
+        try:
+            completed = set(db.session.scalars(statement))
+            changed = sorted(set(next_times) - completed)
+            if changed:
+                self._release(changed)
+            if commit:
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if changed:
+            logger.warning(f"Reminders {changed} were changed, deactivated, deleted or lost their lease "
+                           f"before they were completed; not sending them")
+        return {reminder_id: next_times[reminder_id] for reminder_id in completed}
+
+    def release(self, reminder_ids: List[int]):
+        """Give up the leases on reminders this worker will not complete, e.g. on shutdown."""
+        if not reminder_ids:
+            return
+        self._release(reminder_ids)
+        db.session.commit()
+
+    def _release(self, reminder_ids: List[int]):
+        db.session.execute(update(Reminder).where(
+            Reminder.id.in_(reminder_ids),
+            Reminder.lease_owner == self.worker_id,
+        ).values(lease_owner=None, lease_expires_at=None).execution_options(synchronize_session=False))
+
+    def upcoming(self, until: datetime) -> List[Tuple[int, datetime]]:
+        """Return (id, reminder_time) of the active reminders due by ``until``."""
+        return db.session.query(Reminder.id, Reminder.reminder_time).filter(
+            Reminder.is_active == True,
+            Reminder.reminder_time <= until,
+        ).order_by(Reminder.reminder_time).all()
@@ -0,0 +1,59 @@
+"""
+Standalone reminder worker: claims due reminders and sends their notifications.
+
+Run it next to the web tier, which then only enqueues and cancels reminders
+(REMINDER_WORKER=external):
+
+    python -m services.reminder_worker
+
+Reminder delivery, email sending and rescheduling of recurring reminders
+then happen in this process instead of competing with request handling in
+the gunicorn workers. Several workers can run at once, on one host or
+many: reminders are leased from the database due-queue, so each one is
+still sent once (see services/reminder_queue.py).
+
+The worker stops on SIGINT or SIGTERM after finishing the reminders it is
+sending.
+"""
+import argparse
+import logging
+import os
+import signal
+import threading
+
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='Deliver due reminders from the database due-queue.')
+    parser.add_argument('--poll-seconds', type=int, default=None,
+                        help='How often to look for new reminders (default: REMINDER_POLL_SECONDS or 30)')
+    parser.add_argument('--delivery-threads', type=int, default=None,
+                        help='Reminders sent in parallel (default: REMINDER_DELIVERY_THREADS or 4)')
+    args = parser.parse_args()
+
+    # Set before the app and the notification service are imported: this
+    # process must not recreate the tables, and starts delivery itself
+    os.environ['DATABASE_RESET_ON_STARTUP'] = 'false'
+    os.environ['REMINDER_WORKER'] = 'external'
+    if args.poll_seconds is not None:
+        os.environ['REMINDER_POLL_SECONDS'] = str(args.poll_seconds)
+    if args.delivery_threads is not None:
+        os.environ['REMINDER_DELIVERY_THREADS'] = str(args.delivery_threads)
+
+    from app import app
+    from services.notification_service import notification_service
+
+    stopping = threading.Event()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signal_number, lambda signum, frame: stopping.set())
+
+    with app.app_context():
+        scheduled = notification_service.initialize_all_reminders()
+    logger.info(f"Reminder worker {notification_service.queue.worker_id} started with {scheduled} due or upcoming reminders")
+
+    stopping.wait()
+    logger.info("Reminder worker stopping")
+    notification_service.stop_delivery(timeout=30)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,416 @@
+"""
+Retention and rollup of health metrics and medication logs.
+
+Raw rows older than the retention horizon (ROLLUP_HORIZON_DAYS, default 90)
+are compacted into aggregate tables and then deleted:
+
+- HealthMetric rows become hourly and daily HealthMetricRollup buckets
+  (count, min, max and sum of value, per user and metric type).
+- MedicationLog rows become daily MedicationLogRollup counts per
+  medication and status, with the first and last time of each.
+
+If ROLLUP_ARCHIVE_DIR is set, the raw rows are also written there as
+gzip-compressed JSON lines before they are deleted. Long-range reads
+(summarize_health_metrics, summarize_medication_logs) combine the rollups
+with the raw rows that are still present, so they return the same buckets
+before and after a compaction. The list endpoints, which return raw rows,
+report where the compacted history ends (*_compacted_before) whenever the
+requested range reaches into it.
+
+Bucketing timestamps needs dialect-specific SQL, so rollups only work on
+PostgreSQL and SQLite; on other databases the job refuses to start.
+
+Run it periodically, from a single scheduler (e.g. a daily cron job):
+
+    python -m services.rollup_service
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, date, time, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, tuple_
+
+from database import db
+from models import HealthMetric, HealthMetricRollup, MedicationLog, MedicationLogRollup
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('hour', 'day')
+
+# Databases whose SQL can truncate timestamps to hours and days
+SUPPORTED_DIALECTS = ('postgresql', 'sqlite')
+
+# Rows of keys looked up per IN query when merging into existing rollups
+_KEY_CHUNK = 500
+
+class UnsupportedDatabaseError(Exception):
+    """Raised when rollups are used on a database other than PostgreSQL or SQLite."""
+
+def _supported_dialect() -> str:
+    """Return the name of the session's database dialect, which must support rollups."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in SUPPORTED_DIALECTS:
+        raise UnsupportedDatabaseError(
+            f"Rollups need one of {', '.join(SUPPORTED_DIALECTS)}, but the database is {dialect}"
+        )
+    return dialect
+
+def _bucket(column, granularity: str):
+    """SQL expression truncating a timestamp column to the start of its hour or day."""
+    if _supported_dialect() == 'postgresql':
+        return func.date_trunc(granularity, column)
+    return func.strftime('%Y-%m-%d %H:00:00' if granularity == 'hour' else '%Y-%m-%d 00:00:00', column)
+
+def _to_datetime(value) -> datetime:
+    # SQLite returns the truncated timestamp as text
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+def _to_date(value) -> date:
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value.date() if isinstance(value, datetime) else value
+
+def _chunks(items, size=_KEY_CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def aggregate_health_metrics(filters, granularity: str) -> Dict[tuple, Dict[str, Any]]:
+    """
+    Aggregate raw health metrics into buckets with one GROUP BY query.
+
+    Args:
+        filters (list): SQLAlchemy criteria selecting the raw rows.
+        granularity: 'hour' or 'day'.
+
+    Returns:
+        dict: (user_id, metric_type, bucket_start) -> {count, min, max, sum, unit}
+    """
+    bucket = _bucket(HealthMetric.recorded_at, granularity).label('bucket')
+    rows = db.session.query(
+        HealthMetric.user_id, HealthMetric.metric_type, bucket,
+        func.count(HealthMetric.id), func.min(HealthMetric.value), func.max(HealthMetric.value),
+        func.sum(HealthMetric.value), func.max(HealthMetric.unit),
+    ).filter(*filters).group_by(HealthMetric.user_id, HealthMetric.metric_type, bucket).all()
+    return {
+        (user_id, metric_type, _to_datetime(bucket_start)): {
+            'count': count, 'min': min_value, 'max': max_value, 'sum': sum_value, 'unit': unit,
+        }
+        for user_id, metric_type, bucket_start, count, min_value, max_value, sum_value, unit in rows
+    }
+
+def _merge_stats(target: Dict[str, Any], stats: Dict[str, Any]):
+    """Combine the aggregates of two sets of readings of the same bucket."""
+    target['count'] += stats['count']
+    for key, pick in (('min', min), ('max', max)):
+        values = [value for value in (target[key], stats[key]) if value is not None]
+        target[key] = pick(values) if values else None
+    if stats['sum'] is not None:
+        target['sum'] = (target['sum'] or 0) + stats['sum']
+    target['unit'] = target['unit'] or stats['unit']
+
+def summarize_health_metrics(user_id: int, metric_type: Optional[str], start: Optional[datetime],
+                             end: Optional[datetime], granularity: str) -> List[Dict[str, Any]]:
+    """
+    Return hourly or daily statistics of a user's health metrics over any range.
+
+    Buckets older than the retention horizon come from the rollup table and
+    newer ones are aggregated from the raw rows; a bucket present in both
+    (readings imported after its compaction) is merged.
+
+    Args:
+        user_id: The user.
+        metric_type: Only this metric type, or None for all.
+        start: Inclusive lower bound, or None.
+        end: Exclusive upper bound, or None.
+        granularity: 'hour' or 'day'.
+
+    Returns:
+        list: Buckets sorted by metric type and time, each with metric_type,
+              bucket_start, unit, count, min, max and mean.
+    """
+    filters = [HealthMetric.user_id == user_id, HealthMetric.recorded_at.isnot(None)]
+    rollup_query = HealthMetricRollup.query.filter_by(user_id=user_id, granularity=granularity)
+    if metric_type:
+        filters.append(HealthMetric.metric_type == metric_type)
+        rollup_query = rollup_query.filter_by(metric_type=metric_type)
+    if start is not None:
+        filters.append(HealthMetric.recorded_at >= start)
+        rollup_query = rollup_query.filter(HealthMetricRollup.bucket_start >= start)
+    if end is not None:
+        filters.append(HealthMetric.recorded_at < end)
+        rollup_query = rollup_query.filter(HealthMetricRollup.bucket_start < end)
+
+    buckets = {}
+    for rollup in rollup_query.all():
+        buckets[(rollup.metric_type, rollup.bucket_start)] = {
+            'count': rollup.count, 'min': rollup.min_value, 'max': rollup.max_value,
+            'sum': rollup.sum_value, 'unit': rollup.unit,
+        }
+    for (_, row_type, bucket_start), stats in aggregate_health_metrics(filters, granularity).items():
+        key = (row_type, bucket_start)
+        if key in buckets:
+            _merge_stats(buckets[key], stats)
+        else:
+            buckets[key] = stats
+
+    return [
+        {
+            'metric_type': row_type,
+            'bucket_start': bucket_start.isoformat(),
+            'unit': stats['unit'],
+            'count': stats['count'],
+            'min': stats['min'],
+            'max': stats['max'],
+            'mean': stats['sum'] / stats['count'] if stats['count'] and stats['sum'] is not None else None,
+        }
+        for (row_type, bucket_start), stats in sorted(buckets.items())
+    ]
+
+def aggregate_medication_logs(filters) -> Dict[tuple, Dict[str, Any]]:
+    """
+    Count raw medication logs per day and status with one GROUP BY query.
+
+    Returns:
+        dict: (user_id, medication_id, day, status) -> {count, first_at, last_at}
+    """
+    day = _bucket(MedicationLog.taken_at, 'day').label('day')
+    # Logs saved without a status count as taken, the column's default
+    log_status = func.coalesce(MedicationLog.status, 'taken').label('status')
+    rows = db.session.query(
+        MedicationLog.user_id, MedicationLog.medication_id, day, log_status,
+        func.count(MedicationLog.id), func.min(MedicationLog.taken_at), func.max(MedicationLog.taken_at),
+    ).filter(*filters).group_by(MedicationLog.user_id, MedicationLog.medication_id, day, log_status).all()
+    return {
+        (user_id, medication_id, _to_date(log_day), status): {
+            'count': count, 'first_at': _to_datetime(first_at), 'last_at': _to_datetime(last_at),
+        }
+        for user_id, medication_id, log_day, status, count, first_at, last_at in rows
+    }
+
+def summarize_medication_logs(user_id: int, medication_id: int, start: Optional[date],
+                              end: Optional[date]) -> List[Dict[str, Any]]:
+    """
+    Return daily counts per status of a medication's logs over any range.
+
+    Args:
+        user_id: The user.
+        medication_id: The medication.
+        start: Inclusive first day, or None.
+        end: Inclusive last day, or None.
+
+    Returns:
+        list: One entry per day, with a count per status, sorted by day.
+    """
+    filters = [MedicationLog.user_id == user_id, MedicationLog.medication_id == medication_id,
+               MedicationLog.taken_at.isnot(None)]
+    rollup_query = MedicationLogRollup.query.filter_by(user_id=user_id, medication_id=medication_id)
+    if start is not None:
+        filters.append(MedicationLog.taken_at >= datetime.combine(start, time.min))
+        rollup_query = rollup_query.filter(MedicationLogRollup.day >= start)
+    if end is not None:
+        filters.append(MedicationLog.taken_at < datetime.combine(end + timedelta(days=1), time.min))
+        rollup_query = rollup_query.filter(MedicationLogRollup.day <= end)
+
+    days = {}
+    for rollup in rollup_query.all():
+        counts = days.setdefault(rollup.day, {})
+        counts[rollup.status] = counts.get(rollup.status, 0) + rollup.count
+    for (_, _, log_day, status), stats in aggregate_medication_logs(filters).items():
+        counts = days.setdefault(log_day, {})
+        counts[status] = counts.get(status, 0) + stats['count']
+    return [{'day': log_day.isoformat(), 'counts': counts} for log_day, counts in sorted(days.items())]
+
+def health_metrics_compacted_before(user_id: int, metric_type: Optional[str] = None) -> Optional[datetime]:
+    """
+    Return the time before which a user's raw health metrics were compacted into rollups.
+
+    Raw readings before it are gone from the list endpoint (except readings
+    imported after the compaction); their statistics are in the rollups.
+
+    Returns:
+        datetime or None: The end of the latest compacted day, or None if
+                          nothing was compacted.
+    """
+    query = db.session.query(func.max(HealthMetricRollup.bucket_start)).filter(
+        HealthMetricRollup.user_id == user_id, HealthMetricRollup.granularity == 'day',
+    )
+    if metric_type:
+        query = query.filter(HealthMetricRollup.metric_type == metric_type)
+    last_day = query.scalar()
+    return _to_datetime(last_day) + timedelta(days=1) if last_day is not None else None
+
+def medication_logs_compacted_before(user_id: int, medication_id: int) -> Optional[datetime]:
+    """Return the time before which a medication's raw logs were compacted, or None."""
+    last_day = db.session.query(func.max(MedicationLogRollup.day)).filter(
+        MedicationLogRollup.user_id == user_id, MedicationLogRollup.medication_id == medication_id,
+    ).scalar()
+    return datetime.combine(_to_date(last_day) + timedelta(days=1), time.min) if last_day is not None else None
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+class RollupService:
+    """Compacts raw health metrics and medication logs older than the retention horizon."""
+
+    def __init__(self, horizon_days: Optional[int] = None, archive_dir: Optional[str] = None):
+        if horizon_days is None:
+            horizon_days = int(os.environ.get('ROLLUP_HORIZON_DAYS', '90'))
+        self.horizon_days = horizon_days
+        self.archive_dir = archive_dir or os.environ.get('ROLLUP_ARCHIVE_DIR') or None
+
+    def cutoff(self, now: Optional[datetime] = None) -> datetime:
+        """Return the start of the first day whose raw rows are kept."""
+        now = now or datetime.utcnow()
+        return datetime.combine((now - timedelta(days=self.horizon_days)).date(), time.min)
+
+    def run(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Compact everything older than the horizon in one transaction.
+
+        Only rows that existed when the run started (by ID) are aggregated
+        and deleted, so rows inserted concurrently are never dropped
+        unaggregated. Archive files are written under temporary names and
+        only renamed once the transaction has committed.
+
+        Args:
+            now: Reference time; defaults to the current UTC time.
+
+        Returns:
+            dict: The cutoff and the number of raw rows compacted per table.
+
+        Raises:
+            UnsupportedDatabaseError: If the database is not PostgreSQL or SQLite.
+        """
+        _supported_dialect()
+        cutoff = self.cutoff(now)
+        archives = []
+        try:
+            metrics = self._compact_health_metrics(cutoff, archives)
+            logs = self._compact_medication_logs(cutoff, archives)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for temp_path, _ in archives:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            logger.error(f"Rollup failed: {str(e)}")
+            raise
+
+        for temp_path, path in archives:
+            os.replace(temp_path, path)
+        logger.info(f"Rolled up {metrics} health metrics and {logs} medication logs older than {cutoff}")
+        return {'cutoff': cutoff.isoformat(), 'health_metrics': metrics, 'medication_logs': logs}
+
+    def _archive(self, model, query, cutoff: datetime, archives: list):
+        """Write the raw rows selected by ``query`` to a gzip JSON lines file."""
+        if not self.archive_dir:
+            return
+        table = model.__tablename__
+        directory = os.path.join(self.archive_dir, table)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{table}-before-{cutoff:%Y%m%d}-{datetime.utcnow():%Y%m%dT%H%M%S%f}.jsonl.gz")
+        temp_path = path + '.tmp'
+        archives.append((temp_path, path))
+        columns = [column.key for column in model.__table__.columns]
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as file:
+            for row in query.yield_per(1000):
+                record = {name: getattr(row, name) for name in columns}
+                file.write(json.dumps(record, default=_json_default) + '\n')
+
+    def _compact_health_metrics(self, cutoff: datetime, archives: list) -> int:
+        max_id = db.session.query(func.max(HealthMetric.id)).scalar()
+        if max_id is None:
+            return 0
+        filters = [HealthMetric.recorded_at < cutoff, HealthMetric.id <= max_id]
+
+        for granularity in GRANULARITIES:
+            aggregates = aggregate_health_metrics(filters, granularity)
+            existing = {}
+            for keys in _chunks(aggregates):
+                for rollup in HealthMetricRollup.query.filter(
+                    HealthMetricRollup.granularity == granularity,
+                    tuple_(HealthMetricRollup.user_id, HealthMetricRollup.metric_type,
+                           HealthMetricRollup.bucket_start).in_(keys),
+                ):
+                    existing[(rollup.user_id, rollup.metric_type, rollup.bucket_start)] = rollup
+            for key, stats in aggregates.items():
+                rollup = existing.get(key)
+                if rollup is None:
+                    user_id, metric_type, bucket_start = key
+                    db.session.add(HealthMetricRollup(
+                        user_id=user_id, metric_type=metric_type, granularity=granularity,
+                        bucket_start=bucket_start, unit=stats['unit'], count=stats['count'],
+                        min_value=stats['min'], max_value=stats['max'], sum_value=stats['sum'],
+                    ))
+                    continue
+                merged = {'count': rollup.count, 'min': rollup.min_value, 'max': rollup.max_value,
+                          'sum': rollup.sum_value, 'unit': rollup.unit}
+                _merge_stats(merged, stats)
+                rollup.count, rollup.min_value, rollup.max_value = merged['count'], merged['min'], merged['max']
+                rollup.sum_value, rollup.unit = merged['sum'], merged['unit']
+
+        raw = HealthMetric.query.filter(*filters)
+        self._archive(HealthMetric, raw.order_by(HealthMetric.id), cutoff, archives)
+        db.session.flush()
+        return raw.delete(synchronize_session=False)
+
+    def _compact_medication_logs(self, cutoff: datetime, archives: list) -> int:
+        max_id = db.session.query(func.max(MedicationLog.id)).scalar()
+        if max_id is None:
+            return 0
+        filters = [MedicationLog.taken_at < cutoff, MedicationLog.id <= max_id]
+
+        aggregates = aggregate_medication_logs(filters)
+        existing = {}
+        for keys in _chunks(aggregates):
+            for rollup in MedicationLogRollup.query.filter(
+                tuple_(MedicationLogRollup.user_id, MedicationLogRollup.medication_id,
+                       MedicationLogRollup.day, MedicationLogRollup.status).in_(keys),
+            ):
+                existing[(rollup.user_id, rollup.medication_id, rollup.day, rollup.status)] = rollup
+        for key, stats in aggregates.items():
+            rollup = existing.get(key)
+            if rollup is None:
+                user_id, medication_id, log_day, status = key
+                db.session.add(MedicationLogRollup(
+                    user_id=user_id, medication_id=medication_id, day=log_day, status=status,
+                    count=stats['count'], first_at=stats['first_at'], last_at=stats['last_at'],
+                ))
+                continue
+            rollup.count += stats['count']
+            rollup.first_at = min(value for value in (rollup.first_at, stats['first_at']) if value is not None)
+            rollup.last_at = max(value for value in (rollup.last_at, stats['last_at']) if value is not None)
+
+        raw = MedicationLog.query.filter(*filters)
+        self._archive(MedicationLog, raw.order_by(MedicationLog.id), cutoff, archives)
+        db.session.flush()
+        return raw.delete(synchronize_session=False)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact old health metrics and medication logs into rollups.')
+    parser.add_argument('--horizon-days', type=int, default=None,
+                        help='Keep raw rows for this many days (default: ROLLUP_HORIZON_DAYS or 90)')
+    parser.add_argument('--archive-dir', default=None,
+                        help='Also archive raw rows here as .jsonl.gz (default: ROLLUP_ARCHIVE_DIR)')
+    args = parser.parse_args()
+
+    # Importing the app must not recreate the tables or start delivering reminders
+    os.environ['DATABASE_RESET_ON_STARTUP'] = 'false'
+    os.environ['REMINDER_WORKER'] = 'external'
+    from app import app
+    with app.app_context():
+        try:
+            result = RollupService(args.horizon_days, args.archive_dir).run()
+        except UnsupportedDatabaseError as e:
+            parser.exit(2, f'{parser.prog}: error: {e}\n')
+    print(json.dumps(result))
+
+if __name__ == '__main__':
+    main()
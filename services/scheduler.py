@@ -0,0 +1,177 @@
+"""
+Single-thread scheduler for timed callbacks, backed by a min-heap.
+
+Replaces one threading.Timer per reminder: every scheduled job is a heap
+entry, and one scheduler thread sleeps until the earliest one is due.
+Due callbacks run on a small pool of delivery threads, so a slow email
+does not hold back the jobs due after it.
+
+Costs, for n scheduled jobs:
+
+- schedule / reschedule: O(log n)
+- cancel: O(1); the heap entry is only marked, and cancelled entries are
+  purged once they make up half of the heap
+- memory: one small list per job, and a constant number of threads
+"""
+import heapq
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Heap entry fields: [due, sequence, key, callback, args]; a cancelled entry's callback is None
+_DUE, _SEQUENCE, _KEY, _CALLBACK, _ARGS = range(5)
+
+# Cancelled entries are purged when there are at least this many of them
+# and they make up half of the heap
+_MIN_PURGE = 1024
+
+class HeapScheduler:
+    """Runs callbacks at given UTC times from a single scheduler thread."""
+
+    def __init__(self, name: str = 'scheduler', delivery_threads: int = 4):
+        self.name = name
+        self.delivery_threads = delivery_threads
+        self._heap: List[list] = []
+        self._entries: Dict[Hashable, list] = {}
+        self._cancelled = 0
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def schedule(self, key: Hashable, due: datetime, callback: Callable, *args: Any):
+        """
+        Run ``callback(*args)`` at ``due``, replacing any job already scheduled under ``key``.
+
+        Args:
+            key: Identifies the job, e.g. a reminder ID.
+            due (datetime): Naive UTC time; a time in the past runs as soon as possible.
+            callback: The function to call from a delivery thread.
+        """
+        with self._condition:
+            self._cancel(key)
+            entry = [due, next(self._sequence), key, callback, args]
+            self._entries[key] = entry
+            heapq.heappush(self._heap, entry)
+            # Only a new earliest job changes how long the thread should sleep
+            if self._heap[0] is entry:
+                self._condition.notify()
+            stopped = self._stopping
+        if not stopped:
+            self.start()
+
+    def reschedule(self, key: Hashable, due: datetime) -> bool:
+        """Move a scheduled job to a new time; returns False if ``key`` is not scheduled."""
+        with self._condition:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            callback, args = entry[_CALLBACK], entry[_ARGS]
+        self.schedule(key, due, callback, *args)
+        return True
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel a scheduled job; returns False if ``key`` is not scheduled."""
+        with self._condition:
+            return self._cancel(key)
+
+    def next_due(self) -> Optional[datetime]:
+        """Return the due time of the earliest job, if any."""
+        with self._condition:
+            self._drop_cancelled_head()
+            return self._heap[0][_DUE] if self._heap else None
+
+    def start(self):
+        """Start the scheduler thread if it is not running yet; schedule() does this until stop() is called."""
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._executor = ThreadPoolExecutor(max_workers=self.delivery_threads,
+                                                thread_name_prefix=f'{self.name}-delivery')
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None, wait: bool = False):
+        """
+        Stop the scheduler thread; scheduled jobs are kept and run after the next start().
+
+        Args:
+            timeout (float, optional): Seconds to wait for the scheduler thread to exit.
+            wait (bool): Also wait for the callbacks already handed to delivery threads.
+        """
+        with self._condition:
+            thread, executor = self._thread, self._executor
+            self._stopping = True
+            self._condition.notify()
+        if thread is not None:
+            thread.join(timeout)
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        self._thread = None
+
+    def _cancel(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        entry[_CALLBACK] = None
+        entry[_ARGS] = None
+        self._cancelled += 1
+        if self._cancelled >= _MIN_PURGE and self._cancelled * 2 >= len(self._heap):
+            self._heap = [entry for entry in self._heap if entry[_CALLBACK] is not None]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+        return True
+
+    def _drop_cancelled_head(self):
+        while self._heap and self._heap[0][_CALLBACK] is None:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+
+    def _run(self):
+        while True:
+            with self._condition:
+                due_entries = []
+                while not due_entries:
+                    if self._stopping:
+                        return
+                    self._drop_cancelled_head()
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    delay = (self._heap[0][_DUE] - datetime.utcnow()).total_seconds()
+                    if delay > 0:
+                        self._condition.wait(delay)
+                        continue
+                    # Everything due by now, in due order
+                    now = datetime.utcnow()
+                    while self._heap and (self._heap[0][_CALLBACK] is None or self._heap[0][_DUE] <= now):
+                        entry = heapq.heappop(self._heap)
+                        if entry[_CALLBACK] is None:
+                            self._cancelled -= 1
+                            continue
+                        del self._entries[entry[_KEY]]
+                        due_entries.append(entry)
+
+                # Handed out under the lock: stop() marks the scheduler as
+                # stopping under it too, before shutting the executor down
+                for entry in due_entries:
+                    self._executor.submit(self._call, entry[_KEY], entry[_CALLBACK], entry[_ARGS])
+
+    def _call(self, key: Hashable, callback: Callable, args: tuple):
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error(f"Scheduled job {key} failed: {str(e)}")
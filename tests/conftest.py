@@ -0,0 +1,98 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+from flask import g
+from sqlalchemy import event
+
+# The app picks its database when it is imported: use a throwaway SQLite file
+# unless TEST_DATABASE_URL points at a PostgreSQL test database, and never
+# start delivering reminders from the test process
+_database_dir = tempfile.mkdtemp(prefix='health-tests-')
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL') or \
+    f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+os.environ['REMINDER_WORKER'] = 'external'
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app  # noqa: E402
+from database import db  # noqa: E402
+from models import User  # noqa: E402
+from utils import data_loader  # noqa: E402
+
+@flask_app.teardown_request
+def _forget_logged_in_user(exception=None):
+    # Requests made while a test holds the app context share its ``g``, where
+    # Flask-Login caches the user; each request must load its own
+    g.pop('_login_user', None)
+
+@pytest.fixture
+def app():
+    """The application with freshly created, empty tables."""
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+
+@pytest.fixture
+def users(app):
+    """Two users, so tests can check that rows are kept per user."""
+    created = []
+    for name in ('alice', 'bob'):
+        user = User(username=name, email=f'{name}@example.com')
+        user.set_password('secret')
+        db.session.add(user)
+        created.append(user)
+    db.session.commit()
+    return created
+
+@pytest.fixture
+def login(app):
+    """Return a test client logged in as the given user."""
+    def client_for(user):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user.id)
+            session['_fresh'] = True
+        return client
+    return client_for
+
+@pytest.fixture
+def captured_sql(app):
+    """Return a context manager collecting the SQL statements run on an engine (the primary's by default)."""
+    @contextmanager
+    def capture(engine=None):
+        engine = engine or db.engine
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+    return capture
+
+@pytest.fixture
+def json_store(tmp_path, monkeypatch):
+    """An empty JSON data store in a temporary directory."""
+    monkeypatch.setattr(data_loader, 'STORE_DIR', str(tmp_path / 'json_store'))
+    monkeypatch.setattr(data_loader, 'DATA_FILE', str(tmp_path / 'dummy_data.json'))
+    data_loader._cache.clear()
+    _forget_repository_views()
+    yield tmp_path
+    data_loader._cache.clear()
+    _forget_repository_views()
+
+def _forget_repository_views():
+    # Generations restart with each store, so the views must be rebuilt
+    from utils import json_repository
+    for collection in (json_repository._medications, json_repository._health_metrics,
+                       json_repository._appointments, json_repository._reminders):
+        collection._generation = None
@@ -0,0 +1,85 @@
+import pytest
+
+from database import db
+from models import HealthMetric, Medication, MedicationLog
+
+def _glucose(value, **fields):
+    return dict({'metric_type': 'glucose', 'value': value, 'unit': 'mg/dL'}, **fields)
+
+@pytest.fixture
+def client(users, login):
+    return login(users[0])
+
+def test_batch_create_reports_each_row(client):
+    response = client.post('/api/health-metrics/batch', json=[_glucose(90), {'metric_type': 'glucose'}, _glucose(95)])
+    assert response.status_code == 207
+    body = response.get_json()
+    assert (body['created'], body['failed']) == (2, 1)
+    assert [result['status'] for result in body['results']] == ['created', 'invalid', 'created']
+    assert 'unit' in body['results'][1]['errors']
+    assert [metric.value for metric in HealthMetric.query.order_by(HealthMetric.id)] == [90, 95]
+
+    assert client.post('/api/health-metrics/batch', json={'items': [_glucose(100)]}).status_code == 201
+    assert client.post('/api/health-metrics/batch', json=[{'value': 1}]).status_code == 400
+    assert client.post('/api/health-metrics/batch', json=[]).status_code == 400
+
+def test_atomic_batch_create_inserts_nothing_unless_every_row_is_valid(client):
+    response = client.post('/api/health-metrics/batch?atomic=true', json=[_glucose(90), {'metric_type': 'glucose'}])
+    assert response.status_code == 400
+    assert [result['status'] for result in response.get_json()['results']] == ['skipped', 'invalid']
+    assert HealthMetric.query.count() == 0
+
+def test_batch_update_and_delete_only_touch_the_users_metrics(users, client):
+    mine = [HealthMetric(user_id=users[0].id, **_glucose(value)) for value in (90, 95, 100)]
+    theirs = HealthMetric(user_id=users[1].id, **_glucose(120))
+    db.session.add_all(mine + [theirs])
+    db.session.commit()
+    first, second, third = (metric.id for metric in mine)
+
+    response = client.put('/api/health-metrics/batch', json=[
+        {'id': first, 'value': 91}, {'id': second, 'notes': 'after lunch'}, {'id': theirs.id, 'value': 1},
+        {'value': 2},
+    ])
+    assert response.status_code == 207
+    assert [result['status'] for result in response.get_json()['results']] == \
+        ['updated', 'updated', 'not_found', 'invalid']
+    db.session.expire_all()
+    assert (db.session.get(HealthMetric, first).value, db.session.get(HealthMetric, second).notes) == \
+        (91, 'after lunch')
+    assert db.session.get(HealthMetric, theirs.id).value == 120
+
+    assert client.delete('/api/health-metrics/batch?atomic=true', json=[first, theirs.id]).status_code == 400
+    assert HealthMetric.query.count() == 4
+
+    response = client.delete('/api/health-metrics/batch', json=[first, {'id': second}])
+    assert response.status_code == 200
+    assert response.get_json()['deleted'] == 2
+    assert sorted(metric.id for metric in HealthMetric.query) == [third, theirs.id]
+
+def test_medication_log_batch_writes_stay_within_the_medication(users, client):
+    medications = [Medication(user_id=users[0].id, name=name, dosage='1 tablet', frequency='once_daily',
+                              intake_time='08:00') for name in ('A', 'B')]
+    db.session.add_all(medications)
+    db.session.commit()
+    first, other = (medication.id for medication in medications)
+
+    response = client.post(f'/api/medications/{first}/logs/batch', json=[{'status': 'taken'}, {'status': 'late'}])
+    assert response.status_code == 207
+    log_id = response.get_json()['results'][0]['id']
+    db.session.add(MedicationLog(user_id=users[0].id, medication_id=other, status='taken'))
+    db.session.commit()
+    other_log = MedicationLog.query.filter_by(medication_id=other).one().id
+
+    response = client.put(f'/api/medications/{first}/logs/batch', json=[
+        {'id': log_id, 'status': 'skipped'}, {'id': other_log, 'status': 'skipped'},
+        {'id': log_id, 'medication_id': other},
+    ])
+    assert [result['status'] for result in response.get_json()['results']] == ['updated', 'not_found', 'invalid']
+    db.session.expire_all()
+    assert db.session.get(MedicationLog, log_id).status == 'skipped'
+    assert db.session.get(MedicationLog, other_log).status == 'taken'
+
+    response = client.delete(f'/api/medications/{first}/logs/batch', json=[log_id, other_log])
+    assert response.status_code == 207
+    assert [log.id for log in MedicationLog.query] == [other_log]
+    assert client.delete(f'/api/medications/{other + 1}/logs/batch', json=[other_log]).status_code == 404
@@ -0,0 +1,196 @@
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils import data_loader
+
+def _seed(medications):
+    assert data_loader.save_dummy_data(medications, 'medications')
+    # Read the rows back from disk, as another process would
+    data_loader.invalidate_cache()
+
+@pytest.mark.parametrize('storage_mode', ['snapshot', 'journal'])
+def test_deleting_a_log_leaves_the_medication_with_the_same_id(json_store, monkeypatch, storage_mode):
+    monkeypatch.setenv('JSON_STORAGE_MODE', storage_mode)
+    _seed([
+        {'id': 1, 'name': 'A', 'logs': [{'id': 2, 'medication_id': 1, 'status': 'taken'}]},
+        {'id': 2, 'name': 'B', 'logs': [{'id': 1, 'medication_id': 2, 'status': 'taken'}]},
+    ])
+
+    assert data_loader.delete_record('medication_logs', 2)
+    assert data_loader.delete_record('medication_logs', 1, parent_id=2)
+    assert not data_loader.delete_record('medication_logs', 3)
+
+    # Replaying the journal from disk gives the same result as the cache
+    data_loader.invalidate_cache()
+    medications = {row['id']: row for row in data_loader.load_dummy_data('medications')}
+    assert sorted(medications) == [1, 2]
+    assert medications[1]['logs'] == [] and medications[2]['logs'] == []
+
+def test_records_are_returned_as_plain_dicts(json_store):
+    _seed([{
+        'id': 1, 'name': 'A', 'created_at': '2025-01-02T08:30:00', 'updated_at': '2025-01-02T08:30:00',
+        'logs': [{'id': 1, 'medication_id': 1, 'taken_at': '2025-01-03T09:00:00'}],
+    }])
+    from utils.json_repository import JsonMedicationRepository
+
+    for record in (data_loader.load_dummy_data('medications')[0],
+                   data_loader.load_dummy_data()['medications'][0],
+                   JsonMedicationRepository.get_all()[0],
+                   JsonMedicationRepository.get_by_id(1)):
+        assert type(record) is dict
+        assert type(record['logs'][0]) is dict
+        assert record['created_at'] == datetime(2025, 1, 2, 8, 30)
+        assert json.loads(json.dumps(record, default=str)) == {
+            'id': 1, 'name': 'A', 'created_at': '2025-01-02 08:30:00', 'updated_at': '2025-01-02 08:30:00',
+            'logs': [{'id': 1, 'medication_id': 1, 'taken_at': '2025-01-03 09:00:00'}],
+        }
+
+def test_binary_snapshot_round_trips_timezone_aware_timestamps(json_store, monkeypatch):
+    monkeypatch.setenv('JSON_SNAPSHOT_FORMAT', 'binary')
+    aware = datetime(2025, 3, 1, 8, 0, tzinfo=timezone(timedelta(hours=2)))
+    naive = datetime(2025, 3, 2, 8, 0)
+    assert data_loader.save_dummy_data([
+        {'id': 1, 'title': 'A', 'reminder_time': aware},
+        {'id': 2, 'title': 'B', 'reminder_time': naive},
+    ], 'reminders')
+
+    data_loader.invalidate_cache()
+    reminders = {row['id']: row for row in data_loader.load_dummy_data('reminders')}
+    assert reminders[1]['reminder_time'] == aware
+    assert reminders[1]['reminder_time'].utcoffset() == timedelta(hours=2)
+    assert reminders[2]['reminder_time'] == naive
+
+def test_materialized_rows_are_copies_that_follow_later_writes(json_store):
+    assert data_loader.save_dummy_data(
+        [{'id': 1, 'title': 'A', 'reminder_time': '2025-03-01T08:00:00'}], 'reminders'
+    )
+    data_loader.invalidate_cache()
+
+    first = data_loader.load_dummy_data('reminders')[0]
+    first['title'] = 'changed by the caller'
+    assert data_loader.load_dummy_data('reminders')[0]['title'] == 'A'
+
+    assert data_loader.save_record('reminders', {'id': 1, 'title': 'B', 'reminder_time': datetime(2025, 3, 2, 8)})
+    assert data_loader.load_dummy_data('reminders') == [
+        {'id': 1, 'title': 'B', 'reminder_time': datetime(2025, 3, 2, 8)}
+    ]
+
+def test_a_warm_read_neither_parses_nor_decodes(json_store, monkeypatch):
+    assert data_loader.save_dummy_data([
+        {'id': i, 'title': f'R{i}', 'reminder_time': datetime(2025, 3, 1, 8) + timedelta(hours=i),
+         'created_at': datetime(2025, 3, 1), 'updated_at': datetime(2025, 3, 1)}
+        for i in range(1, 51)
+    ], 'reminders')
+    data_loader.invalidate_cache()
+    assert len(data_loader.load_dummy_data('reminders')) == 50
+
+    calls = []
+    read_snapshot = data_loader._read_snapshot
+    monkeypatch.setattr(data_loader, '_read_snapshot', lambda *args: calls.append('parse') or read_snapshot(*args))
+    decoders = data_loader._ISO_DECODERS['reminders']
+    for field, decode in list(decoders.items()):
+        monkeypatch.setitem(decoders, field, lambda value, decode=decode: calls.append('decode') or decode(value))
+    # Nor does it walk the cached rows field by field to copy them
+    get_field = data_loader.LazyRecord.__getitem__
+    monkeypatch.setattr(data_loader.LazyRecord, '__getitem__',
+                        lambda record, key: calls.append('field') or get_field(record, key))
+
+    reminders = data_loader.load_dummy_data('reminders')
+    assert calls == []
+    assert len(reminders) == 50 and reminders[0]['reminder_time'] == datetime(2025, 3, 1, 9)
+
+def test_saving_a_collection_over_a_newer_generation_raises(json_store):
+    assert data_loader.save_dummy_data([{'id': 1, 'title': 'A'}], 'reminders')
+    generation = data_loader.dataset_generation('reminders')
+    assert data_loader.save_record('reminders', {'id': 2, 'title': 'B'})
+
+    with pytest.raises(data_loader.ConcurrentModificationError):
+        data_loader.save_dummy_data([{'id': 1, 'title': 'A2'}], 'reminders', expected_generation=generation)
+    with pytest.raises(data_loader.ConcurrentModificationError):
+        data_loader.save_record('reminders', {'id': 3, 'title': 'C'}, expected_generation=generation)
+
+    # The other writer's change survives, on disk as well as in the cache
+    data_loader.invalidate_cache()
+    assert [(row['id'], row['title']) for row in data_loader.load_dummy_data('reminders')] == [(1, 'A'), (2, 'B')]
+
+@pytest.fixture
+def journal(json_store, monkeypatch):
+    """A JSON store in journal mode, holding one reminder in its snapshot."""
+    monkeypatch.setenv('JSON_STORAGE_MODE', 'journal')
+    assert data_loader.save_dummy_data([{'id': 1, 'title': 'A'}], 'reminders')
+    return json_store / 'json_store'
+
+def _titles():
+    return [(row['id'], row['title']) for row in data_loader.load_dummy_data('reminders')]
+
+def test_journal_writes_are_appended_and_replayed(journal):
+    snapshot = (journal / 'reminders.json').read_bytes()
+    assert data_loader.save_record('reminders', {'id': 2, 'title': 'B'})
+    assert data_loader.save_record('reminders', {'id': 1, 'title': 'A2'})
+    assert data_loader.delete_record('reminders', 2)
+
+    assert (journal / 'reminders.json').read_bytes() == snapshot
+    assert len((journal / 'reminders.journal').read_text().splitlines()) == 3
+    data_loader.invalidate_cache()
+    assert _titles() == [(1, 'A2')]
+
+def test_replay_skips_corrupt_records_and_waits_for_incomplete_ones(journal):
+    assert data_loader.save_record('reminders', {'id': 2, 'title': 'B'})
+    with open(journal / 'reminders.journal', 'a') as file:
+        file.write('{not json\n')
+        file.write('{"op":"put","type":"reminders","record":{"id":3,')
+    data_loader.invalidate_cache()
+    assert _titles() == [(1, 'A'), (2, 'B')]
+
+    # The writer finishes its line: only the new part is replayed
+    with open(journal / 'reminders.journal', 'a') as file:
+        file.write('"title":"C"}}\n')
+    assert _titles() == [(1, 'A'), (2, 'B'), (3, 'C')]
+
+def test_compaction_folds_the_journal_into_the_snapshot(journal, monkeypatch):
+    monkeypatch.setenv('JSON_JOURNAL_COMPACT_THRESHOLD', '3')
+    for i in range(2, 5):
+        assert data_loader.save_record('reminders', {'id': i, 'title': f'R{i}'})
+    # The third record started a background compaction
+    for thread in threading.enumerate():
+        if thread.name.startswith('json-journal-compaction-'):
+            thread.join(5)
+
+    assert (journal / 'reminders.journal').read_text() == ''
+    assert [row['id'] for row in json.loads((journal / 'reminders.json').read_text())] == [1, 2, 3, 4]
+    data_loader.invalidate_cache()
+    assert [row_id for row_id, _ in _titles()] == [1, 2, 3, 4]
+
+    assert data_loader.save_record('reminders', {'id': 5, 'title': 'R5'})
+    assert data_loader.compact_journal('reminders')
+    data_loader.invalidate_cache()
+    assert [row_id for row_id, _ in _titles()] == [1, 2, 3, 4, 5]
+
+def test_collections_migrate_to_their_own_shards(json_store):
+    seed = json_store / 'dummy_data.json'
+    seed.write_text(json.dumps({
+        'medications': [{'id': 1, 'name': 'A', 'logs': []}],
+        'health_metrics': [],
+        'appointments': [],
+        'reminders': [{'id': 1, 'title': 'R'}],
+    }))
+    shards = json_store / 'json_store'
+
+    assert [row['title'] for row in data_loader.load_dummy_data('reminders')] == ['R']
+    assert sorted(path.name for path in shards.glob('*.json')) == ['reminders.json']
+
+    data_loader.migrate_to_shards()
+    assert sorted(path.name for path in shards.glob('*.json')) == \
+        ['appointments.json', 'health_metrics.json', 'medications.json', 'reminders.json']
+
+    # From then on the shards are authoritative, and a write only touches its own
+    seed.write_text(json.dumps({'reminders': []}))
+    before = {path.name: path.stat().st_mtime_ns for path in shards.glob('*.json')}
+    assert data_loader.save_record('medications', {'id': 2, 'name': 'B', 'logs': []})
+    changed = [path.name for path in shards.glob('*.json') if path.stat().st_mtime_ns != before[path.name]]
+    assert changed == ['medications.json']
+    data_loader.invalidate_cache()
+    assert [row['title'] for row in data_loader.load_dummy_data('reminders')] == ['R']
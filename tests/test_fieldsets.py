@@ -0,0 +1,62 @@
+import re
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from database import db
+from models import Appointment, Medication, MedicationLog, Reminder
+
+@pytest.fixture
+def client(users, login):
+    user = users[0]
+    for i in range(3):
+        db.session.add(Reminder(user_id=user.id, reminder_type='medication', title=f'Dose {i}', message='Take it',
+                                reminder_time=datetime(2025, 1, 1, 8) + timedelta(days=i)))
+    db.session.add(Appointment(user_id=user.id, title='Checkup', doctor_name='Dr. Who', date=date(2025, 1, 2),
+                               time=time(9), status='scheduled'))
+    medication = Medication(user_id=user.id, name='M', dosage='1 tablet', frequency='once_daily', intake_time='08:00')
+    db.session.add(medication)
+    db.session.flush()
+    db.session.add(MedicationLog(user_id=user.id, medication_id=medication.id, status='taken',
+                                 taken_at=datetime(2025, 1, 1, 8)))
+    db.session.commit()
+    return login(user)
+
+def _selected_columns(statements, table):
+    """The columns of ``table`` listed by the SELECTs that read it."""
+    for statement in statements:
+        match = re.match(rf'SELECT (.*?)\s+FROM {table}\b', statement, re.S)
+        if match:
+            return set(re.findall(rf'\b{table}\.(\w+)', match.group(1)))
+    raise AssertionError(f'{table} was not read')
+
+def test_list_fieldsets_limit_the_response_and_the_select(client, captured_sql):
+    with captured_sql() as statements:
+        response = client.get('/api/reminders?fields=title,id')
+    assert [sorted(reminder) for reminder in response.get_json()] == [['id', 'title']] * 3
+    # reminder_time is needed to order the list
+    assert _selected_columns(statements, 'reminder') == {'id', 'title', 'reminder_time'}
+
+    page = client.get('/api/reminders?fields=title&limit=2').get_json()
+    assert [reminder['title'] for reminder in page['items']] == ['Dose 0', 'Dose 1']
+    rest = client.get(f"/api/reminders?fields=title&limit=2&cursor={page['next_cursor']}").get_json()
+    assert [reminder['title'] for reminder in rest['items']] == ['Dose 2']
+
+def test_single_resource_fieldsets(client, captured_sql):
+    appointment_id = Appointment.query.one().id
+    with captured_sql() as statements:
+        response = client.get(f'/api/appointments/{appointment_id}?fields=title')
+    assert response.get_json() == {'title': 'Checkup'}
+    assert _selected_columns(statements, 'appointment') == {'id', 'title'}
+
+def test_medication_fieldsets_include_computed_fields_and_logs(client):
+    assert client.get('/api/medications?fields=name,last_taken_at').get_json() == \
+        [{'name': 'M', 'last_taken_at': '2025-01-01T08:00:00'}]
+    [medication] = client.get('/api/medications?fields=name,logs').get_json()
+    assert sorted(medication) == ['logs', 'name'] and len(medication['logs']) == 1
+
+def test_unknown_fields_are_rejected(client):
+    response = client.get('/api/reminders?fields=title,password')
+    assert response.status_code == 400
+    assert 'password' in response.get_json()['message']
+    assert client.get('/api/health-metrics?fields=,').status_code == 400
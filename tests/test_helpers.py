@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from utils import helpers
+from utils.helpers import RepositoryRegistry
+from utils.json_repository import JsonReminderRepository
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable replacement for the registry's monotonic clock."""
+    now = [1000.0]
+    monkeypatch.setattr(helpers, 'monotonic', lambda: now[0])
+    return now
+
+def test_connection_failures_fail_over_to_json_until_a_probe_succeeds(app, json_store, tmp_path, clock):
+    registry = RepositoryRegistry()
+    assert registry.resolve() == RepositoryRegistry.DATABASE
+    assert registry.get('reminder') is None
+
+    unreachable = create_engine(f"sqlite:///{tmp_path / 'missing' / 'health.db'}")
+    registry.watch(unreachable)
+    with pytest.raises(OperationalError):
+        unreachable.connect()
+    assert registry.get('reminder') is JsonReminderRepository
+
+    # The database (the app's, which answers) is only re-probed once the backoff expires
+    clock[0] += RepositoryRegistry.INITIAL_BACKOFF - 1
+    assert registry.get('reminder') is JsonReminderRepository
+    clock[0] += 1
+    assert registry.get('reminder') is None
+    assert registry.active == RepositoryRegistry.DATABASE
+
+def test_failed_probes_back_off(app, json_store, clock, monkeypatch):
+    registry = RepositoryRegistry()
+    registry.resolve()
+    registry.report_failure()
+    assert registry.active == RepositoryRegistry.JSON
+
+    monkeypatch.setattr(helpers, 'is_database_available', lambda: False)
+    clock[0] += RepositoryRegistry.INITIAL_BACKOFF
+    registry.get('reminder')
+    assert registry._next_probe == clock[0] + 2 * RepositoryRegistry.INITIAL_BACKOFF
+
+    monkeypatch.setattr(helpers, 'is_database_available', lambda: True)
+    clock[0] += 2 * RepositoryRegistry.INITIAL_BACKOFF
+    assert registry.get('reminder') is None
+
+def test_statement_errors_do_not_fail_over(app, json_store):
+    registry = RepositoryRegistry()
+    registry.resolve()
+    engine = create_engine('sqlite://')
+    registry.watch(engine)
+    with engine.begin() as connection:
+        connection.execute(text('CREATE TABLE t (id INTEGER PRIMARY KEY)'))
+        connection.execute(text('INSERT INTO t VALUES (1)'))
+        with pytest.raises(IntegrityError):
+            connection.execute(text('INSERT INTO t VALUES (1)'))
+    assert registry.active == RepositoryRegistry.DATABASE
@@ -0,0 +1,89 @@
+import multiprocessing
+from datetime import date, time
+
+import pytest
+
+from utils import data_loader, json_repository
+from utils.json_repository import (
+    JsonAppointmentRepository, JsonHealthMetricRepository, JsonMedicationRepository, JsonReminderRepository
+)
+
+def test_a_write_that_loses_a_race_is_retried_on_the_new_data(json_store, monkeypatch):
+    JsonReminderRepository.get_all()
+    allocate_id = json_repository._reminders.allocate_id
+    raced = []
+
+    def allocate_after_another_writer():
+        if not raced:
+            # Another worker stores reminder 1 after this view was refreshed
+            raced.append(True)
+            assert data_loader.save_record('reminders', {'id': 1, 'title': 'Theirs'})
+        return allocate_id()
+
+    monkeypatch.setattr(json_repository._reminders, 'allocate_id', allocate_after_another_writer)
+    created = JsonReminderRepository.create({'title': 'Ours', 'reminder_time': '2025-01-01T08:00:00'})
+
+    assert created['id'] == 2
+    assert [(row['id'], row['title']) for row in data_loader.load_dummy_data('reminders')] == \
+        [(1, 'Theirs'), (2, 'Ours')]
+
+def _create_metrics(count):
+    # A forked writer starts from its own, empty cache
+    data_loader._cache.clear()
+    json_repository._health_metrics._generation = None
+    for i in range(count):
+        JsonHealthMetricRepository.create({'metric_type': 'glucose', 'value': 90 + i, 'unit': 'mg/dL'})
+
+@pytest.mark.parametrize('storage_mode', ['snapshot', 'journal'])
+def test_concurrent_writer_processes_lose_no_writes(json_store, monkeypatch, storage_mode):
+    monkeypatch.setenv('JSON_STORAGE_MODE', storage_mode)
+    data_loader.migrate_to_shards()
+    context = multiprocessing.get_context('fork')
+    writers = [context.Process(target=_create_metrics, args=(25,)) for _ in range(3)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join(30)
+        assert writer.exitcode == 0
+
+    data_loader.invalidate_cache()
+    ids = [row['id'] for row in data_loader.load_dummy_data('health_metrics')]
+    assert sorted(ids) == list(range(1, 76))
+
+def _appointment(title, day, status='scheduled'):
+    return {'title': title, 'doctor_name': 'Dr. Who', 'date': day, 'time': '09:00', 'status': status}
+
+def test_appointment_indexes_follow_updates(json_store):
+    first = JsonAppointmentRepository.create(_appointment('A', '2025-03-01'))
+    second = JsonAppointmentRepository.create(_appointment('B', '2025-03-05'))
+    JsonAppointmentRepository.create(_appointment('C', '2025-04-01', status='cancelled'))
+
+    JsonAppointmentRepository.update_status(first['id'], 'completed')
+    JsonAppointmentRepository.update(second['id'], {'date': '2025-02-01'})
+
+    assert [a['title'] for a in JsonAppointmentRepository.get_all({'status': 'completed'})] == ['A']
+    assert [a['title'] for a in JsonAppointmentRepository.get_all({'status': 'scheduled'})] == ['B']
+    march = JsonAppointmentRepository.get_all({'from_date': '2025-03-01', 'to_date': '2025-03-31'})
+    assert [(a['title'], a['date'], a['time']) for a in march] == [('A', date(2025, 3, 1), time(9))]
+    assert [a['title'] for a in JsonAppointmentRepository.get_all({'to_date': '2025-02-28'})] == ['B']
+
+def test_ids_are_not_reused_after_a_delete(json_store):
+    first = JsonMedicationRepository.create({'name': 'A'})
+    second = JsonMedicationRepository.create({'name': 'B'})
+    assert JsonMedicationRepository.delete(second['id'])
+    assert JsonMedicationRepository.create({'name': 'C'})['id'] == second['id'] + 1
+
+    logs = [JsonMedicationRepository.add_log(first['id'], {'status': 'taken'}) for _ in range(2)]
+    assert [log['id'] for log in logs] == [1, 2]
+    assert JsonMedicationRepository.add_log(second['id'], {'status': 'taken'}) is None
+    assert [log['id'] for log in JsonMedicationRepository.get_by_id(first['id'])['logs']] == [1, 2]
+
+def test_a_view_is_only_rebuilt_when_its_own_collection_changes(json_store):
+    JsonMedicationRepository.create({'name': 'A'})
+    medications = data_loader.dataset_generation('medications')
+
+    JsonReminderRepository.create({'title': 'R', 'reminder_time': '2025-01-01T08:00:00'})
+    assert data_loader.dataset_generation('medications') == medications
+    view = json_repository._medications.rows
+    JsonMedicationRepository.get_all()
+    assert json_repository._medications.rows is view
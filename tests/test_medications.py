@@ -0,0 +1,69 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from database import db
+from models import Medication, MedicationLog, MedicationLogRollup
+
+START = datetime(2025, 1, 1, 8)
+
+@pytest.fixture
+def add_medications(users):
+    """Add medications with three logs each (the newest one skipped) to the first user."""
+    user = users[0]
+
+    def add(count):
+        for i in range(count):
+            medication = Medication(user_id=user.id, name=f'M{i}', dosage='1 tablet', frequency='once_daily',
+                                    intake_time='08:00')
+            db.session.add(medication)
+            db.session.flush()
+            for day, status in enumerate(('taken', 'taken', 'skipped')):
+                db.session.add(MedicationLog(user_id=user.id, medication_id=medication.id, status=status,
+                                             taken_at=START + timedelta(days=day)))
+        db.session.commit()
+    return add
+
+def _list(client, captured_sql, url):
+    with captured_sql() as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.get_json(), len(statements)
+
+@pytest.mark.parametrize('url', ['/api/medications', '/api/medications?include=logs',
+                                 '/api/medications?include=logs&logs_limit=2', '/api/medications?limit=10'])
+def test_the_medication_list_runs_a_fixed_number_of_queries(users, login, captured_sql, add_medications, url):
+    client = login(users[0])
+    add_medications(2)
+    _, few = _list(client, captured_sql, url)
+    add_medications(6)
+    body, many = _list(client, captured_sql, url)
+    assert len(body['items'] if 'limit=10' in url else body) == 8
+    assert many == few
+
+def test_the_medication_list_summarizes_logs_unless_asked_for_them(users, login, add_medications):
+    client = login(users[0])
+    add_medications(1)
+
+    [medication] = client.get('/api/medications').get_json()
+    assert 'logs' not in medication
+    assert medication['last_taken_at'] == (START + timedelta(days=1)).isoformat()
+
+    [medication] = client.get('/api/medications?include=logs&logs_limit=2').get_json()
+    assert [log['status'] for log in medication['logs']] == ['skipped', 'taken']
+    [medication] = client.get('/api/medications?include=logs').get_json()
+    assert len(medication['logs']) == 3
+    assert client.get('/api/medications?include=logs&logs_limit=0').status_code == 400
+
+def test_last_taken_at_falls_back_to_the_rollups(users, login):
+    user = users[0]
+    medication = Medication(user_id=user.id, name='M', dosage='1 tablet', frequency='once_daily', intake_time='08:00')
+    db.session.add(medication)
+    db.session.flush()
+    db.session.add(MedicationLogRollup(user_id=user.id, medication_id=medication.id, day=date(2024, 6, 1),
+                                       status='taken', count=2, first_at=datetime(2024, 6, 1, 8),
+                                       last_at=datetime(2024, 6, 1, 20)))
+    db.session.commit()
+
+    [listed] = login(user).get('/api/medications').get_json()
+    assert listed['last_taken_at'] == '2024-06-01T20:00:00'
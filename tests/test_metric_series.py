@@ -0,0 +1,59 @@
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.json_repository import JsonHealthMetricRepository
+from utils.metric_series import MetricSeriesStore, to_epoch
+
+START = datetime(2025, 1, 1, 8)
+
+def _rows(count, user_id=1, metric_type='glucose'):
+    return [
+        {'id': i, 'user_id': user_id, 'metric_type': metric_type, 'value': str(90 + i),
+         'recorded_at': START + timedelta(days=i)}
+        for i in range(1, count + 1)
+    ]
+
+@pytest.mark.parametrize('on_disk', [False, True])
+def test_series_ranges_are_sliced_from_sorted_columns(tmp_path, on_disk):
+    store = MetricSeriesStore(str(tmp_path) if on_disk else None)
+    rows = _rows(5)
+    rows.reverse()
+    rows.append({'id': 6, 'user_id': 1, 'metric_type': 'glucose', 'value': 'high', 'recorded_at': START})
+    rows.append({'id': 7, 'user_id': 1, 'metric_type': 'glucose', 'value': '1', 'recorded_at': None})
+    store.write((1, 'glucose'), rows)
+
+    [series] = store.find('glucose', 1)
+    assert list(series.id) == [6, 1, 2, 3, 4, 5]
+    assert math.isnan(series.value[0])
+    window = series.range(START + timedelta(days=2), START + timedelta(days=4))
+    assert list(window.id) == [2, 3, 4]
+    assert list(window.value) == [92.0, 93.0, 94.0]
+    assert list(window.recorded_at) == [to_epoch(START + timedelta(days=day)) for day in (2, 3, 4)]
+    assert window.timestamps()[0] == START + timedelta(days=2)
+    assert len(list(tmp_path.glob('*.series'))) == (1 if on_disk else 0)
+
+    store.rebuild(_rows(2, user_id=2))
+    assert store.find('glucose', 1) == []
+    assert [list(series.id) for series in store.find(user_id=2)] == [[1, 2]]
+
+def test_repository_ranges_read_the_series_and_follow_writes(json_store, monkeypatch):
+    for i in range(6):
+        JsonHealthMetricRepository.create({'metric_type': 'glucose' if i % 2 else 'weight', 'value': 90 + i,
+                                           'unit': 'mg/dL', 'recorded_at': START + timedelta(days=i)})
+    filters = {'from_date': '2025-01-02', 'to_date': '2025-01-05'}
+    expected = [metric['id'] for metric in JsonHealthMetricRepository.get_all(filters)]
+    assert expected == [5, 4, 3, 2]
+
+    monkeypatch.setenv('JSON_METRIC_SERIES', 'true')
+    assert [metric['id'] for metric in JsonHealthMetricRepository.get_all(filters)] == expected
+    assert list((json_store / 'json_store' / 'metric_series').glob('*.series'))
+
+    JsonHealthMetricRepository.create({'metric_type': 'glucose', 'value': 120, 'unit': 'mg/dL',
+                                       'recorded_at': START + timedelta(days=3, hours=1)})
+    assert JsonHealthMetricRepository.delete(2)
+    assert [metric['id'] for metric in JsonHealthMetricRepository.get_all(dict(filters, metric_type='glucose'))] == \
+        [7, 4]
+    [series] = JsonHealthMetricRepository.get_series('glucose', START + timedelta(days=3))
+    assert list(series.id) == [4, 7, 6]
@@ -0,0 +1,6 @@
+def test_pool_metrics_require_login(app, users, login):
+    assert app.test_client().get('/api/metrics/pool').status_code in (302, 401)
+
+    response = login(users[0]).get('/api/metrics/pool')
+    assert response.status_code == 200
+    assert 'primary' in response.get_json()['engines']
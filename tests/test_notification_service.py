@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import db
+from models import Notification, Reminder
+from services.notification_service import notification_service
+
+@pytest.fixture
+def emails(monkeypatch):
+    """Capture the reminder emails instead of sending them through SendGrid."""
+    sent = []
+    monkeypatch.setenv('USER_EMAIL', 'patient@example.com')
+    monkeypatch.setattr(notification_service.email_service, 'is_enabled', lambda: True)
+    monkeypatch.setattr(notification_service.email_service, 'send_reminder_emails',
+                        lambda messages: sent.extend(messages) or len(messages))
+    return sent
+
+def test_batch_only_notifies_reminders_unchanged_since_they_were_claimed(users, emails):
+    due = datetime.utcnow() - timedelta(seconds=1)
+    rows = [Reminder(user_id=users[i % 2].id, reminder_type='medication', title=f'Dose {i}', message='Take it',
+                     reminder_time=due) for i in range(4)]
+    db.session.add_all(rows)
+    db.session.commit()
+    moved, deactivated, deleted, unchanged = [row.id for row in rows]
+
+    claimed = notification_service.queue.claim(10)
+    db.session.get(Reminder, moved).reminder_time = due + timedelta(hours=1)
+    db.session.get(Reminder, deactivated).is_active = False
+    db.session.delete(db.session.get(Reminder, deleted))
+    db.session.commit()
+
+    assert notification_service.send_reminder_notifications(claimed) == 1
+    assert [(notification.user_id, notification.reminder_id) for notification in Notification.query] == \
+        [(users[1].id, unchanged)]
+    assert [data['id'] for _, data in emails] == [unchanged]
+
+def test_list_endpoint_returns_only_the_users_pending_notifications(users, login):
+    for user in users:
+        notification_service.store_notification(user.id, {'id': None, 'reminder_type': 'test', 'title': user.username,
+                                                          'message': 'Hello', 'reminder_time': datetime.utcnow()})
+
+    response = login(users[0]).get('/api/notifications')
+    assert response.status_code == 200
+    assert [notification['title'] for notification in response.get_json()] == [users[0].username]
+
+def test_reminders_due_within_the_window_are_sent_as_one_batch(users, emails, monkeypatch):
+    batches = []
+    send = notification_service.email_service.send_reminder_emails
+    monkeypatch.setattr(notification_service.email_service, 'send_reminder_emails',
+                        lambda messages: batches.append(len(messages)) or send(messages))
+    monkeypatch.setattr(notification_service, 'batch_window', timedelta(seconds=5))
+    now = datetime.utcnow()
+    offsets = {'late': -30, 'due': 0, 'soon': 3, 'later': 60}
+    db.session.add_all([Reminder(user_id=users[0].id, reminder_type='medication', title=title, message='Take it',
+                                 reminder_time=now + timedelta(seconds=offset)) for title, offset in offsets.items()])
+    db.session.commit()
+
+    assert notification_service.process_due() == 3
+    assert batches == [3]
+    assert [data['title'] for _, data in emails] == ['late', 'due', 'soon']
+    assert Reminder.query.filter_by(title='later').one().lease_owner is None
+
+def test_process_due_claims_until_the_queue_is_empty(users, emails, monkeypatch):
+    monkeypatch.setattr(notification_service, 'claim_batch_size', 2)
+    due = datetime.utcnow() - timedelta(minutes=1)
+    db.session.add_all([Reminder(user_id=users[0].id, reminder_type='medication', title=f'Dose {i}',
+                                 message='Take it', reminder_time=due + timedelta(seconds=i)) for i in range(5)])
+    db.session.commit()
+
+    assert notification_service.process_due() == 5
+    assert [data['title'] for _, data in emails] == [f'Dose {i}' for i in range(5)]
+    assert Notification.query.count() == 5
+
+def test_reminder_emails_are_grouped_into_few_requests(monkeypatch):
+    from services import email_service as email_module
+
+    class Response:
+        status_code = 202
+
+    requests = []
+    service = email_module.EmailService()
+    service.sg = type('FakeClient', (), {'send': lambda self, message: requests.append(message.get()) or Response()})()
+    monkeypatch.setattr(email_module, 'MAX_PERSONALIZATIONS', 2)
+    messages = [(f'user{i}@example.com', {'title': f'Dose {i}', 'message': 'Take it', 'reminder_type': 'medication',
+                                          'reminder_time': datetime(2025, 1, 1, 8)}) for i in range(5)]
+
+    assert service.send_reminder_emails(messages) == 5
+    assert [len(request['personalizations']) for request in requests] == [2, 2, 1]
+    personalizations = [p for request in requests for p in request['personalizations']]
+    # Each email is filled in with its own reminder
+    assert sorted((p['to'][0]['email'], p['substitutions']['-title-']) for p in personalizations) == \
+        [(email, data['title']) for email, data in messages]
+
+def _add_notifications(user, count, start, step=timedelta(minutes=1)):
+    db.session.add_all([Notification(user_id=user.id, title=f'Note {i}', body='Hello', timestamp=start + i * step)
+                        for i in range(count)])
+    db.session.commit()
+
+def test_pending_notifications_are_the_newest_hundred_unread_oldest_first(users):
+    start = datetime(2025, 1, 1)
+    _add_notifications(users[0], 120, start)
+    _add_notifications(users[1], 5, start)
+    Notification.query.filter_by(user_id=users[0].id, title='Note 119').one().read = True
+    db.session.commit()
+
+    pending = notification_service.get_pending_notifications(users[0].id)
+    assert [notification.title for notification in pending] == [f'Note {i}' for i in range(19, 119)]
+    assert len(notification_service.get_pending_notifications(users[1].id)) == 5
+
+def test_marking_notifications_read(users, login):
+    _add_notifications(users[0], 3, datetime.utcnow())
+    _add_notifications(users[1], 1, datetime.utcnow())
+    first, *_ = [notification.id for notification in Notification.query.filter_by(user_id=users[0].id)]
+    other = Notification.query.filter_by(user_id=users[1].id).one().id
+    client = login(users[0])
+
+    assert client.put(f'/api/notifications/{first}').status_code == 200
+    assert client.put(f'/api/notifications/{other}').status_code == 404
+    assert len(client.get('/api/notifications').get_json()) == 2
+
+    assert client.put('/api/notifications').get_json()['updated'] == 2
+    assert client.get('/api/notifications').get_json() == []
+    assert not db.session.get(Notification, other).read
+
+def test_expired_notifications_are_purged(users, monkeypatch):
+    now = datetime(2025, 3, 1)
+    monkeypatch.setattr(notification_service, 'notification_ttl', timedelta(days=30))
+    _add_notifications(users[0], 4, now - timedelta(days=32), step=timedelta(days=1))
+
+    assert notification_service.purge_expired_notifications(now) == 2
+    assert sorted(notification.title for notification in Notification.query) == ['Note 2', 'Note 3']
+
+    monkeypatch.setattr(notification_service, 'notification_ttl', timedelta(0))
+    assert notification_service.purge_expired_notifications(now + timedelta(days=365)) == 0
+    assert Notification.query.count() == 2
+
+def test_the_poll_purges_at_most_once_per_interval(monkeypatch):
+    purges = []
+    monkeypatch.setattr(notification_service, 'purge_expired_notifications', purges.append)
+    monkeypatch.setattr(notification_service, '_last_purge', None)
+    notification_service._purge_notifications_if_due()
+    notification_service._purge_notifications_if_due()
+    assert len(purges) == 1
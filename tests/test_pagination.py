@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import db
+from models import HealthMetric
+from utils.pagination import paginate
+
+@pytest.fixture
+def metrics(users):
+    user = users[0]
+    start = datetime(2025, 1, 1, 8)
+    rows = [HealthMetric(user_id=user.id, metric_type='weight', value=70 + i, unit='kg',
+                         recorded_at=start + timedelta(days=i)) for i in range(3)]
+    db.session.add_all(rows)
+    db.session.flush()
+    # recorded_at is nullable: rows with no reading time must still be paged
+    for row in rows[:2]:
+        db.session.add(HealthMetric(user_id=user.id, metric_type='weight', value=0, unit='kg'))
+    db.session.flush()
+    db.session.execute(db.update(HealthMetric).where(HealthMetric.value == 0).values(recorded_at=None))
+    db.session.commit()
+    return user
+
+def _all_pages(query, descending, limit):
+    ids, cursor = [], None
+    for _ in range(10):
+        args = {'limit': str(limit)}
+        if cursor:
+            args['cursor'] = cursor
+        rows, cursor = paginate(query, (HealthMetric.recorded_at, HealthMetric.id), args, descending=descending)
+        ids.extend(row.id for row in rows)
+        if cursor is None:
+            return ids
+    pytest.fail('pagination did not terminate')
+
+@pytest.mark.parametrize('descending', [False, True])
+@pytest.mark.parametrize('limit', [1, 2, 4])
+def test_pages_cross_null_sort_keys(metrics, descending, limit):
+    query = HealthMetric.query.filter_by(user_id=metrics.id)
+    expected = [row.id for row in query.order_by(
+        HealthMetric.recorded_at.desc() if descending else HealthMetric.recorded_at.asc(),
+        HealthMetric.id.desc() if descending else HealthMetric.id.asc(),
+    )]
+    assert len(expected) == 5
+    assert _all_pages(query, descending, limit) == expected
+
+def test_health_metric_pages_include_rows_without_recorded_at(metrics, login):
+    client = login(metrics)
+    ids, url = [], '/api/health-metrics?limit=1'
+    while url:
+        body = client.get(url).get_json()
+        ids.extend(item['id'] for item in body['items'])
+        url = f"/api/health-metrics?limit=1&cursor={body['next_cursor']}" if body['next_cursor'] else None
+    assert sorted(ids) == [1, 2, 3, 4, 5]
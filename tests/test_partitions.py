@@ -0,0 +1,95 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import inspect
+
+from database import db
+from models import HealthMetric, MedicationLog, Medication
+from services import partition_service
+from services.partition_service import (is_partitioned, maintain_partitions, partition_name, partition_tables,
+                                        partitioning_enabled, unpartition_tables)
+
+def test_partition_names_and_month_arithmetic():
+    assert partition_name('health_metric', date(2025, 1, 1)) == 'health_metric_y2025m01'
+    assert partition_service._add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert partition_service._add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert partition_service._month_start(datetime(2025, 3, 31, 23, 59)) == date(2025, 3, 1)
+
+def test_partitioning_is_opt_in(monkeypatch):
+    monkeypatch.delenv('DATABASE_PARTITIONING', raising=False)
+    monkeypatch.delenv('DATABASE_PARTITION_MONTHS_AHEAD', raising=False)
+    assert not partitioning_enabled()
+    assert partition_service.months_ahead_default() == 3
+    monkeypatch.setenv('DATABASE_PARTITIONING', 'true')
+    monkeypatch.setenv('DATABASE_PARTITION_MONTHS_AHEAD', '6')
+    assert partitioning_enabled()
+    assert partition_service.months_ahead_default() == 6
+
+@pytest.fixture
+def history(users):
+    """A health metric and a medication log of March 2020."""
+    user = users[0]
+    medication = Medication(user_id=user.id, name='M', dosage='1 tablet', frequency='once_daily', intake_time='08:00')
+    db.session.add(medication)
+    db.session.flush()
+    db.session.add_all([
+        HealthMetric(user_id=user.id, metric_type='weight', value=70, unit='kg', recorded_at=datetime(2020, 3, 5)),
+        MedicationLog(user_id=user.id, medication_id=medication.id, status='taken', taken_at=datetime(2020, 3, 5)),
+    ])
+    db.session.commit()
+    user_id = user.id
+    # The DDL below needs the tables to itself
+    db.session.remove()
+    return user_id
+
+def test_partitioning_is_a_no_op_on_sqlite(history):
+    if db.engine.dialect.name != 'sqlite':
+        pytest.skip('needs the SQLite test database')
+    with db.engine.begin() as connection:
+        assert partition_tables(connection) == []
+        assert maintain_partitions(connection) == {}
+        assert unpartition_tables(connection) == []
+    tables = inspect(db.engine).get_table_names()
+    assert not [name for name in tables if name.startswith(('health_metric_y', 'health_metric_default'))]
+    assert HealthMetric.query.count() == 1
+
+@pytest.mark.postgres
+def test_partition_maintain_and_unpartition_on_postgres(history):
+    if db.engine.dialect.name != 'postgresql':
+        pytest.skip('set TEST_DATABASE_URL to a PostgreSQL database')
+    with db.engine.begin() as connection:
+        assert partition_tables(connection, months_ahead=1) == ['health_metric', 'medication_log']
+        assert is_partitioned(connection, 'health_metric') and is_partitioned(connection, 'medication_log')
+        assert partition_tables(connection) == []
+
+    # A back-dated reading lands in the DEFAULT partition until its month exists
+    db.session.add(HealthMetric(user_id=history, metric_type='weight', value=71, unit='kg',
+                                recorded_at=datetime(2019, 1, 10)))
+    db.session.commit()
+    db.session.remove()
+    with db.engine.begin() as connection:
+        def count(table):
+            return connection.exec_driver_sql(f'SELECT count(*) FROM {table}').scalar()
+
+        assert count('health_metric_y2020m03') == 1 and count('medication_log_y2020m03') == 1
+        assert count('health_metric_default') == 1
+        created = maintain_partitions(connection, months_ahead=1, now=datetime(2025, 1, 15))
+        assert created['health_metric'] == ['health_metric_y2019m01', 'health_metric_y2025m01',
+                                            'health_metric_y2025m02']
+        assert created['medication_log'] == ['medication_log_y2025m01', 'medication_log_y2025m02']
+        assert count('health_metric_default') == 0 and count('health_metric_y2019m01') == 1
+        assert maintain_partitions(connection, months_ahead=1, now=datetime(2025, 1, 15)) == \
+            {'health_metric': [], 'medication_log': []}
+
+    # New rows keep getting ids from the shared sequence
+    db.session.add(HealthMetric(user_id=history, metric_type='weight', value=72, unit='kg',
+                                recorded_at=datetime(2025, 1, 20)))
+    db.session.commit()
+    assert sorted(metric.value for metric in HealthMetric.query) == [70, 71, 72]
+    assert len({metric.id for metric in HealthMetric.query}) == 3
+    db.session.remove()
+
+    with db.engine.begin() as connection:
+        assert unpartition_tables(connection) == ['health_metric', 'medication_log']
+        assert not is_partitioned(connection, 'health_metric')
+    assert HealthMetric.query.count() == 3 and MedicationLog.query.count() == 1
@@ -0,0 +1,110 @@
+"""
+Check that the list endpoints' queries are served by the composite indexes in models.py.
+
+The SQL each endpoint runs is captured and explained on the test database:
+EXPLAIN QUERY PLAN on SQLite, and EXPLAIN with sequential scans disabled on
+PostgreSQL (set TEST_DATABASE_URL to run the postgres-marked tests), since
+the planner prefers a sequential scan for the few rows created here.
+"""
+import re
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from database import db
+from models import Appointment, HealthMetric, Medication, MedicationLog, Reminder
+
+# (first page URL, table read, index expected, whether the index also gives the order)
+LIST_QUERIES = [
+    # Medications are paged by id; (user_id, status) only orders them by id for one status
+    ('/api/medications?limit=1', 'medication', 'ix_medication_user_id_status', False),
+    ('/api/medications/1/logs', 'medication_log', 'ix_medication_log_medication_id_user_id_taken_at', False),
+    ('/api/health-metrics?limit=1', 'health_metric', 'ix_health_metric_user_id_recorded_at', True),
+    ('/api/health-metrics?limit=1&type=glucose', 'health_metric',
+     'ix_health_metric_user_id_metric_type_recorded_at', True),
+    ('/api/appointments?limit=1', 'appointment', 'ix_appointment_user_id_date_time', True),
+    ('/api/appointments?limit=1&status=scheduled', 'appointment', 'ix_appointment_user_id_status_date_time', True),
+    ('/api/reminders?limit=1', 'reminder', 'ix_reminder_user_id_reminder_time', True),
+    ('/api/reminders?limit=1&type=medication', 'reminder', 'ix_reminder_user_id_reminder_type_reminder_time', True),
+]
+
+@pytest.fixture
+def client(users, login):
+    user = users[0]
+    start = datetime(2025, 1, 1, 8)
+    medication = Medication(user_id=user.id, name='Metformin', dosage='500mg', frequency='daily', intake_time='08:00')
+    db.session.add(medication)
+    db.session.flush()
+    for i in range(3):
+        db.session.add(MedicationLog(user_id=user.id, medication_id=medication.id,
+                                     taken_at=start + timedelta(days=i), status='taken'))
+        db.session.add(HealthMetric(user_id=user.id, metric_type='glucose', value=90 + i, unit='mg/dL',
+                                    recorded_at=start + timedelta(hours=i)))
+        db.session.add(Appointment(user_id=user.id, title=f'Checkup {i}', date=date(2025, 1, 1 + i),
+                                   time=time(9), status='scheduled'))
+        db.session.add(Reminder(user_id=user.id, reminder_type='medication', title=f'Dose {i}',
+                                message='Take it', reminder_time=start + timedelta(days=i)))
+    db.session.add(Medication(user_id=user.id, name='Aspirin', dosage='75mg', frequency='daily', intake_time='09:00'))
+    db.session.commit()
+    return login(user)
+
+def _captured_queries(client, url, table):
+    """Request ``url`` and return the (statement, parameters) of its reads of ``table``."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    reads = [(statement, parameters) for statement, parameters in statements
+             if re.search(rf'\bFROM {table}\s', statement)]
+    assert reads, f'{url} did not read {table}'
+    return response.get_json(), reads
+
+def _pages(client, url, table):
+    """Captured reads of the first page of ``url`` and, when paginated, of the second one."""
+    body, reads = _captured_queries(client, url, table)
+    if isinstance(body, dict) and body.get('next_cursor'):
+        _, more = _captured_queries(client, f"{url}&cursor={body['next_cursor']}", table)
+        reads += more
+    return reads
+
+def _sqlite_plan(statement, parameters):
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+    return '\n'.join(row[-1] for row in rows)
+
+def _postgres_plan(statement, parameters):
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql('SET enable_seqscan = off')
+        rows = connection.exec_driver_sql(f'EXPLAIN {statement}', parameters).all()
+        connection.rollback()
+    return '\n'.join(row[0] for row in rows)
+
+@pytest.mark.parametrize('url, table, index, ordered', LIST_QUERIES)
+def test_list_queries_use_composite_indexes_on_sqlite(app, client, url, table, index, ordered):
+    if db.engine.dialect.name != 'sqlite':
+        pytest.skip('needs the SQLite test database')
+    for statement, parameters in _pages(client, url, table):
+        plan = _sqlite_plan(statement, parameters)
+        assert re.search(rf'SEARCH {table} USING (COVERING )?INDEX {index}\b', plan), plan
+        if ordered:
+            assert 'TEMP B-TREE' not in plan, plan
+
+@pytest.mark.postgres
+@pytest.mark.parametrize('url, table, index, ordered', LIST_QUERIES)
+def test_list_queries_use_composite_indexes_on_postgres(app, client, url, table, index, ordered):
+    if db.engine.dialect.name != 'postgresql':
+        pytest.skip('set TEST_DATABASE_URL to a PostgreSQL database')
+    for statement, parameters in _pages(client, url, table):
+        plan = _postgres_plan(statement, parameters)
+        assert re.search(rf'Index (Only )?Scan( Backward)? using {index} on {table}\b|'
+                         rf'Bitmap Index Scan on {index}\b', plan), plan
+        if ordered:
+            assert 'Sort' not in plan, plan
@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import db
+from models import Reminder
+from services.reminder_queue import ReminderQueue
+
+NOW = datetime(2025, 1, 1, 8)
+
+@pytest.fixture
+def reminders(users):
+    user = users[0]
+    rows = [Reminder(user_id=user.id, reminder_type='medication', title=f'Dose {i}', message='Take it',
+                     reminder_time=NOW - timedelta(minutes=1), repeat_interval='daily')
+            for i in range(3)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return [row.id for row in rows]
+
+def test_complete_skips_reminders_edited_during_the_lease(reminders):
+    queue = ReminderQueue(worker_id='worker-1')
+    claimed = queue.claim(10, now=NOW)
+    assert sorted(row.id for row in claimed) == reminders
+    moved, deactivated, unchanged = reminders
+
+    # A user moves one reminder and deactivates another while the lease is held
+    new_time = NOW + timedelta(hours=3)
+    db.session.get(Reminder, moved).reminder_time = new_time
+    db.session.get(Reminder, deactivated).is_active = False
+    db.session.commit()
+
+    completed = queue.complete(claimed, [row.id for row in claimed], now=NOW)
+    assert completed == {unchanged: NOW - timedelta(minutes=1) + timedelta(days=1)}
+
+    db.session.expire_all()
+    moved_row = db.session.get(Reminder, moved)
+    assert moved_row.reminder_time == new_time
+    assert moved_row.last_fired_at is None
+    assert db.session.get(Reminder, deactivated).is_active is False
+    # The leases on the skipped reminders are given up, so the moved one is due on time
+    assert all(db.session.get(Reminder, reminder_id).lease_owner is None for reminder_id in reminders)
+    assert [row.id for row in queue.claim(10, now=new_time)] == [moved]
+
+def test_complete_skips_reminders_deleted_during_the_lease(reminders):
+    queue = ReminderQueue(worker_id='worker-1')
+    claimed = queue.claim(10, now=NOW)
+    db.session.delete(db.session.get(Reminder, reminders[0]))
+    db.session.commit()
+
+    completed = queue.complete(claimed, [row.id for row in claimed], now=NOW)
+    assert sorted(completed) == reminders[1:]
+
+# Run in a fresh interpreter, as a restarted web or worker process would
+_START_APP = '''
+import sys
+from datetime import datetime, timedelta
+
+from app import app
+from database import db
+from models import Reminder, User
+from services.reminder_queue import ReminderQueue
+
+with app.app_context():
+    if sys.argv[1] == 'claim':
+        user = User(username='carol', email='carol@example.com')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Reminder(user_id=user.id, reminder_type='medication', title='Dose',
+                                message='Take it', reminder_time=datetime.utcnow() - timedelta(minutes=1),
+                                repeat_interval='daily'))
+        db.session.commit()
+        ReminderQueue(worker_id='worker-1').claim(10)
+    print(db.session.query(Reminder.title, Reminder.lease_owner).all())
+'''
+
+def test_reminders_and_leases_survive_a_restart(tmp_path):
+    env = {key: value for key, value in os.environ.items() if key != 'DATABASE_RESET_ON_STARTUP'}
+    env['DATABASE_URL'] = f"sqlite:///{tmp_path / 'restart.db'}"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def start(step):
+        result = subprocess.run([sys.executable, '-c', _START_APP, step], cwd=root, env=env,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip().splitlines()[-1]
+
+    assert start('claim') == "[('Dose', 'worker-1')]"
+    assert start('restart') == "[('Dose', 'worker-1')]"
@@ -0,0 +1,57 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SEED = '''
+from datetime import datetime, timedelta
+
+from app import app
+from database import db
+from models import Reminder, User
+
+with app.app_context():
+    user = User(username='carol', email='carol@example.com')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(Reminder(user_id=user.id, reminder_type='medication', title='Dose', message='Take it',
+                            reminder_time=datetime.utcnow() - timedelta(seconds=5), repeat_interval='once'))
+    db.session.commit()
+'''
+
+def test_worker_delivers_due_reminders_and_stops_on_sigterm(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'worker.db'}"
+    env = {key: value for key, value in os.environ.items() if key != 'USER_EMAIL'}
+    env.update(DATABASE_URL=database_url, DATABASE_RESET_ON_STARTUP='false')
+    subprocess.run([sys.executable, '-c', _SEED], cwd=ROOT, env=env, check=True, capture_output=True)
+
+    # The worker never resets the tables, whatever the environment says
+    env['DATABASE_RESET_ON_STARTUP'] = 'true'
+    worker = subprocess.Popen([sys.executable, '-m', 'services.reminder_worker', '--poll-seconds', '1'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    engine = create_engine(database_url)
+    try:
+        deadline = time.monotonic() + 30
+        notifications = []
+        while not notifications and time.monotonic() < deadline and worker.poll() is None:
+            time.sleep(0.2)
+            with engine.connect() as connection:
+                notifications = connection.execute(text('SELECT title, body FROM notification')).all()
+        assert notifications == [('Dose', 'Take it')]
+
+        worker.send_signal(signal.SIGTERM)
+        assert worker.wait(30) == 0, worker.stderr.read()
+        with engine.connect() as connection:
+            assert connection.execute(text('SELECT is_active, lease_owner FROM reminder')).all() == [(0, None)]
+            assert connection.execute(text('SELECT username FROM user')).scalars().all() == ['carol']
+    finally:
+        if worker.poll() is None:
+            worker.kill()
+            worker.wait()
+        engine.dispose()
@@ -0,0 +1,76 @@
+import pytest
+from flask import Flask, jsonify, request
+from sqlalchemy import select
+
+from database import db, replica_binds
+from models import User
+
+def test_replica_binds():
+    assert replica_binds(' sqlite:///a.db, ,sqlite:///b.db ') == \
+        {'replica_0': 'sqlite:///a.db', 'replica_1': 'sqlite:///b.db'}
+    assert replica_binds(None) == {}
+
+@pytest.fixture
+def replica_app(tmp_path):
+    """An app with a primary and one replica SQLite file that hold different users."""
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'primary.db'}"
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(f"sqlite:///{tmp_path / 'replica.db'}")
+    app.config['SQLALCHEMY_REPLICA_STICKY_SECONDS'] = 60
+    db.init_app(app)
+
+    @app.get('/users')
+    def list_users():
+        return jsonify([user.username for user in User.query.order_by(User.username)])
+
+    @app.get('/users/locked')
+    def lock_users():
+        return jsonify([user.username for user in db.session.scalars(select(User).with_for_update())])
+
+    @app.post('/users')
+    def create_user():
+        user = User(username=request.json['username'], email=f"{request.json['username']}@example.com")
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+        return jsonify([user.username for user in User.query.order_by(User.username)])
+
+    with app.app_context():
+        db.create_all()
+        for engine, name in ((db.engine, 'on-primary'), (db.engines['replica_0'], 'on-replica')):
+            db.metadata.create_all(engine)
+            with engine.begin() as connection:
+                connection.execute(User.__table__.insert(), {'username': name, 'email': f'{name}@example.com',
+                                                             'password_hash': 'x'})
+        db.session.remove()
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    # init_app registered an (empty) metadata for the replica's bind key, which
+    # create_all and drop_all of the main app would otherwise look for
+    db.metadatas.pop('replica_0', None)
+
+def test_get_reads_go_to_the_replica(replica_app):
+    client = replica_app.test_client()
+    assert client.get('/users').get_json() == ['on-replica']
+    assert client.get('/users/locked').get_json() == ['on-primary']
+
+def test_writes_and_the_writers_next_reads_use_the_primary(replica_app, monkeypatch):
+    writer = replica_app.test_client()
+    assert writer.post('/users', json={'username': 'carol'}).get_json() == ['carol', 'on-primary']
+    # Read-your-writes: the writer's reads stick to the primary for a while...
+    assert writer.get('/users').get_json() == ['carol', 'on-primary']
+    # ...while other clients keep reading from the replica
+    assert replica_app.test_client().get('/users').get_json() == ['on-replica']
+
+    replica_app.config['SQLALCHEMY_REPLICA_STICKY_SECONDS'] = 0
+    assert writer.post('/users', json={'username': 'dave'}).status_code == 200
+    assert writer.get('/users').get_json() == ['on-replica']
+
+def test_reads_outside_requests_use_the_primary(replica_app):
+    with replica_app.app_context():
+        assert [user.username for user in User.query] == ['on-primary']
+    with replica_app.test_request_context('/users', method='POST'):
+        assert [user.username for user in User.query] == ['on-primary']
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import db
+from models import HealthMetric, Medication, MedicationLog
+from services.rollup_service import RollupService, UnsupportedDatabaseError
+
+NOW = datetime(2025, 6, 1, 12)
+
+@pytest.fixture
+def compacted(users):
+    """A user with readings and logs on both sides of a 30-day horizon, compacted."""
+    user = users[0]
+    medication = Medication(user_id=user.id, name='Metformin', dosage='500mg', frequency='daily', intake_time='08:00')
+    db.session.add(medication)
+    db.session.flush()
+    for days_ago in (60, 45, 5, 1):
+        when = NOW - timedelta(days=days_ago)
+        db.session.add(HealthMetric(user_id=user.id, metric_type='glucose', value=100, unit='mg/dL', recorded_at=when))
+        db.session.add(MedicationLog(user_id=user.id, medication_id=medication.id, taken_at=when, status='taken'))
+    db.session.commit()
+    RollupService(horizon_days=30).run(NOW)
+    return user, medication
+
+def test_health_metric_list_reports_where_compacted_history_ends(compacted, login):
+    user, _ = compacted
+    client = login(user)
+    # The last compacted day is the one 45 days before NOW
+    cutoff = datetime(2025, 4, 18)
+
+    response = client.get('/api/health-metrics')
+    assert len(response.get_json()) == 2
+    assert response.headers['X-Compacted-Before'] == cutoff.isoformat()
+
+    page = client.get('/api/health-metrics?limit=10&from_date=2025-01-01').get_json()
+    assert page['compacted_before'] == cutoff.isoformat()
+
+    # A range after the compacted history is complete
+    recent = client.get(f"/api/health-metrics?from_date={(NOW - timedelta(days=10)):%Y-%m-%d}")
+    assert 'X-Compacted-Before' not in recent.headers
+    assert 'X-Compacted-Before' not in client.get('/api/health-metrics?type=weight').headers
+
+def test_medication_log_list_reports_where_compacted_history_ends(compacted, login):
+    user, medication = compacted
+    response = login(user).get(f'/api/medications/{medication.id}/logs')
+    assert len(response.get_json()) == 2
+    assert response.headers['X-Compacted-Before'] == '2025-04-18T00:00:00'
+
+def test_rollups_refuse_to_start_on_unsupported_databases(users, monkeypatch):
+    db.session.add(HealthMetric(user_id=users[0].id, metric_type='glucose', value=100, unit='mg/dL',
+                                recorded_at=NOW - timedelta(days=60)))
+    db.session.commit()
+    monkeypatch.setattr(db.engine.dialect, 'name', 'mysql')
+
+    with pytest.raises(UnsupportedDatabaseError, match='mysql'):
+        RollupService(horizon_days=30).run(NOW)
+    monkeypatch.undo()
+    assert HealthMetric.query.count() == 1
@@ -0,0 +1,102 @@
+import threading
+from datetime import datetime, timedelta
+
+from services.scheduler import HeapScheduler
+
+def test_stop_while_jobs_are_due_does_not_fail_the_scheduler_thread(monkeypatch):
+    errors = []
+    monkeypatch.setattr(threading, 'excepthook', lambda args: errors.append(args.exc_value))
+
+    for _ in range(10):
+        delivering = threading.Event()
+        scheduler = HeapScheduler(name='test-scheduler', delivery_threads=1)
+        # Queue up many due jobs before the thread starts, so it is still
+        # handing them out when the first one runs
+        scheduler.stop()
+        due = datetime.utcnow() - timedelta(seconds=1)
+        for key in range(5000):
+            scheduler.schedule(key, due, delivering.set)
+        scheduler.start()
+        thread = scheduler._thread
+        assert delivering.wait(5)
+        # Do not wait for the scheduler thread, so the executor is shut down right away
+        scheduler.stop(timeout=0)
+        thread.join(5)
+        assert not thread.is_alive()
+
+    assert errors == []
+
+def test_jobs_not_handed_out_before_stop_run_after_restart():
+    done = threading.Event()
+    scheduler = HeapScheduler(name='test-scheduler')
+    scheduler.stop()
+    scheduler.schedule('job', datetime.utcnow(), done.set)
+    assert 'job' in scheduler and not done.wait(0.2)
+
+    scheduler.start()
+    assert done.wait(5)
+    scheduler.stop(timeout=5)
+
+def _run_until(scheduler, done, timeout=5):
+    scheduler.start()
+    assert done.wait(timeout)
+    scheduler.stop(timeout=5, wait=True)
+
+def test_jobs_run_in_due_order():
+    ran = []
+    done = threading.Event()
+    scheduler = HeapScheduler(name='test-scheduler', delivery_threads=1)
+    scheduler.stop()
+    now = datetime.utcnow()
+    for key, offset in (('c', 3), ('a', 1), ('d', 4), ('b', 2)):
+        scheduler.schedule(key, now - timedelta(seconds=10 - offset), ran.append, key)
+    scheduler.schedule('last', now + timedelta(milliseconds=100), done.set)
+    assert len(scheduler) == 5
+    _run_until(scheduler, done)
+    assert ran == ['a', 'b', 'c', 'd']
+    assert len(scheduler) == 0
+
+def test_cancel_and_reschedule():
+    ran = []
+    done = threading.Event()
+    scheduler = HeapScheduler(name='test-scheduler', delivery_threads=1)
+    scheduler.stop()
+    now = datetime.utcnow()
+    scheduler.schedule('cancelled', now - timedelta(seconds=3), ran.append, 'cancelled')
+    scheduler.schedule('moved', now - timedelta(seconds=2), ran.append, 'moved')
+    scheduler.schedule('kept', now - timedelta(seconds=1), ran.append, 'kept')
+    # Scheduling a key again replaces its job
+    scheduler.schedule('replaced', now - timedelta(seconds=4), ran.append, 'first')
+    scheduler.schedule('replaced', now - timedelta(seconds=4), ran.append, 'second')
+
+    assert scheduler.cancel('cancelled')
+    assert not scheduler.cancel('cancelled')
+    assert 'cancelled' not in scheduler
+    assert scheduler.reschedule('moved', now)
+    assert not scheduler.reschedule('missing', now)
+    assert scheduler.next_due() == now - timedelta(seconds=4)
+
+    scheduler.schedule('done', now + timedelta(milliseconds=100), done.set)
+    _run_until(scheduler, done)
+    assert ran == ['second', 'kept', 'moved']
+
+def test_cancelled_entries_are_purged_from_the_heap():
+    scheduler = HeapScheduler(name='test-scheduler')
+    scheduler.stop()
+    due = datetime.utcnow() + timedelta(hours=1)
+    for key in range(3000):
+        scheduler.schedule(key, due + timedelta(seconds=key), lambda: None)
+    for key in range(2000):
+        scheduler.cancel(key)
+    assert len(scheduler) == 1000
+    assert len(scheduler._heap) < 2000
+    assert scheduler.next_due() == due + timedelta(seconds=2000)
+
+def test_a_failing_job_does_not_stop_the_others():
+    done = threading.Event()
+    scheduler = HeapScheduler(name='test-scheduler', delivery_threads=1)
+    scheduler.stop()
+    now = datetime.utcnow()
+    scheduler.schedule('fails', now - timedelta(seconds=1), lambda: 1 / 0)
+    scheduler.schedule('works', now, done.set)
+    _run_until(scheduler, done)
@@ -0,0 +1,65 @@
+import threading
+from datetime import date, datetime, time
+
+import pytest
+
+from database import db
+from models import Appointment, HealthMetric, Medication, MedicationLog, Reminder
+from schemas import (AppointmentSchema, HealthMetricSchema, MedicationSchema, ReminderSchema,
+                     get_schema)
+from utils.serialization import compile_dumper, dump_list
+
+def test_get_schema_is_cached_per_thread_and_options():
+    schema = get_schema(ReminderSchema, many=True)
+    assert get_schema(ReminderSchema, many=True) is schema
+    assert get_schema(ReminderSchema, many=True, only=('title',)) is not schema
+    assert get_schema(ReminderSchema, only=['title', 'id'], many=True) is \
+        get_schema(ReminderSchema, many=True, only=('title', 'id'))
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(get_schema(ReminderSchema, many=True)))
+    thread.start()
+    thread.join()
+    assert other[0] is not schema
+
+@pytest.fixture
+def rows(users):
+    user = users[0]
+    medication = Medication(user_id=user.id, name='M', dosage='1 tablet', frequency='once_daily', intake_time='08:00')
+    db.session.add(medication)
+    db.session.flush()
+    db.session.add_all([
+        MedicationLog(user_id=user.id, medication_id=medication.id, status='taken',
+                      taken_at=datetime(2025, 1, 1, 8)),
+        MedicationLog(user_id=user.id, medication_id=medication.id, status='skipped',
+                      taken_at=datetime(2025, 1, 2, 8), notes='Nausea'),
+        HealthMetric(user_id=user.id, metric_type='weight', value=70.5, unit='kg',
+                     recorded_at=datetime(2025, 1, 1, 7)),
+        Appointment(user_id=user.id, title='Checkup', doctor_name='Dr. Who', date=date(2025, 1, 2),
+                    time=time(9, 30), status='scheduled'),
+        Reminder(user_id=user.id, reminder_type='medication', title='Dose', message='Take it',
+                 reminder_time=datetime(2025, 1, 1, 8), is_active=False),
+    ])
+    db.session.commit()
+    return {MedicationSchema: Medication.query.all(), HealthMetricSchema: HealthMetric.query.all(),
+            AppointmentSchema: Appointment.query.all(), ReminderSchema: Reminder.query.all()}
+
+@pytest.mark.parametrize('schema_class', [MedicationSchema, HealthMetricSchema, AppointmentSchema, ReminderSchema])
+def test_compiled_dumper_matches_schema_dump(rows, schema_class):
+    first_field = next(name for name in schema_class().dump_fields if name != 'id')
+    for options in ({}, {'only': ('id', first_field)}, {'exclude': (first_field,)}):
+        schema = schema_class(many=True, **options)
+        assert compile_dumper(schema)(rows[schema_class]) == schema.dump(rows[schema_class])
+
+def test_dump_list_uses_the_compiled_dumper_only_when_enabled(rows, monkeypatch):
+    schema = ReminderSchema(many=True)
+    reminders = rows[ReminderSchema]
+    monkeypatch.delenv('FAST_SERIALIZATION', raising=False)
+    assert dump_list(schema, reminders) == schema.dump(reminders)
+    assert not hasattr(schema, '_compiled_dumper')
+
+    monkeypatch.setenv('FAST_SERIALIZATION', 'true')
+    assert dump_list(schema, reminders) == schema.dump(reminders)
+    dumper = schema._compiled_dumper
+    dump_list(schema, reminders)
+    assert schema._compiled_dumper is dumper
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils import vector_filter
+from utils.json_repository import JsonAppointmentRepository, JsonHealthMetricRepository, JsonReminderRepository
+
+pytestmark = pytest.mark.skipif(not vector_filter.NUMPY_AVAILABLE, reason='NumPy is not installed')
+
+START = datetime(2025, 3, 1, 8)
+
+@pytest.fixture
+def collections(json_store):
+    for i in range(30):
+        when = START + timedelta(hours=7 * i)
+        JsonHealthMetricRepository.create({'metric_type': ('glucose', 'weight', 'mood')[i % 3], 'value': i,
+                                           'unit': 'u', 'recorded_at': when - timedelta(hours=i % 4)})
+        JsonAppointmentRepository.create({'title': f'A{i}', 'date': (when.date() - timedelta(days=i % 5)).isoformat(),
+                                          'time': f'{8 + i % 3:02d}:00', 'status': ('scheduled', 'completed')[i % 2]})
+        JsonReminderRepository.create({'title': f'R{i}', 'reminder_type': ('medication', 'appointment')[i % 2],
+                                       'is_active': i % 3 != 0, 'reminder_time': when.isoformat()})
+
+FILTERS = [
+    (JsonHealthMetricRepository, {'metric_type': 'glucose'}),
+    (JsonHealthMetricRepository, {'from_date': '2025-03-02', 'to_date': '2025-03-05'}),
+    (JsonHealthMetricRepository, {'metric_type': 'mood', 'from_date': '2025-03-04'}),
+    (JsonAppointmentRepository, {'status': 'completed'}),
+    (JsonAppointmentRepository, {'from_date': '2025-03-02', 'to_date': '2025-03-06'}),
+    (JsonAppointmentRepository, {'status': 'scheduled', 'to_date': '2025-03-04'}),
+    (JsonReminderRepository, {'reminder_type': 'medication', 'is_active': 'true'}),
+    (JsonReminderRepository, {'is_active': False, 'from_time': '2025-03-03T00:00:00'}),
+    (JsonReminderRepository, {'to_time': '2025-03-05T12:00:00'}),
+]
+
+@pytest.mark.parametrize('repository, filters', FILTERS)
+def test_vector_filters_match_the_python_path(collections, monkeypatch, repository, filters):
+    expected = [row['id'] for row in repository.get_all(filters)]
+    assert expected
+
+    monkeypatch.setenv('JSON_VECTOR_FILTER_MIN_ROWS', '1')
+    assert [row['id'] for row in repository.get_all(filters)] == expected
+
+def test_unrepresentable_columns_fall_back_to_python(json_store, monkeypatch):
+    # NumPy cannot hold timezone-aware datetimes
+    for i in range(4):
+        JsonReminderRepository.create({'title': f'R{i}', 'reminder_type': ('medication', 'appointment')[i % 2],
+                                       'reminder_time': datetime(2025, 3, 4 - i, tzinfo=timezone.utc).isoformat()})
+    filters = {'reminder_type': 'medication', 'from_time': datetime(2025, 3, 1, 12, tzinfo=timezone.utc)}
+
+    monkeypatch.setenv('JSON_VECTOR_FILTER_MIN_ROWS', '1')
+    assert [row['title'] for row in JsonReminderRepository.get_all(filters)] == ['R2', 'R0']
@@ -0,0 +1,186 @@
+from marshmallow import ValidationError
+from sqlalchemy import delete, insert, select, update
+
+from database import db
+
+# Largest number of rows accepted by one batch request
+MAX_BATCH_SIZE = 1000
+
+def parse_batch(json_data):
+    """
+    Read the rows of a batch request.
+
+    Args:
+        json_data: The request body, either a list of rows or {"items": [...]}.
+
+    Returns:
+        list: The rows.
+
+    Raises:
+        ValueError: If the body is not a non-empty list of objects within MAX_BATCH_SIZE.
+    """
+    rows = json_data.get('items') if isinstance(json_data, dict) else json_data
+    if not isinstance(rows, list) or not rows:
+        raise ValueError('Expected a non-empty list of items')
+    if len(rows) > MAX_BATCH_SIZE:
+        raise ValueError(f'A batch can hold at most {MAX_BATCH_SIZE} items')
+    return rows
+
+def validate_rows(schema, rows, overrides=None):
+    """
+    Validate and deserialize every row of a batch in one pass.
+
+    Args:
+        schema: A schema built with load_instance=False, so rows load as dicts.
+        rows (list): The rows from the request.
+        overrides (dict, optional): Values set on every row, e.g. the owner's user_id.
+
+    Returns:
+        tuple: (list of (index, loaded dict) for the valid rows,
+                dict of index -> error messages for the invalid ones)
+    """
+    valid = []
+    errors = {}
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors[index] = {'_schema': ['Invalid input type.']}
+            continue
+        try:
+            data = schema.load(row)
+        except ValidationError as err:
+            errors[index] = err.messages
+            continue
+        if overrides:
+            data.update(overrides)
+        valid.append((index, data))
+    return valid, errors
+
+def validate_updates(schema, rows):
+    """
+    Validate the rows of a batch update, each of which names the row to change by its 'id'.
+
+    Args:
+        schema: A schema built with load_instance=False and partial=True.
+        rows (list): The rows from the request.
+
+    Returns:
+        tuple: Like validate_rows.
+    """
+    valid, errors = validate_rows(schema, rows)
+    identified = []
+    for index, data in valid:
+        if data.get('id') is None:
+            errors[index] = {'id': ['Missing data for required field.']}
+        else:
+            identified.append((index, data))
+    return identified, errors
+
+def validate_ids(rows):
+    """
+    Validate the rows of a batch delete: row IDs, or objects holding only an 'id'.
+
+    Returns:
+        tuple: Like validate_rows, with each valid row loaded as {'id': ...}.
+    """
+    valid = []
+    errors = {}
+    for index, row in enumerate(rows):
+        row_id = row.get('id') if isinstance(row, dict) and row.keys() == {'id'} else row
+        if isinstance(row_id, int) and not isinstance(row_id, bool):
+            valid.append((index, {'id': row_id}))
+        else:
+            errors[index] = {'id': ['Not a valid integer.']}
+    return valid, errors
+
+def find_existing(model, valid, *criteria):
+    """
+    Split validated rows into those naming an existing row and the others, with one query.
+
+    Args:
+        model: The model class.
+        valid (list): (index, loaded dict with an 'id') pairs.
+        *criteria: Conditions the rows must also meet, e.g. belonging to the user.
+
+    Returns:
+        tuple: (the rows that exist, dict of index -> ID for the others)
+    """
+    requested = {data['id'] for _, data in valid}
+    existing = set(db.session.scalars(select(model.id).where(model.id.in_(requested), *criteria))) \
+        if requested else set()
+    found = [(index, data) for index, data in valid if data['id'] in existing]
+    missing = {index: data['id'] for index, data in valid if data['id'] not in existing}
+    return found, missing
+
+def insert_rows(model, rows):
+    """
+    Insert rows with a single multi-row INSERT, without committing.
+
+    Args:
+        model: The model class.
+        rows (list): Dicts of column values.
+
+    Returns:
+        list: The new primary keys, in the order of ``rows``.
+    """
+    if db.session.get_bind().dialect.name == 'sqlite':
+        # Asking SQLite for RETURNING rows in parameter order makes SQLAlchemy
+        # fall back to one INSERT per row. The transaction holds SQLite's only
+        # write lock and rowids are assigned in increasing VALUES order, so
+        # sorting the new IDs gives the same order.
+        return sorted(db.session.scalars(insert(model).returning(model.id), rows))
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return list(db.session.scalars(statement, rows))
+
+def update_rows(model, rows):
+    """
+    Update rows by primary key, without committing.
+
+    Rows changing the same columns are sent as one executemany UPDATE.
+
+    Args:
+        model: The model class.
+        rows (list): Dicts of the 'id' and the new column values.
+    """
+    db.session.execute(update(model), rows)
+
+def delete_rows(model, ids):
+    """Delete the rows with the given primary keys in one statement, without committing."""
+    db.session.execute(delete(model).where(model.id.in_(ids)))
+
+def batch_response(count, valid, errors, ids, outcome='created', missing=None):
+    """
+    Build the per-row results of a batch request.
+
+    Args:
+        count (int): Number of rows in the request.
+        valid (list): (index, data) of the rows that were applied.
+        errors (dict): Index -> error messages of the invalid rows.
+        ids (list): IDs of the applied rows, in the order of ``valid``.
+        outcome (str): 'created', 'updated' or 'deleted'.
+        missing (dict, optional): Index -> ID of the rows naming no row of the user.
+
+    Returns:
+        tuple: (response body, status code): 201 if every row was created
+               (200 if every row was updated or deleted), 207 if only some
+               were applied and 400 if none were. Valid rows left out by an
+               atomic request are reported as 'skipped'.
+    """
+    results = [None] * count
+    for (index, _), row_id in zip(valid, ids):
+        results[index] = {'index': index, 'status': outcome, 'id': row_id}
+    for index, messages in errors.items():
+        results[index] = {'index': index, 'status': 'invalid', 'errors': messages}
+    for index, row_id in (missing or {}).items():
+        results[index] = {'index': index, 'status': 'not_found', 'id': row_id}
+    for index, result in enumerate(results):
+        if result is None:
+            results[index] = {'index': index, 'status': 'skipped'}
+
+    applied = len(ids)
+    if applied == count:
+        status = 201 if outcome == 'created' else 200
+    elif applied:
+        status = 207
+    else:
+        status = 400
+    return {outcome: applied, 'failed': count - applied, 'results': results}, status
@@ -0,0 +1,321 @@
+"""
+Compact columnar snapshot format for the JSON data store.
+
+A snapshot holds one collection (plus any child rows nested in it, such as
+medication logs) stored column by column instead of record by record:
+
+    MAGIC | header length (uint32, little-endian) | header (JSON) | column data
+
+Integer, float and boolean columns are packed with ``array``, and date and
+time fields are stored as integers (microseconds since the Unix epoch for
+datetimes, ordinal days for dates, microseconds since midnight for times),
+so reading a snapshot never parses a timestamp string. Text columns are kept
+as a single JSON array of strings, and columns whose values do not fit one of
+the packed kinds fall back to a JSON array of arbitrary values.
+
+Only the standard library is used, so the format is always available.
+"""
+import json
+import re
+import struct
+import sys
+from array import array
+from datetime import datetime, date, time, timedelta
+
+MAGIC = b'MTSNAP01'
+_HEADER_LENGTH = struct.Struct('<I')
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Marks a field a record does not have at all, as opposed to one set to None
+_MISSING = object()
+
+# Per-row presence flags stored for columns that are not set on every row
+_ABSENT, _NULL, _PRESENT = 0, 1, 2
+_NOT_PRESENT_FLAGS = re.compile(b'[\x00\x01]')
+_ABSENT_FLAGS = re.compile(b'\x00')
+
+_PACKED_KINDS = {'int': 'q', 'float': 'd', 'datetime': 'q', 'date': 'q', 'time': 'q'}
+
+def _datetime_from_epoch(value):
+    return _EPOCH + timedelta(0, 0, value)
+
+def _time_from_micros(value):
+    seconds, microsecond = divmod(value, 1000000)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return time(hour, minute, second, microsecond)
+
+# Decoders from the stored integer form of each temporal kind
+EPOCH_DECODERS = {
+    'datetime': _datetime_from_epoch,
+    'date': date.fromordinal,
+    'time': _time_from_micros,
+}
+
+class SnapshotFormatError(ValueError):
+    """Raised when a file is not a valid binary snapshot."""
+
+def _to_epoch(kind, value):
+    """
+    Convert a temporal value to its stored integer form.
+
+    Accepts the decoded object, its ISO string, or an already stored integer.
+    Raises ValueError or TypeError for anything that cannot be stored exactly
+    (e.g. timezone-aware values), so the column falls back to JSON.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if kind == 'datetime':
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        if not isinstance(value, datetime) or value.tzinfo is not None:
+            raise TypeError(f'not a naive datetime: {value!r}')
+        return (value - _EPOCH) // _MICROSECOND
+    if kind == 'date':
+        if isinstance(value, str):
+            value = date.fromisoformat(value)
+        if not isinstance(value, date) or isinstance(value, datetime):
+            raise TypeError(f'not a date: {value!r}')
+        return value.toordinal()
+    if isinstance(value, str):
+        value = time.fromisoformat(value)
+    if not isinstance(value, time) or value.tzinfo is not None:
+        raise TypeError(f'not a naive time: {value!r}')
+    return ((value.hour * 60 + value.minute) * 60 + value.second) * 1000000 + value.microsecond
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+def _infer_kind(values):
+    """Pick the most compact kind able to hold every non-null value of a column."""
+    kinds = set()
+    for value in values:
+        if value is None or value is _MISSING:
+            continue
+        if isinstance(value, bool):
+            kinds.add('bool')
+        elif isinstance(value, int):
+            kinds.add('int')
+        elif isinstance(value, float):
+            kinds.add('float')
+        elif isinstance(value, str):
+            kinds.add('str')
+        else:
+            return 'json'
+        if len(kinds) > 1:
+            return 'json'
+    return kinds.pop() if kinds else 'str'
+
+def _pack(typecode, values):
+    packed = array(typecode, values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+def _unpack(typecode, data):
+    unpacked = array(typecode)
+    unpacked.frombytes(data)
+    if sys.byteorder == 'big':
+        unpacked.byteswap()
+    return unpacked.tolist()
+
+def _encode_column(values, kind):
+    """
+    Encode one column.
+
+    Returns:
+        tuple: (kind actually used, presence flags or None, column data)
+    """
+    flags = None
+    if any(value is None or value is _MISSING for value in values):
+        flags = bytes(_ABSENT if value is _MISSING else _NULL if value is None else _PRESENT for value in values)
+
+    if kind in EPOCH_DECODERS:
+        try:
+            data = _pack('q', [0 if value is None or value is _MISSING else _to_epoch(kind, value) for value in values])
+            return kind, flags, data
+        except (TypeError, ValueError, OverflowError):
+            kind = 'json'
+    elif kind is None:
+        kind = _infer_kind(values)
+
+    if kind in ('int', 'float'):
+        try:
+            data = _pack(_PACKED_KINDS[kind], [0 if value is None or value is _MISSING else value for value in values])
+            return kind, flags, data
+        except OverflowError:
+            kind = 'json'
+    if kind == 'bool':
+        return kind, flags, bytes(1 if value is True else 0 for value in values)
+
+    values = [None if value is _MISSING else value for value in values]
+    return kind, flags, json.dumps(values, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+def _decode_column(kind, data, decode_temporal):
+    if kind in _PACKED_KINDS:
+        values = _unpack(_PACKED_KINDS[kind], data)
+        if decode_temporal and kind in EPOCH_DECODERS:
+            decoder = EPOCH_DECODERS[kind]
+            values = [decoder(value) for value in values]
+        return values
+    if kind == 'bool':
+        return [byte == 1 for byte in data]
+    return json.loads(bytes(data))
+
+def _encode_table(records, temporal_fields, chunks, offset):
+    """Encode rows column by column, appending the column data to ``chunks``."""
+    names = {}
+    for record in records:
+        for name in record:
+            names.setdefault(name, None)
+
+    columns = []
+    for name in names:
+        values = [record.get(name, _MISSING) for record in records]
+        kind, flags, data = _encode_column(values, temporal_fields.get(name))
+        column = {'name': name, 'kind': kind, 'flags': None}
+        if flags is not None:
+            chunks.append(flags)
+            column['flags'] = [offset, len(flags)]
+            offset += len(flags)
+        chunks.append(data)
+        column['data'] = [offset, len(data)]
+        offset += len(data)
+        columns.append(column)
+    return {'rows': len(records), 'columns': columns}, offset
+
+def _decode_table(table, body, decode_temporal):
+    names = []
+    columns = []
+    sparse = []
+    for column in table['columns']:
+        start, length = column['data']
+        values = _decode_column(column['kind'], body[start:start + length], decode_temporal)
+        if column['flags'] is not None:
+            start, length = column['flags']
+            flags = bytes(body[start:start + length])
+            if column['kind'] in _PACKED_KINDS or column['kind'] == 'bool':
+                # Text and JSON columns already hold None for these rows
+                for match in _NOT_PRESENT_FLAGS.finditer(flags):
+                    values[match.start()] = None
+            if _ABSENT in flags:
+                sparse.append((column['name'], flags))
+        names.append(column['name'])
+        columns.append(values)
+
+    if not columns:
+        return [{} for _ in range(table['rows'])]
+    rows = [dict(zip(names, values)) for values in zip(*columns)]
+    for name, flags in sparse:
+        for match in _ABSENT_FLAGS.finditer(flags):
+            del rows[match.start()][name]
+    return rows
+
+def encode_snapshot(data_type, records, temporal_fields=None, children=None):
+    """
+    Encode a collection as a binary snapshot.
+
+    Args:
+        data_type (str): Collection name, stored in the header.
+        records (list): The rows to store. Temporal fields may hold decoded
+                        objects, ISO strings or already stored integers.
+        temporal_fields (dict, optional): Maps a collection name to
+                        {field: 'datetime' | 'date' | 'time'}.
+        children (dict, optional): Maps a field holding nested rows (e.g.
+                        'logs') to the collection name of those rows.
+
+    Returns:
+        bytes: The encoded snapshot.
+    """
+    temporal_fields = temporal_fields or {}
+    children = children or {}
+    chunks = []
+    records = list(records)
+
+    # Nested rows are stored as their own table, with the index of their parent
+    child_tables = []
+    parent_rows = records
+    if children:
+        parent_rows = [{k: v for k, v in record.items() if k not in children} for record in records]
+    offset = 0
+    header_tables = []
+    for field, child_type in children.items():
+        child_rows = []
+        parents = []
+        flags = bytearray()
+        for i, record in enumerate(records):
+            nested = record.get(field, _MISSING)
+            flags.append(_ABSENT if nested is _MISSING else _NULL if nested is None else _PRESENT)
+            for child in nested or ():
+                child_rows.append(child)
+                parents.append(i)
+        child_tables.append((field, child_type, child_rows, parents, bytes(flags)))
+
+    table, offset = _encode_table(parent_rows, temporal_fields.get(data_type, {}), chunks, offset)
+    table['type'] = data_type
+    header_tables.append(table)
+
+    for field, child_type, child_rows, parents, flags in child_tables:
+        table, offset = _encode_table(child_rows, temporal_fields.get(child_type, {}), chunks, offset)
+        table['type'] = child_type
+        table['field'] = field
+        parent_data = _pack('q', parents)
+        chunks.append(parent_data)
+        table['parents'] = [offset, len(parent_data)]
+        offset += len(parent_data)
+        chunks.append(flags)
+        table['present'] = [offset, len(flags)]
+        offset += len(flags)
+        header_tables.append(table)
+
+    header = json.dumps({'version': 1, 'type': data_type, 'tables': header_tables},
+                        separators=(',', ':')).encode('utf-8')
+    return b''.join([MAGIC, _HEADER_LENGTH.pack(len(header)), header] + chunks)
+
+def decode_snapshot(payload, decode_temporal=True):
+    """
+    Decode a binary snapshot.
+
+    Args:
+        payload (bytes): The snapshot file's contents.
+        decode_temporal (bool): Return datetime, date and time objects. When
+                                False, temporal fields keep their stored
+                                integer form (see EPOCH_DECODERS).
+
+    Returns:
+        tuple: (collection name, list of records)
+
+    Raises:
+        SnapshotFormatError: If the payload is not a binary snapshot.
+    """
+    view = memoryview(payload)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        raise SnapshotFormatError('not a binary snapshot')
+    try:
+        start = len(MAGIC) + _HEADER_LENGTH.size
+        (header_length,) = _HEADER_LENGTH.unpack(view[len(MAGIC):start])
+        header = json.loads(bytes(view[start:start + header_length]))
+        body = view[start + header_length:]
+
+        tables = header['tables']
+        records = _decode_table(tables[0], body, decode_temporal)
+        for table in tables[1:]:
+            field = table['field']
+            start, length = table['present']
+            present = body[start:start + length]
+            for record, flag in zip(records, present):
+                if flag == _PRESENT:
+                    record[field] = []
+                elif flag == _NULL:
+                    record[field] = None
+            start, length = table['parents']
+            parents = _unpack('q', body[start:start + length])
+            for child, parent in zip(_decode_table(table, body, decode_temporal), parents):
+                records[parent][field].append(child)
+        return header['type'], records
+    except (KeyError, IndexError, TypeError, ValueError, struct.error) as e:
+        raise SnapshotFormatError(f'corrupt binary snapshot: {e}') from e
@@ -1,111 +1,835 @@
 import json
 import os
 import logging
+import tempfile
+import threading
+from collections.abc import Mapping, MutableMapping
+from contextlib import contextmanager
 from datetime import datetime, date, time
 
-def load_dummy_data(data_type=None):
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from utils.binary_snapshot import EPOCH_DECODERS, encode_snapshot, decode_snapshot
+
+# Seed file holding every collection. It is only read to create missing shards.
+DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'dummy_data.json')
+# One snapshot (<collection>.json, or <collection>.bin in the binary format),
+# journal (<collection>.journal) and lock file (<collection>.lock) per collection.
+STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'json_store')
+
+COLLECTIONS = ('medications', 'health_metrics', 'appointments', 'reminders')
+
+SNAPSHOT_SUFFIXES = {'json': '.json', 'binary': '.bin'}
+
+# Child collections stored inside the rows of a parent collection:
+# name -> (parent collection, foreign key field, field holding the child rows)
+CHILD_COLLECTIONS = {
+    'medication_logs': ('medications', 'medication_id', 'logs'),
+}
+
+# Process-wide cache of the parsed collections, each held as an id-keyed dict.
+# A collection's entry is keyed on its snapshot's (inode, mtime, size) and on
+# how much of its journal has been replayed, so changes made by other
+# processes are picked up, while writes made through this module update the
+# cache and the files together.
+_cache_lock = threading.RLock()
+_cache = {}
+
+# Depth and descriptor of the inter-process lock held by this process on each
+# collection. Only touched while holding _cache_lock, which makes the file
+# locks re-entrant.
+_file_lock_state = {}
+
+class ConcurrentModificationError(Exception):
+    """Raised when a write was based on data that another writer has since changed."""
+
+def _shard_path(data_type, suffix):
+    return os.path.join(STORE_DIR, f'{data_type}{suffix}')
+
+def _snapshot_format():
+    """Return the configured snapshot format, 'json' (default) or 'binary'."""
+    snapshot_format = os.environ.get('JSON_SNAPSHOT_FORMAT', 'json').lower()
+    return snapshot_format if snapshot_format in SNAPSHOT_SUFFIXES else 'json'
+
+def _snapshot_path(data_type, snapshot_format=None):
+    return _shard_path(data_type, SNAPSHOT_SUFFIXES[snapshot_format or _snapshot_format()])
+
+def _storage_collection(data_type):
+    """Return the collection whose files store ``data_type``."""
+    if data_type in CHILD_COLLECTIONS:
+        return CHILD_COLLECTIONS[data_type][0]
+    return data_type
+
+def _collection_state(data_type):
+    state = _cache.get(data_type)
+    if state is None:
+        state = _cache[data_type] = {
+            'signature': None,
+            'rows': None,
+            'journal_offset': 0,
+            'journal_records': 0,
+            'compacting': False,
+            'generation': 0,
+        }
+    return state
+
+@contextmanager
+def _file_lock(data_type, exclusive=True):
+    """
+    Hold the inter-process lock on one collection's files (flock on its .lock file).
+
+    Writers take it exclusively for their whole read-check-write cycle;
+    readers take it shared while reloading, so they never observe a
+    half-finished compaction. Must be called with _cache_lock held.
+    """
+    if fcntl is None:
+        yield
+        return
+    state = _file_lock_state.setdefault(data_type, {'depth': 0, 'file': None})
+    if state['depth'] == 0:
+        os.makedirs(STORE_DIR, exist_ok=True)
+        lock_file = open(_shard_path(data_type, '.lock'), 'a')
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        state['file'] = lock_file
+    state['depth'] += 1
+    try:
+        yield
+    finally:
+        state['depth'] -= 1
+        if state['depth'] == 0:
+            lock_file = state['file']
+            state['file'] = None
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            lock_file.close()
+
+@contextmanager
+def write_lock(data_type):
+    """
+    Hold the exclusive write lock on a collection across several operations.
+
+    Used by callers whose optimistic write lost a race: re-reading and writing
+    while holding it cannot conflict with another writer.
+    """
+    with _cache_lock, _file_lock(_storage_collection(data_type)):
+        yield
+
+def _journal_enabled():
+    """Return True when writes should be appended to the journal."""
+    return os.environ.get('JSON_STORAGE_MODE', 'snapshot').lower() == 'journal'
+
+def _compaction_threshold():
+    """Number of journal records after which a background compaction is started."""
+    return int(os.environ.get('JSON_JOURNAL_COMPACT_THRESHOLD', '500'))
+
+def _file_signature(file_path):
+    """Return the (inode, mtime, size) triple used to detect changes to a snapshot."""
+    stat = os.stat(file_path)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def _journal_size(data_type):
+    try:
+        return os.path.getsize(_shard_path(data_type, '.journal'))
+    except OSError:
+        return 0
+
+class LazyRecord(MutableMapping):
+    """
+    A record whose date and time fields are decoded on first access.
+
+    Fields are stored as read: ISO strings for JSON snapshots and journals,
+    epoch integers (or ISO strings, for columns that could not be packed)
+    for binary snapshots; ``stored_type`` is the type(s) still to decode.
+    Until the record is modified it shares the dict it was read from, so
+    wrapping a row costs almost nothing and saving it again reuses that form
+    instead of re-encoding every field. Its decoded plain form is kept too,
+    so handing the row out again only costs a shallow copy. Nested lists of
+    records (medication logs) are always re-assembled, since they can change
+    without the parent being assigned to.
+    """
+
+    __slots__ = ('_raw', '_values', '_decoders', '_decoded', '_plain', '_children', '_stored_type')
+
+    def __init__(self, raw, decoders, children=(), stored_type=str):
+        self._raw = raw
+        self._values = raw
+        self._decoders = decoders
+        self._decoded = None
+        self._plain = None
+        self._children = children
+        self._stored_type = stored_type
+
+    def __getitem__(self, key):
+        decoded = self._decoded
+        if decoded is not None and key in decoded:
+            return decoded[key]
+        value = self._values[key]
+        if key in self._decoders and isinstance(value, self._stored_type):
+            value = self._decoders[key](value)
+            if decoded is None:
+                decoded = self._decoded = {}
+            decoded[key] = value
+        return value
+
+    def _modify(self):
+        if self._values is self._raw:
+            self._values = dict(self._values)
+        self._raw = None
+
+    def __setitem__(self, key, value):
+        self._modify()
+        self._values[key] = value
+        self._plain = None
+        if self._decoded:
+            self._decoded.pop(key, None)
+
+    def __delitem__(self, key):
+        self._modify()
+        del self._values[key]
+        self._plain = None
+        if self._decoded:
+            self._decoded.pop(key, None)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def __repr__(self):
+        return f'LazyRecord({dict(self)!r})'
+
+    def copy(self):
+        """Return an independent copy that shares the not yet decoded values."""
+        clone = LazyRecord.__new__(LazyRecord)
+        clone._raw = self._raw
+        clone._values = self._values if self._values is self._raw else dict(self._values)
+        clone._decoders = self._decoders
+        clone._decoded = dict(self._decoded) if self._decoded else None
+        clone._plain = self._plain
+        clone._children = self._children
+        clone._stored_type = self._stored_type
+        for key in self._children:
+            clone._values[key] = [copy_record(item) for item in self._values[key]]
+        return clone
+
+    def to_dict(self):
+        """Return a new plain dict of the decoded fields, decoding each at most once per record."""
+        plain = self._plain
+        if plain is None:
+            plain = self._plain = {key: self[key] for key in self._values if key not in self._children}
+        if not self._children:
+            return dict(plain)
+        result = dict(plain)
+        for key in self._children:
+            result[key] = [materialize_record(item) for item in self._values[key]]
+        return result
+
+    def stored(self):
+        """Return the fields in their stored form, with values assigned since as they are."""
+        if not self._children:
+            return self._values
+        result = dict(self._values)
+        for key in self._children:
+            result[key] = [_stored_form(item) for item in result[key]]
+        return result
+
+    def encoded(self):
+        """Return the JSON-ready form, re-encoding only what changed since it was read."""
+        if self._stored_type is not str:
+            result = {key: _convert_datetime_to_str(self[key]) for key in self._values}
+        elif self._raw is not None and not self._children:
+            return self._raw
+        elif self._raw is not None:
+            result = dict(self._raw)
+        else:
+            # Fields that were only decoded still hold their ISO string here
+            result = {key: _convert_datetime_to_str(value) for key, value in self._values.items()}
+        for key in self._children:
+            result[key] = _convert_datetime_to_str(self._values[key])
+        return result
+
+# Temporal fields of each collection and their type
+_TEMPORAL_FIELDS = {
+    'medications': {'created_at': datetime, 'updated_at': datetime},
+    'medication_logs': {'taken_at': datetime},
+    'health_metrics': {'recorded_at': datetime},
+    'appointments': {'date': date, 'time': time, 'created_at': datetime, 'updated_at': datetime},
+    'reminders': {'reminder_time': datetime, 'created_at': datetime, 'updated_at': datetime},
+}
+
+_ISO_DECODERS = {
+    data_type: {field: kind.fromisoformat for field, kind in fields.items()}
+    for data_type, fields in _TEMPORAL_FIELDS.items()
+}
+
+def _binary_decoder(kind):
+    """
+    Decode a temporal value read from a binary snapshot.
+
+    It is an epoch integer, or an ISO string when the column could not be
+    packed (e.g. timezone-aware datetimes) and was stored as JSON instead.
+    """
+    from_epoch = EPOCH_DECODERS[kind.__name__]
+    return lambda value: kind.fromisoformat(value) if isinstance(value, str) else from_epoch(value)
+
+_EPOCH_DECODERS = {
+    data_type: {field: _binary_decoder(kind) for field, kind in fields.items()}
+    for data_type, fields in _TEMPORAL_FIELDS.items()
+}
+
+def _parse_record(data_type, record, stored_type=str):
+    """
+    Wrap one raw record (and its nested logs) so its temporal fields decode lazily.
+
+    ``stored_type`` is str for records read from JSON and int for records
+    read from a binary snapshot, whose temporal columns may also hold ISO
+    strings.
+    """
+    decoders = (_ISO_DECODERS if stored_type is str else _EPOCH_DECODERS).get(data_type)
+    if decoders is None:
+        return record
+    encoded_types = str if stored_type is str else (int, str)
+    if data_type == 'medications':
+        lazy = LazyRecord(record, decoders, children=('logs',), stored_type=encoded_types)
+        lazy._values = dict(record)
+        lazy._values['logs'] = [
+            _parse_record('medication_logs', log, stored_type) for log in record.get('logs', [])
+        ]
+        return lazy
+    return LazyRecord(record, decoders, stored_type=encoded_types)
+
+def _stored_form(record):
+    """Return a record as a plain mapping without decoding its temporal fields."""
+    if isinstance(record, LazyRecord):
+        return record.stored()
+    return {k: [_stored_form(item) for item in v] if isinstance(v, list) else v for k, v in record.items()}
+
+def _apply_put(rows, data_type, record):
+    """Insert or replace a record in a cached collection."""
+    if data_type in CHILD_COLLECTIONS:
+        _, foreign_key, field = CHILD_COLLECTIONS[data_type]
+        parent = rows.get(record[foreign_key])
+        if parent is None:
+            return False
+        children = parent.setdefault(field, [])
+        for i in range(len(children) - 1, -1, -1):
+            if children[i]['id'] == record['id']:
+                children[i] = record
+                return True
+        children.append(record)
+        return True
+    rows[record['id']] = record
+    return True
+
+def _apply_delete(rows, data_type, record_id, parent_id=None):
+    """
+    Remove a record from a cached collection.
+
+    A child record (e.g. a medication log) is removed from its parent's
+    nested list; without ``parent_id`` every parent is searched for it.
+    """
+    if data_type in CHILD_COLLECTIONS:
+        _, _, field = CHILD_COLLECTIONS[data_type]
+        parents = [rows.get(parent_id)] if parent_id is not None else list(rows.values())
+        for parent in parents:
+            children = parent.get(field) if parent is not None else None
+            if not children:
+                continue
+            for i in range(len(children) - 1, -1, -1):
+                if children[i]['id'] == record_id:
+                    del children[i]
+                    return True
+        return False
+    return rows.pop(record_id, None) is not None
+
+def _atomic_write(file_path, content):
+    """Write ``content`` (bytes) to a temp file, fsync it and rename it over ``file_path``."""
+    directory = os.path.dirname(file_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(file_path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _child_fields(data_type):
+    """Map the fields of ``data_type`` holding nested rows to the collection of those rows."""
+    return {field: child for child, (parent, _, field) in CHILD_COLLECTIONS.items() if parent == data_type}
+
+def _encode_snapshot(data_type, records, snapshot_format):
+    if snapshot_format == 'binary':
+        temporal_fields = {
+            name: {field: kind.__name__ for field, kind in fields.items()}
+            for name, fields in _TEMPORAL_FIELDS.items()
+        }
+        return encode_snapshot(
+            data_type, [_stored_form(record) for record in records], temporal_fields, _child_fields(data_type)
+        )
+    return json.dumps(_convert_datetime_to_str(list(records)), indent=2).encode('utf-8')
+
+def _read_snapshot(data_type, snapshot_format=None):
+    """
+    Read and parse a collection's snapshot file.
+
+    Returns:
+        list: The records, wrapped so their temporal fields decode lazily.
+    """
+    snapshot_format = snapshot_format or _snapshot_format()
+    with open(_snapshot_path(data_type, snapshot_format), 'rb') as file:
+        content = file.read()
+    if snapshot_format == 'binary':
+        _, records = decode_snapshot(content, decode_temporal=False)
+        return [_parse_record(data_type, record, int) for record in records]
+    return [_parse_record(data_type, record) for record in json.loads(content)]
+
+def _ensure_shard(data_type):
+    """
+    Create a collection's snapshot if it is missing.
+
+    It is converted from the collection's snapshot in the other format when
+    there is one (e.g. after switching JSON_SNAPSHOT_FORMAT). Otherwise this
+    is the migration path from data/dummy_data.json: each collection is split
+    out the first time it is used, and the shard is authoritative from then on.
+    """
+    snapshot_format = _snapshot_format()
+    snapshot = _snapshot_path(data_type, snapshot_format)
+    if os.path.exists(snapshot):
+        return
+    with _file_lock(data_type):
+        if os.path.exists(snapshot):
+            return
+        for other_format in SNAPSHOT_SUFFIXES:
+            if other_format != snapshot_format and os.path.exists(_snapshot_path(data_type, other_format)):
+                records = _read_snapshot(data_type, other_format)
+                _atomic_write(snapshot, _encode_snapshot(data_type, records, snapshot_format))
+                logging.info(f"Converted {data_type} to {snapshot}")
+                return
+        records = []
+        if os.path.exists(DATA_FILE):
+            with open(DATA_FILE, 'r') as file:
+                records = json.load(file).get(data_type, [])
+        _atomic_write(snapshot, _encode_snapshot(data_type, records, snapshot_format))
+        logging.info(f"Migrated {data_type} to {snapshot}")
+
+def migrate_to_shards():
+    """Split data/dummy_data.json into one file per collection."""
+    with _cache_lock:
+        for data_type in COLLECTIONS:
+            _ensure_shard(data_type)
+
+def _replay_journal(data_type, rows, offset):
+    """
+    Apply the journal records of a collection found after ``offset`` to ``rows``.
+
+    A trailing, partially written line (e.g. after a crash mid-append) is left
+    unapplied and will be re-read once it is complete.
+
+    Returns:
+        tuple: (new offset, number of records applied)
+    """
+    applied = 0
+    try:
+        with open(_shard_path(data_type, '.journal'), 'rb') as file:
+            file.seek(offset)
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logging.warning(f"Skipping corrupt {data_type} journal record")
+                    continue
+                record_type = entry['type']
+                if entry['op'] == 'put':
+                    _apply_put(rows, record_type, _parse_record(record_type, entry['record']))
+                elif entry['op'] == 'delete':
+                    _apply_delete(rows, record_type, entry['id'], entry.get('parent_id'))
+                applied += 1
+    except FileNotFoundError:
+        pass
+    return offset, applied
+
+def _is_stale(data_type, state):
+    return (
+        state['rows'] is None
+        or state['signature'] != _file_signature(_snapshot_path(data_type))
+        or _journal_size(data_type) > state['journal_offset']
+    )
+
+def _refresh_collection(data_type, state):
+    """Reload a collection's snapshot and/or replay its new journal records."""
+    snapshot = _snapshot_path(data_type)
+    signature = _file_signature(snapshot)
+    if state['rows'] is None or state['signature'] != signature:
+        try:
+            records = _read_snapshot(data_type)
+        except ValueError:
+            if state['rows'] is None:
+                raise
+            # Keep serving the last good copy rather than an empty collection
+            logging.error(f"{snapshot} is not a valid snapshot; keeping the cached {data_type}")
+            return
+        state['rows'] = {record['id']: record for record in records}
+        state['signature'] = signature
+        state['journal_offset'] = 0
+        state['journal_records'] = 0
+        state['generation'] += 1
+
+    if _journal_size(data_type) > state['journal_offset']:
+        offset, applied = _replay_journal(data_type, state['rows'], state['journal_offset'])
+        state['journal_offset'] = offset
+        state['journal_records'] += applied
+        if applied:
+            state['generation'] += 1
+
+def _get_collection(data_type):
+    """
+    Return a cached collection, (re)loading it only when its files changed on disk.
+
+    Returns:
+        dict: The id-keyed records shared by all callers; do not mutate them directly.
     """
-    Load dummy data from the JSON file.
-    
+    with _cache_lock:
+        state = _collection_state(data_type)
+        if state['rows'] is None:
+            _ensure_shard(data_type)
+        if _is_stale(data_type, state):
+            with _file_lock(data_type, exclusive=False):
+                _refresh_collection(data_type, state)
+        return state['rows']
+
+def copy_record(record):
+    """Copy a row (and its nested lists of rows) so callers cannot mutate the cache."""
+    if isinstance(record, LazyRecord):
+        return record.copy()
+    return {k: [copy_record(item) for item in v] if isinstance(v, list) else v for k, v in record.items()}
+
+def _copy_records(records):
+    return [copy_record(record) for record in records]
+
+def materialize_record(record):
+    """
+    Return a row as a plain dict, with its temporal fields (and nested rows) decoded.
+
+    Rows leave the data store in this form, so callers get ordinary dicts
+    whatever the store keeps in memory. A LazyRecord keeps its decoded form,
+    so materializing a cached row again is a shallow copy.
+    """
+    if isinstance(record, LazyRecord):
+        return record.to_dict()
+    return {
+        key: [materialize_record(item) if isinstance(item, Mapping) else item for item in value]
+        if isinstance(value, list) else value
+        for key, value in record.items()
+    }
+
+def _write_snapshot(data_type, rows):
+    """
+    Atomically replace a collection's snapshot and empty its journal.
+
+    The snapshot is written to a temporary file and renamed over the old one,
+    so readers never see a truncated file. It is written before the journal is
+    truncated, and replaying put/delete records is idempotent, so a crash in
+    between loses nothing.
+    """
+    snapshot_format = _snapshot_format()
+    snapshot = _snapshot_path(data_type, snapshot_format)
+    _atomic_write(snapshot, _encode_snapshot(data_type, rows.values(), snapshot_format))
+
+    journal = _shard_path(data_type, '.journal')
+    if os.path.exists(journal):
+        open(journal, 'w').close()
+
+    state = _collection_state(data_type)
+    state['rows'] = rows
+    state['signature'] = _file_signature(snapshot)
+    state['journal_offset'] = 0
+    state['journal_records'] = 0
+
+def _append_journal(data_type, entry):
+    """Durably append one record to a collection's journal and advance its replay offset."""
+    line = (json.dumps(_convert_datetime_to_str(entry), separators=(',', ':')) + '\n').encode('utf-8')
+    with open(_shard_path(data_type, '.journal'), 'ab') as file:
+        file.write(line)
+        file.flush()
+        os.fsync(file.fileno())
+    state = _collection_state(data_type)
+    state['journal_offset'] += len(line)
+    state['journal_records'] += 1
+
+    if state['journal_records'] >= _compaction_threshold() and not state['compacting']:
+        state['compacting'] = True
+        threading.Thread(
+            target=compact_journal, args=(data_type,), name=f'json-journal-compaction-{data_type}', daemon=True
+        ).start()
+
+def compact_journal(data_type=None):
+    """
+    Fold a collection's journal (or every collection's) into its snapshot.
+
+    Returns:
+        bool: True if successful, False otherwise.
+    """
+    data_types = [data_type] if data_type else COLLECTIONS
+    try:
+        for collection in data_types:
+            with _cache_lock, _file_lock(collection):
+                _write_snapshot(collection, _get_collection(collection))
+        return True
+    except Exception as e:
+        logging.error(f"Error compacting data journal: {str(e)}")
+        return False
+    finally:
+        for collection in data_types:
+            _collection_state(collection)['compacting'] = False
+
+def export_snapshots(snapshot_format, data_type=None):
+    """
+    Write a collection's (or every collection's) current data as a snapshot in the given format.
+
+    This is the importer/exporter between the JSON and binary formats: export
+    to 'binary', then set JSON_SNAPSHOT_FORMAT=binary to start using it (or
+    the other way round). Pending journal records are included, and stay
+    valid for the new snapshot since replaying them is idempotent.
+
+    Args:
+        snapshot_format (str): 'json' or 'binary'.
+        data_type (str, optional): Only export this collection.
+
+    Returns:
+        bool: True if successful, False otherwise.
+    """
+    if snapshot_format not in SNAPSHOT_SUFFIXES:
+        logging.error(f"Unknown snapshot format: {snapshot_format}")
+        return False
+    try:
+        for collection in ([data_type] if data_type else COLLECTIONS):
+            with _cache_lock, _file_lock(collection):
+                rows = _get_collection(collection)
+                _atomic_write(
+                    _snapshot_path(collection, snapshot_format),
+                    _encode_snapshot(collection, rows.values(), snapshot_format),
+                )
+        return True
+    except Exception as e:
+        logging.error(f"Error exporting {snapshot_format} snapshots: {str(e)}")
+        return False
+
+def _commit_mutation(data_type, entry, apply, expected_generation=None):
+    """
+    Apply a single-record mutation to the cache and persist it.
+
+    The whole read-check-write cycle runs under the collection's exclusive
+    file lock. If ``expected_generation`` is given and the collection changed
+    since the caller read it (e.g. another worker wrote it), nothing is
+    written and ConcurrentModificationError is raised so the caller can retry.
+    """
+    collection = _storage_collection(data_type)
+    try:
+        with _cache_lock, _file_lock(collection):
+            rows = _get_collection(collection)
+            if expected_generation is not None and expected_generation != dataset_generation(collection):
+                raise ConcurrentModificationError(f"{collection} was modified by another writer")
+            if not apply(rows):
+                return False
+            if _journal_enabled():
+                _append_journal(collection, entry)
+            else:
+                _write_snapshot(collection, rows)
+            _collection_state(collection)['generation'] += 1
+        return True
+
+    except ConcurrentModificationError:
+        raise
+    except Exception as e:
+        logging.error(f"Error saving dummy data: {str(e)}")
+        invalidate_cache(collection)
+        return False
+
+def save_record(data_type, record, expected_generation=None):
+    """
+    Insert or replace a single record.
+
+    Only the collection's own files are touched. In journal mode
+    (``JSON_STORAGE_MODE=journal``) this appends one small JSON-lines record
+    to the collection's journal instead of rewriting its snapshot.
+
+    Args:
+        data_type (str): Collection name, or 'medication_logs' for a log
+                         nested in its medication.
+        record (dict): The record to store; must contain an 'id'.
+        expected_generation (tuple, optional): dataset_generation(data_type)
+                         the change was based on, for optimistic concurrency.
+
+    Returns:
+        bool: True if successful, False otherwise.
+
+    Raises:
+        ConcurrentModificationError: If expected_generation is stale.
+    """
+    record = _copy_records([record])[0]
+    entry = {'op': 'put', 'type': data_type, 'record': record}
+    return _commit_mutation(
+        data_type, entry, lambda rows: _apply_put(rows, data_type, record), expected_generation
+    )
+
+def delete_record(data_type, record_id, expected_generation=None, parent_id=None):
+    """
+    Delete a single record by ID.
+
+    Args:
+        data_type (str): Collection name, or 'medication_logs' for a log
+                         nested in its medication.
+        record_id: ID of the record to delete.
+        expected_generation (tuple, optional): dataset_generation(data_type)
+                         the change was based on, for optimistic concurrency.
+        parent_id (optional): For a nested record, the ID of its parent
+                         (e.g. the log's medication_id), to avoid searching.
+
+    Returns:
+        bool: True if successful, False otherwise.
+
+    Raises:
+        ConcurrentModificationError: If expected_generation is stale.
+    """
+    entry = {'op': 'delete', 'type': data_type, 'id': record_id}
+    if parent_id is not None:
+        entry['parent_id'] = parent_id
+    return _commit_mutation(
+        data_type, entry, lambda rows: _apply_delete(rows, data_type, record_id, parent_id), expected_generation
+    )
+
+def dataset_generation(data_type=None):
+    """
+    Return a token that changes every time the cached data is replaced.
+
+    Derived in-memory structures (such as repository indexes) compare it with
+    the value they were built from to know when they must be rebuilt.
+
+    Args:
+        data_type (str, optional): Only report changes affecting this collection.
+
+    Returns:
+        tuple: An opaque, comparable generation token.
+    """
+    data_types = [_storage_collection(data_type)] if data_type else COLLECTIONS
+    with _cache_lock:
+        for collection in data_types:
+            _get_collection(collection)
+        return tuple(_cache[collection]['generation'] for collection in data_types)
+
+def invalidate_cache(data_type=None):
+    """Drop a cached collection (or all of them) so the next read reloads it from disk."""
+    with _cache_lock:
+        for collection in ([data_type] if data_type else list(_cache)):
+            state = _collection_state(collection)
+            state['signature'] = None
+            state['rows'] = None
+
+def load_dummy_data(data_type=None, lazy=False):
+    """
+    Load dummy data from the JSON data store.
+
+    Each collection is parsed once per process, with any journaled writes
+    replayed on top of it, and served from memory until its files change on
+    disk. Loading one collection never reads the others.
+
     Args:
-        data_type (str, optional): Type of data to load ('medications', 'health_metrics', 
-                                 'appointments', or 'reminders'). 
+        data_type (str, optional): Type of data to load ('medications', 'health_metrics',
+                                 'appointments', or 'reminders').
                                  If None, returns all data.
-    
+        lazy (bool): Return LazyRecord copies, whose temporal fields are only
+                     decoded when read, instead of plain dicts. For the
+                     repositories, which materialize the rows they return.
+
     Returns:
         dict or list: The loaded dummy data.
     """
+    # Materializing copies the rows, so the cached ones can be used as they are
+    copy = _copy_records if lazy else (lambda records: [materialize_record(record) for record in records])
     try:
-        file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'dummy_data.json')
-        
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-        
-        # Parse dates and times if needed
-        if data_type == 'medications' or data_type is None:
-            for medication in data['medications']:
-                medication['created_at'] = datetime.fromisoformat(medication['created_at'])
-                medication['updated_at'] = datetime.fromisoformat(medication['updated_at'])
-                for log in medication['logs']:
-                    log['taken_at'] = datetime.fromisoformat(log['taken_at'])
-        
-        if data_type == 'health_metrics' or data_type is None:
-            for metric in data['health_metrics']:
-                metric['recorded_at'] = datetime.fromisoformat(metric['recorded_at'])
-        
-        if data_type == 'appointments' or data_type is None:
-            for appointment in data['appointments']:
-                appointment['date'] = date.fromisoformat(appointment['date'])
-                appointment['time'] = time.fromisoformat(appointment['time'])
-                appointment['created_at'] = datetime.fromisoformat(appointment['created_at'])
-                appointment['updated_at'] = datetime.fromisoformat(appointment['updated_at'])
-        
-        if data_type == 'reminders' or data_type is None:
-            for reminder in data['reminders']:
-                reminder['reminder_time'] = datetime.fromisoformat(reminder['reminder_time'])
-                reminder['created_at'] = datetime.fromisoformat(reminder['created_at'])
-                reminder['updated_at'] = datetime.fromisoformat(reminder['updated_at'])
-        
         if data_type:
             # Ensure we return a list for array data types
-            return list(data[data_type]) if data_type in data else []
+            if data_type not in COLLECTIONS:
+                return []
+            return copy(_get_collection(data_type).values())
         else:
             # Return the whole data dictionary
-            return data
-            
+            return {key: copy(_get_collection(key).values()) for key in COLLECTIONS}
+
     except Exception as e:
         logging.error(f"Error loading dummy data: {str(e)}")
         return [] if data_type else {}
 
-def save_dummy_data(data, data_type=None):
+def save_dummy_data(data, data_type=None, expected_generation=None):
     """
-    Save data to the dummy data JSON file.
-    
+    Save data to the JSON data store.
+
+    The in-memory cache is updated together with the files, so subsequent
+    reads do not need to re-parse them. Saving always rewrites the
+    collection's snapshot, folding in any pending journal records.
+
     Args:
         data (dict or list): The data to save.
-        data_type (str, optional): Type of data to save ('medications', 'health_metrics', 
-                                 'appointments', or 'reminders'). 
+        data_type (str, optional): Type of data to save ('medications', 'health_metrics',
+                                 'appointments', or 'reminders').
                                  If None, assumes data is the complete dataset.
-    
+        expected_generation (tuple, optional): dataset_generation(data_type)
+                                 the data was based on. If another writer has
+                                 changed it since, nothing is written.
+
     Returns:
         bool: True if successful, False otherwise.
+
+    Raises:
+        ConcurrentModificationError: If expected_generation is stale.
     """
+    collections = {data_type: data} if data_type else data
     try:
-        file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'dummy_data.json')
-        
-        # Convert datetime objects to strings
-        if data_type:
-            # Load existing data
-            with open(file_path, 'r') as file:
-                full_data = json.load(file)
-            
-            # Update specific data type
-            full_data[data_type] = _convert_datetime_to_str(data)
-        else:
-            # Full data replacement
-            full_data = _convert_datetime_to_str(data)
-        
-        # Write back to file
-        with open(file_path, 'w') as file:
-            json.dump(full_data, file, indent=2)
-        
+        with _cache_lock:
+            for collection, records in collections.items():
+                with _file_lock(collection):
+                    if expected_generation is not None and data_type and \
+                            expected_generation != dataset_generation(data_type):
+                        raise ConcurrentModificationError(f"{data_type} was modified by another writer")
+                    _write_snapshot(collection, {record['id']: record for record in _copy_records(records)})
+                    _collection_state(collection)['generation'] += 1
+
         return True
-            
+
+    except ConcurrentModificationError:
+        raise
     except Exception as e:
         logging.error(f"Error saving dummy data: {str(e)}")
+        invalidate_cache()
         return False
 
 def _convert_datetime_to_str(data):
     """
     Convert datetime, date, and time objects to strings for JSON serialization.
-    
+
     Args:
         data: The data to convert.
-    
+
     Returns:
         The data with datetime objects converted to strings.
     """
-    if isinstance(data, dict):
+    if isinstance(data, LazyRecord):
+        return data.encoded()
+    elif isinstance(data, dict):
         return {k: _convert_datetime_to_str(v) for k, v in data.items()}
     elif isinstance(data, list):
         return [_convert_datetime_to_str(item) for item in data]
@@ -116,4 +840,4 @@ def _convert_datetime_to_str(data):
     elif isinstance(data, time):
         return data.isoformat()
     else:
-        return data
\ No newline at end of file
+        return data
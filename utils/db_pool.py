@@ -0,0 +1,152 @@
+"""
+Connection pool settings and metrics.
+
+Pool size, overflow, timeout, recycle time and pre-ping come from the
+environment's defaults in config.py and can be overridden with DB_POOL_SIZE,
+DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE and DB_POOL_PRE_PING.
+
+Engines that use a QueuePool get an InstrumentedQueuePool, which times every
+checkout and counts the ones that had to wait for a connection to be
+returned, or timed out doing so. Metrics are per process: under gunicorn,
+each worker has its own pools.
+"""
+import os
+import threading
+from time import perf_counter
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# (engine option, environment variable, type); Flask-SQLAlchemy builds engines
+# with engine_from_config, which coerces pool_timeout to a whole number of seconds
+POOL_SETTINGS = (
+    ('pool_size', 'DB_POOL_SIZE', int),
+    ('max_overflow', 'DB_MAX_OVERFLOW', int),
+    ('pool_timeout', 'DB_POOL_TIMEOUT', int),
+    ('pool_recycle', 'DB_POOL_RECYCLE', int),
+    ('pool_pre_ping', 'DB_POOL_PRE_PING', bool),
+)
+
+# Options that only apply to a QueuePool
+_QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+def _uses_queue_pool(database_url):
+    url = make_url(database_url)
+    if url.get_backend_name() != 'sqlite':
+        return True
+    # In-memory SQLite databases live in a single shared connection
+    return url.database not in (None, '', ':memory:') and url.query.get('mode') != 'memory'
+
+def engine_options(database_url, defaults):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for a database.
+
+    Args:
+        database_url (str): The primary database URL.
+        defaults (dict): The environment's pool settings, keyed by engine option.
+
+    Returns:
+        dict: Engine options; environment variables take precedence over defaults.
+    """
+    options = {}
+    for option, variable, convert in POOL_SETTINGS:
+        value = os.environ.get(variable)
+        if value is None:
+            value = defaults.get(option)
+        elif convert is bool:
+            value = value.lower() in ('true', '1', 'yes')
+        else:
+            value = convert(value)
+        if value is not None:
+            options[option] = value
+
+    if _uses_queue_pool(database_url):
+        options['poolclass'] = InstrumentedQueuePool
+    else:
+        for option in _QUEUE_POOL_OPTIONS:
+            options.pop(option, None)
+    return options
+
+class PoolMetrics:
+    """Checkout counters of one pool, kept across pool re-creation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.checkout_seconds = 0.0
+        self.max_checkout_seconds = 0.0
+
+    def record(self, seconds, waited):
+        with self._lock:
+            self.checkouts += 1
+            self.waits += waited
+            self.checkout_seconds += seconds
+            self.max_checkout_seconds = max(self.max_checkout_seconds, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.waits += 1
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'checkout_ms_total': round(self.checkout_seconds * 1000, 3),
+                'checkout_ms_avg': round(self.checkout_seconds * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                'checkout_ms_max': round(self.max_checkout_seconds * 1000, 3),
+            }
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout latency, waits and timeouts."""
+
+    def __init__(self, creator, pool_size=5, max_overflow=10, **kwargs):
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, **kwargs)
+        self.overflow_limit = max_overflow
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        # No idle connection and no room to open another: the checkout waits
+        waited = self.checkedin() == 0 and -1 < self.overflow_limit <= self.overflow()
+        start = perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            # A timeout always follows a wait
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record(perf_counter() - start, waited)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+def pool_stats(engine):
+    """
+    Return the gauges and counters of an engine's pool.
+
+    Returns:
+        dict: Pool class, size, in-use/idle/overflow gauges and, for
+              instrumented pools, checkout metrics.
+    """
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'max_overflow': getattr(pool, 'overflow_limit', None),
+            'in_use': pool.checkedout(),
+            'idle': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+        })
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+    return stats
@@ -0,0 +1,59 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+def parse_fields(args, schema_class, extra=()):
+    """
+    Read a sparse fieldset (e.g. ?fields=id,name,status) from the request's query arguments.
+
+    Args:
+        args: The request's query arguments.
+        schema_class: The schema the response is serialized with.
+        extra (tuple): Fields the endpoint adds on top of the schema's.
+
+    Returns:
+        tuple: The requested field names, or None to return every field.
+
+    Raises:
+        ValueError: If a requested field does not exist.
+    """
+    fields = args.get('fields')
+    if fields is None:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(',') if name.strip()))
+    if not names:
+        raise ValueError('fields must name at least one field')
+    allowed = set(schema_class._declared_fields) | set(extra)
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+def schema_fields(fields, schema_class):
+    """Return the part of a fieldset the schema itself serializes, for its ``only`` argument."""
+    if fields is None:
+        return None
+    return tuple(name for name in fields if name in schema_class._declared_fields)
+
+def load_fields(query, model, fields, required=()):
+    """
+    Limit the columns a query selects to the ones a fieldset needs.
+
+    Args:
+        query: The query to restrict.
+        model: The model the query returns.
+        fields (tuple): The requested field names, or None for every column.
+        required (tuple): Columns needed besides the requested ones, such as
+                          the sort key a pagination cursor is built from.
+
+    Returns:
+        The query with a load_only option; the primary key is always loaded.
+    """
+    if fields is None:
+        return query
+    mapper = inspect(model)
+    column_names = set(mapper.column_attrs.keys())
+    columns = [getattr(model, name) for name in fields if name in column_names]
+    columns.extend(column for column in required if column.key not in fields)
+    if not columns:
+        columns = [mapper.get_property_by_column(column).class_attribute for column in mapper.primary_key]
+    return query.options(load_only(*columns))
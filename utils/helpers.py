@@ -1,5 +1,10 @@
 from datetime import datetime, date, time
+import logging
 import os
+import threading
+from time import monotonic
+
+from sqlalchemy import event
 
 def parse_date(date_str):
     """
@@ -74,52 +79,226 @@ def is_valid_json_data_source():
     except Exception:
         return False
 
+def _json_repository_override():
+    """
+    Return the USE_JSON_REPOSITORY setting, or None if it is not set.
+    
+    Returns:
+        bool or None: True/False when the environment variable forces a backend.
+    """
+    if 'USE_JSON_REPOSITORY' not in os.environ:
+        return None
+    return os.environ['USE_JSON_REPOSITORY'].lower() == 'true'
+
+def is_database_available():
+    """
+    Check if the database answers a trivial query.
+    
+    Must be called within an application context.
+    
+    Returns:
+        bool: True if the database is reachable, False otherwise.
+    """
+    try:
+        from sqlalchemy import text
+        from database import db
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+        return True
+    except Exception as e:
+        logging.warning(f"Database health check failed: {e}")
+        return False
+
 def should_use_json_repository():
     """
     Determine if the application should use the JSON repository instead of the database.
     
+    This probes the database (and possibly loads the JSON data), so it is
+    only meant for one-off decisions; get_repository uses the cached result
+    held by repository_registry.
+    
     Returns:
         bool: True if the JSON repository should be used, False otherwise.
     """
-    # Check for environment variable that can override the default behavior
-    use_json = os.environ.get('USE_JSON_REPOSITORY', '').lower() == 'true'
-    
     # If the environment variable is set, use its value
-    if 'USE_JSON_REPOSITORY' in os.environ:
-        return use_json
+    override = _json_repository_override()
+    if override is not None:
+        return override
         
     # Otherwise, check if the database is available
-    try:
-        from app import db
-        db.engine.execute('SELECT 1')
-        return False  # Database is available, use it
-    except Exception:
-        # Database is not available, check if the JSON file is valid
-        return is_valid_json_data_source()
+    if is_database_available():
+        return False
+    # Database is not available, check if the JSON file is valid
+    return is_valid_json_data_source()
+
+class RepositoryRegistry:
+    """
+    Resolves which backend serves the repositories once, instead of on every call.
+    
+    The backend is chosen at startup (resolve) and kept until it is reported
+    unhealthy (report_failure), at which point the registry fails over to the
+    JSON repository. The database engine reports its own failures once
+    watched (watch): every lost connection or failed connect fails over. While
+    failed over, the database is re-probed on an
+    exponential backoff timer from within get(), and the registry switches
+    back as soon as it answers. USE_JSON_REPOSITORY pins the backend and
+    disables probing altogether.
+    """
+
+    DATABASE = 'database'
+    JSON = 'json'
+
+    # Seconds between database re-probes while failed over (doubling up to the maximum)
+    INITIAL_BACKOFF = 5.0
+    MAX_BACKOFF = 300.0
+
+    def __init__(self):
+        # Re-entrant: a failing probe reports its own failure while holding it
+        self._lock = threading.RLock()
+        self._backends = {}
+        self.active = None
+        self.pinned = False
+        self._backoff = self.INITIAL_BACKOFF
+        self._next_probe = None
+
+    def _backend(self, name):
+        """Return the repository implementations of a backend, keyed by repository type."""
+        backend = self._backends.get(name)
+        if backend is None:
+            if name == self.JSON:
+                from utils.json_repository import (
+                    JsonMedicationRepository, JsonHealthMetricRepository, JsonAppointmentRepository,
+                    JsonReminderRepository
+                )
+                backend = {
+                    'medication': JsonMedicationRepository,
+                    'health_metric': JsonHealthMetricRepository,
+                    'appointment': JsonAppointmentRepository,
+                    'reminder': JsonReminderRepository,
+                }
+            else:
+                # None tells callers to use the database models directly
+                backend = {
+                    'medication': None,
+                    'health_metric': None,
+                    'appointment': None,
+                    'reminder': None,
+                }
+            self._backends[name] = backend
+        return backend
+
+    def resolve(self):
+        """
+        Choose the backend. Called once at startup, within an application context.
+        
+        Returns:
+            str: The active backend ('database' or 'json').
+        """
+        with self._lock:
+            override = _json_repository_override()
+            self.pinned = override is not None
+            if self.pinned:
+                self.active = self.JSON if override else self.DATABASE
+                self._next_probe = None
+            elif is_database_available() or not is_valid_json_data_source():
+                self.active = self.DATABASE
+                self._next_probe = None
+            else:
+                self.active = self.JSON
+                self._schedule_probe(reset=True)
+            logging.info(f"Repository backend: {self.active}")
+            return self.active
+
+    def _schedule_probe(self, reset=False):
+        if reset:
+            self._backoff = self.INITIAL_BACKOFF
+        self._next_probe = monotonic() + self._backoff
+        self._backoff = min(self._backoff * 2, self.MAX_BACKOFF)
+
+    def report_failure(self, backend=DATABASE):
+        """
+        Report that a backend failed to serve a request, failing over if possible.
+        
+        Args:
+            backend (str): The backend that failed; only database failures
+                           trigger a failover.
+        """
+        with self._lock:
+            if self.pinned or backend != self.DATABASE or self.active != self.DATABASE:
+                return
+            if not is_valid_json_data_source():
+                logging.error("Database failed and no valid JSON data source is available")
+                return
+            logging.warning("Database unhealthy; failing over to the JSON repository")
+            self.active = self.JSON
+            self._schedule_probe(reset=True)
+
+    def watch(self, engine):
+        """
+        Fail over whenever the database engine loses a connection or cannot connect.
+        
+        Other errors (constraint violations, bad SQL, lock timeouts) belong
+        to the statement that raised them and do not affect the backend.
+        
+        Args:
+            engine: The SQLAlchemy engine of the database backend.
+        """
+        event.listen(engine, 'handle_error', self._on_database_error)
+
+    def _on_database_error(self, context):
+        # A connection found dead by the pool's pre-ping is replaced transparently
+        if context.is_pre_ping:
+            return
+        if context.is_disconnect or context.connection is None:
+            self.report_failure(self.DATABASE)
+
+    def _maybe_recover(self):
+        """Re-probe the database if failed over and the backoff timer has expired."""
+        if self._next_probe is None or monotonic() < self._next_probe:
+            return
+        from flask import has_app_context
+        if not has_app_context():
+            return
+        with self._lock:
+            if self._next_probe is None or monotonic() < self._next_probe:
+                return
+            if is_database_available():
+                logging.info("Database healthy again; switching back from the JSON repository")
+                self.active = self.DATABASE
+                self._next_probe = None
+            else:
+                self._schedule_probe()
+
+    def get(self, repository_type):
+        """
+        Get the repository implementation of the active backend.
+        
+        Args:
+            repository_type (str): Type of repository ('medication', 'health_metric', 'appointment', 'reminder').
+            
+        Returns:
+            object: Repository implementation, or None to use the database models directly.
+        """
+        if self.active is None:
+            self.resolve()
+        else:
+            self._maybe_recover()
+        return self._backend(self.active).get(repository_type)
+
+# Process-wide registry used by get_repository
+repository_registry = RepositoryRegistry()
 
 def get_repository(repository_type):
     """
     Get the appropriate repository implementation based on configuration.
     
+    The backend is decided once (see RepositoryRegistry) rather than probed
+    on every call.
+    
     Args:
         repository_type (str): Type of repository ('medication', 'health_metric', 'appointment', 'reminder').
         
     Returns:
         object: Repository implementation.
     """
-    if should_use_json_repository():
-        if repository_type == 'medication':
-            from utils.json_repository import JsonMedicationRepository
-            return JsonMedicationRepository
-        elif repository_type == 'health_metric':
-            from utils.json_repository import JsonHealthMetricRepository
-            return JsonHealthMetricRepository
-        elif repository_type == 'appointment':
-            from utils.json_repository import JsonAppointmentRepository
-            return JsonAppointmentRepository
-        elif repository_type == 'reminder':
-            from utils.json_repository import JsonReminderRepository
-            return JsonReminderRepository
-    else:
-        # Return None to indicate that the database models should be used directly
-        return None
\ No newline at end of file
+    return repository_registry.get(repository_type)
@@ -1,183 +1,502 @@
 import logging
+import threading
+from bisect import bisect_left, bisect_right
 from datetime import datetime, date, time
-from utils.data_loader import load_dummy_data, save_dummy_data
+from utils.data_loader import (
+    load_dummy_data, save_record, delete_record, dataset_generation, write_lock, materialize_record,
+    ConcurrentModificationError
+)
+from utils.metric_series import MetricSeriesStore, series_key, series_store_enabled, series_directory
+from utils.vector_filter import VectorFrame, vector_filtering_enabled
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class _IndexedCollection:
+    """
+    In-memory, indexed view of one collection of the JSON data store.
+
+    Rows are kept in an id-keyed dict (insertion ordered, so the file order is
+    preserved), every field listed in ``indexed_fields`` gets a dict index from
+    value to the ids holding it, and new IDs come from a monotonic counter.
+    The fields listed in ``vector_columns`` can also be filtered with NumPy
+    (see utils.vector_filter). The view is rebuilt whenever the underlying
+    dataset is reloaded from disk.
+    """
+
+    def __init__(self, data_type, indexed_fields=(), vector_columns=None):
+        self.data_type = data_type
+        self.indexed_fields = tuple(indexed_fields)
+        self.vector_columns = vector_columns or {}
+        self.lock = threading.RLock()
+        self._generation = None
+        self.rows = {}
+        self.indexes = {}
+        self.next_id = 1
+        self._sorted_keys = {}
+        self._frame = None
+
+    def refresh(self):
+        """Rebuild the indexes if the dataset changed since they were built."""
+        generation = dataset_generation(self.data_type)
+        if generation != self._generation:
+            self._rebuild(load_dummy_data(self.data_type, lazy=True))
+            self._generation = generation
+
+    def _rebuild(self, rows):
+        self.rows = {row['id']: row for row in rows}
+        self.indexes = {field: {} for field in self.indexed_fields}
+        self._sorted_keys = {}
+        self._frame = None
+        for row in rows:
+            self._index(row)
+        self.next_id = max(self.rows, default=0) + 1
+
+    def _index(self, row):
+        self._frame = None
+        for field in self.indexed_fields:
+            index = self.indexes[field]
+            value = row.get(field)
+            if value not in index:
+                self._sorted_keys.pop(field, None)
+            index.setdefault(value, {})[row['id']] = row
+
+    def _unindex(self, row):
+        self._frame = None
+        for field in self.indexed_fields:
+            index = self.indexes[field]
+            value = row.get(field)
+            bucket = index.get(value)
+            if bucket is None:
+                continue
+            bucket.pop(row['id'], None)
+            if not bucket:
+                del index[value]
+                self._sorted_keys.pop(field, None)
+
+    def allocate_id(self):
+        """Reserve and return the next row ID."""
+        new_id = self.next_id
+        self.next_id += 1
+        return new_id
+
+    def get(self, row_id):
+        """Return the stored row with the given ID, or None."""
+        return self.rows.get(row_id)
+
+    def find(self, field, value):
+        """Return the rows whose indexed ``field`` equals ``value``."""
+        return list(self.indexes[field].get(value, {}).values())
+
+    def find_range(self, field, low=None, high=None):
+        """Return the rows whose indexed ``field`` lies within [low, high]."""
+        keys = self._sorted_keys.get(field)
+        if keys is None:
+            keys = sorted(k for k in self.indexes[field] if k is not None)
+            self._sorted_keys[field] = keys
+        start = bisect_left(keys, low) if low is not None else 0
+        end = bisect_right(keys, high) if high is not None else len(keys)
+        index = self.indexes[field]
+        return [row for key in keys[start:end] for row in index[key].values()]
+
+    def vector_frame(self):
+        """
+        Return the NumPy columns of the collection, or None when it should be filtered in Python.
+
+        The frame is built on first use and dropped whenever a row changes.
+        """
+        if not self.vector_columns or not vector_filtering_enabled(len(self.rows)):
+            return None
+        if self._frame is None:
+            try:
+                self._frame = VectorFrame(self.rows.values(), self.vector_columns)
+            except (TypeError, ValueError) as e:
+                # Remembered as False so the build is not retried until a row changes
+                logger.debug(f"Not filtering {self.data_type} with NumPy: {e}")
+                self._frame = False
+        return self._frame or None
+
+    def insert(self, row):
+        self.rows[row['id']] = row
+        self._index(row)
+        self.next_id = max(self.next_id, row['id'] + 1)
+
+    def update(self, row, changes):
+        """Apply ``changes`` to a stored row, keeping the indexes in sync."""
+        self._unindex(row)
+        row.update(changes)
+        self._index(row)
+
+    def remove(self, row_id):
+        row = self.rows.pop(row_id, None)
+        if row is not None:
+            self._unindex(row)
+        return row
+
+    def transact(self, operation):
+        """
+        Run a read-modify-write ``operation`` against an up-to-date view.
+
+        The operation first runs optimistically: its commits are checked
+        against the generation the view was built from. If another writer
+        changed the collection in the meantime, the view is rebuilt and the
+        operation retried while holding the store's exclusive write lock.
+        """
+        with self.lock:
+            self.refresh()
+            try:
+                return operation()
+            except ConcurrentModificationError:
+                self._generation = None
+
+            with write_lock(self.data_type):
+                self.refresh()
+                return operation()
+
+    def _persist(self, save, *args):
+        # The new generation must be read under the same lock as the write,
+        # otherwise a concurrent writer's change could be folded into it.
+        with write_lock(self.data_type):
+            try:
+                saved = save(*args, expected_generation=self._generation)
+            except ConcurrentModificationError:
+                self._generation = None
+                raise
+            # On failure the in-memory view is discarded so it is rebuilt from
+            # the data store on next access.
+            self._generation = dataset_generation(self.data_type) if saved else None
+        return saved
+
+    def commit(self, row):
+        """Persist a new or changed row."""
+        return self._persist(save_record, self.data_type, row)
+
+    def commit_delete(self, row_id):
+        """Persist the removal of a row."""
+        return self._persist(delete_record, self.data_type, row_id)
+
+class _MedicationCollection(_IndexedCollection):
+    """Medications plus an index of their nested logs by ``medication_id``."""
+
+    def __init__(self):
+        super().__init__('medications')
+        self.logs_by_medication = {}
+        self.next_log_id = 1
+
+    def _rebuild(self, rows):
+        super()._rebuild(rows)
+        self.logs_by_medication = {
+            row['id']: {log['id']: log for log in row.get('logs', [])} for row in rows
+        }
+        self.next_log_id = max(
+            (log_id for logs in self.logs_by_medication.values() for log_id in logs), default=0
+        ) + 1
+
+    def insert(self, row):
+        super().insert(row)
+        self.logs_by_medication[row['id']] = {log['id']: log for log in row.get('logs', [])}
+
+    def remove(self, row_id):
+        self.logs_by_medication.pop(row_id, None)
+        return super().remove(row_id)
+
+    def allocate_log_id(self):
+        """Reserve and return the next medication log ID."""
+        new_id = self.next_log_id
+        self.next_log_id += 1
+        return new_id
+
+    def add_log(self, medication, log):
+        medication['logs'].append(log)
+        self.logs_by_medication.setdefault(medication['id'], {})[log['id']] = log
+
+    def commit_log(self, log):
+        """Persist a new or changed medication log."""
+        return self._persist(save_record, 'medication_logs', log)
+
+class _HealthMetricCollection(_IndexedCollection):
+    """
+    Health metrics plus their columnar time series (see utils.metric_series).
+
+    Changed series are only rewritten when next queried, so a burst of writes
+    costs one rewrite per affected (user, metric type).
+    """
+
+    def __init__(self):
+        super().__init__(
+            'health_metrics', indexed_fields=('metric_type',),
+            vector_columns={'metric_type': 'category', 'recorded_at': 'datetime'},
+        )
+        self.series = None
+        self._series_stale = True
+        self._dirty_series = set()
+
+    def _rebuild(self, rows):
+        super()._rebuild(rows)
+        self._series_stale = True
+
+    def insert(self, row):
+        super().insert(row)
+        self._dirty_series.add(series_key(row))
+
+    def update(self, row, changes):
+        self._dirty_series.add(series_key(row))
+        super().update(row, changes)
+        self._dirty_series.add(series_key(row))
+
+    def remove(self, row_id):
+        row = super().remove(row_id)
+        if row is not None:
+            self._dirty_series.add(series_key(row))
+        return row
+
+    def find_series(self, metric_type=None, user_id=None):
+        """Return the up-to-date series matching a metric type and/or user."""
+        directory = series_directory() if series_store_enabled() else None
+        if self.series is None or self.series.directory != directory:
+            self.series = MetricSeriesStore(directory)
+            self._series_stale = True
+        if self._series_stale:
+            self.series.rebuild(self.rows.values())
+            self._series_stale = False
+        else:
+            for key in self._dirty_series:
+                key_user, key_type = key
+                rows = [row for row in self.find('metric_type', key_type) if row.get('user_id') == key_user]
+                self.series.write(key, rows)
+        self._dirty_series.clear()
+        return self.series.find(metric_type, user_id)
+
+    def rows_in_range(self, metric_type=None, from_date=None, to_date=None):
+        """Return the rows recorded within [from_date, to_date], newest first."""
+        ranges = [series.range(from_date, to_date) for series in self.find_series(metric_type)]
+        rows = [self.rows[row_id] for series in ranges for row_id in reversed(series.id)]
+        if len(ranges) > 1:
+            rows.sort(key=lambda row: (row['recorded_at'], -row['id']), reverse=True)
+        return rows
+
+_medications = _MedicationCollection()
+_health_metrics = _HealthMetricCollection()
+_appointments = _IndexedCollection(
+    'appointments', indexed_fields=('status', 'date'),
+    vector_columns={'status': 'category', 'date': 'date', 'time': 'time'},
+)
+_reminders = _IndexedCollection(
+    'reminders',
+    vector_columns={'reminder_type': 'category', 'is_active': 'category', 'reminder_time': 'datetime'},
+)
+
 class JsonMedicationRepository:
     """Repository for medications using JSON file as data store."""
-    
+
     @staticmethod
     def get_all():
         """Get all medications."""
-        medications = load_dummy_data('medications')
-        # Ensure we're working with a list
-        return list(medications) if medications else []
-    
+        with _medications.lock:
+            _medications.refresh()
+            return [materialize_record(med) for med in _medications.rows.values()]
+
     @staticmethod
     def get_by_id(medication_id):
         """Get a medication by ID."""
-        medications = load_dummy_data('medications')
-        for med in medications:
-            if med['id'] == medication_id:
-                return med
-        return None
-    
+        with _medications.lock:
+            _medications.refresh()
+            med = _medications.get(medication_id)
+            return materialize_record(med) if med else None
+
     @staticmethod
     def create(medication_data):
         """Create a new medication."""
-        medications = list(load_dummy_data('medications'))
-        
-        # Generate new ID
-        new_id = max([m['id'] for m in medications], default=0) + 1
-        
-        # Create new medication
-        new_medication = {
-            'id': new_id,
-            'name': medication_data.get('name'),
-            'dosage': medication_data.get('dosage'),
-            'frequency': medication_data.get('frequency'),
-            'intake_time': medication_data.get('intake_time'),
-            'special_instructions': medication_data.get('special_instructions'),
-            'created_at': datetime.utcnow(),
-            'updated_at': datetime.utcnow(),
-            'logs': []
-        }
-        
-        # Add to the list of medications
-        medications.append(new_medication)
-        save_dummy_data(medications, 'medications')
-        
-        return new_medication
-    
+        def apply():
+            # Create new medication
+            new_medication = {
+                'id': _medications.allocate_id(),
+                'name': medication_data.get('name'),
+                'dosage': medication_data.get('dosage'),
+                'frequency': medication_data.get('frequency'),
+                'intake_time': medication_data.get('intake_time'),
+                'special_instructions': medication_data.get('special_instructions'),
+                'created_at': datetime.utcnow(),
+                'updated_at': datetime.utcnow(),
+                'logs': []
+            }
+
+            # Add to the list of medications
+            _medications.insert(new_medication)
+            _medications.commit(new_medication)
+
+            return materialize_record(new_medication)
+
+        return _medications.transact(apply)
+
     @staticmethod
     def update(medication_id, medication_data):
         """Update an existing medication."""
-        medications = list(load_dummy_data('medications'))
-        
-        for i, med in enumerate(medications):
-            if med['id'] == medication_id:
-                # Update fields
-                if 'name' in medication_data:
-                    med['name'] = medication_data['name']
-                if 'dosage' in medication_data:
-                    med['dosage'] = medication_data['dosage']
-                if 'frequency' in medication_data:
-                    med['frequency'] = medication_data['frequency']
-                if 'intake_time' in medication_data:
-                    med['intake_time'] = medication_data['intake_time']
-                if 'special_instructions' in medication_data:
-                    med['special_instructions'] = medication_data['special_instructions']
-                
-                med['updated_at'] = datetime.utcnow()
-                
-                save_dummy_data(medications, 'medications')
-                return med
-                
-        return None
-    
+        def apply():
+            med = _medications.get(medication_id)
+            if not med:
+                return None
+
+            # Update fields
+            changes = {
+                field: medication_data[field]
+                for field in ('name', 'dosage', 'frequency', 'intake_time', 'special_instructions')
+                if field in medication_data
+            }
+            changes['updated_at'] = datetime.utcnow()
+            _medications.update(med, changes)
+
+            _medications.commit(med)
+            return materialize_record(med)
+
+        return _medications.transact(apply)
+
     @staticmethod
     def delete(medication_id):
         """Delete a medication."""
-        medications = list(load_dummy_data('medications'))
-        
-        for i, med in enumerate(medications):
-            if med['id'] == medication_id:
-                del medications[i]
-                save_dummy_data(medications, 'medications')
-                return True
-                
-        return False
-    
+        def apply():
+            if _medications.remove(medication_id) is None:
+                return False
+
+            _medications.commit_delete(medication_id)
+            return True
+
+        return _medications.transact(apply)
+
     @staticmethod
     def add_log(medication_id, log_data):
         """Add a medication log."""
-        medications = list(load_dummy_data('medications'))
-        
-        for med in medications:
-            if med['id'] == medication_id:
-                # Find all logs to generate a new ID
-                all_logs = []
-                for m in medications:
-                    all_logs.extend(m['logs'])
-                
-                new_log_id = max([log['id'] for log in all_logs], default=0) + 1
-                
-                # Create new log
-                new_log = {
-                    'id': new_log_id,
-                    'medication_id': medication_id,
-                    'status': log_data.get('status', 'taken'),
-                    'notes': log_data.get('notes'),
-                    'taken_at': log_data.get('taken_at', datetime.utcnow())
-                }
-                
-                med['logs'].append(new_log)
-                save_dummy_data(medications, 'medications')
-                
-                return new_log
-                
-        return None
+        def apply():
+            med = _medications.get(medication_id)
+            if not med:
+                return None
+
+            # Create new log
+            new_log = {
+                'id': _medications.allocate_log_id(),
+                'medication_id': medication_id,
+                'status': log_data.get('status', 'taken'),
+                'notes': log_data.get('notes'),
+                'taken_at': log_data.get('taken_at', datetime.utcnow())
+            }
+
+            _medications.add_log(med, new_log)
+            _medications.commit_log(new_log)
+
+            return dict(new_log)
+
+        return _medications.transact(apply)
 
 class JsonHealthMetricRepository:
     """Repository for health metrics using JSON file as data store."""
-    
+
     @staticmethod
     def get_all(filters=None):
         """
         Get all health metrics with optional filtering.
-        
+
         Args:
             filters (dict, optional): Filters to apply (metric_type, from_date, to_date).
         """
-        metrics = list(load_dummy_data('health_metrics'))
-        
-        if not filters:
-            return metrics
-            
-        filtered_metrics = metrics
-        
-        # Apply filters
-        if 'metric_type' in filters and filters['metric_type']:
-            filtered_metrics = [m for m in filtered_metrics if m['metric_type'] == filters['metric_type']]
-            
-        if 'from_date' in filters and filters['from_date']:
-            from_date = filters['from_date']
-            if isinstance(from_date, str):
-                from_date = datetime.strptime(from_date, '%Y-%m-%d')
+        with _health_metrics.lock:
+            _health_metrics.refresh()
+
+            if not filters:
+                return [materialize_record(m) for m in _health_metrics.rows.values()]
+
+            from_date, to_date = JsonHealthMetricRepository._date_range(filters)
+            if series_store_enabled() and (from_date or to_date):
+                # Find the range in the memory-mapped series instead of scanning every row
+                rows = _health_metrics.rows_in_range(filters.get('metric_type') or None, from_date, to_date)
+                return [materialize_record(m) for m in rows]
+
+            frame = _health_metrics.vector_frame()
+            if frame is not None:
+                rows = JsonHealthMetricRepository._vector_filter(frame, filters, from_date, to_date)
+                if rows is not None:
+                    return [materialize_record(m) for m in rows]
+
+            # Apply filters, starting from the metric_type index when possible
+            if 'metric_type' in filters and filters['metric_type']:
+                filtered_metrics = _health_metrics.find('metric_type', filters['metric_type'])
+            else:
+                filtered_metrics = list(_health_metrics.rows.values())
+            filtered_metrics = [materialize_record(m) for m in filtered_metrics]
+
+        if from_date:
             filtered_metrics = [m for m in filtered_metrics if m['recorded_at'] >= from_date]
-            
-        if 'to_date' in filters and filters['to_date']:
-            to_date = filters['to_date']
-            if isinstance(to_date, str):
-                to_date = datetime.strptime(to_date, '%Y-%m-%d')
-                to_date = datetime.combine(to_date.date(), datetime.max.time())
+
+        if to_date:
             filtered_metrics = [m for m in filtered_metrics if m['recorded_at'] <= to_date]
-            
+
         # Sort by recorded_at in descending order
         filtered_metrics.sort(key=lambda x: x['recorded_at'], reverse=True)
-        
+
         return filtered_metrics
-    
+
+    @staticmethod
+    def _vector_filter(frame, filters, from_date, to_date):
+        """Apply the filters as NumPy masks; returns None if they must be applied in Python."""
+        try:
+            mask = frame.all()
+            if filters.get('metric_type'):
+                mask &= frame.equals('metric_type', filters['metric_type'])
+            if from_date:
+                mask &= frame.at_least('recorded_at', from_date)
+            if to_date:
+                mask &= frame.at_most('recorded_at', to_date)
+            return frame.select(mask, ('recorded_at',), descending=True)
+        except TypeError:
+            return None
+
+    @staticmethod
+    def _date_range(filters):
+        """Return the (from_date, to_date) datetimes of the filters; either may be None."""
+        from_date = filters.get('from_date') or None
+        if isinstance(from_date, str):
+            from_date = datetime.strptime(from_date, '%Y-%m-%d')
+
+        to_date = filters.get('to_date') or None
+        if isinstance(to_date, str):
+            to_date = datetime.strptime(to_date, '%Y-%m-%d')
+            to_date = datetime.combine(to_date.date(), datetime.max.time())
+        return from_date, to_date
+
+    @staticmethod
+    def get_series(metric_type, from_date=None, to_date=None):
+        """
+        Get the time series of a metric type for charting.
+
+        The readings are returned as columns rather than rows: with
+        JSON_METRIC_SERIES=true they are views of memory-mapped files, sliced
+        to the requested range without copying.
+
+        Args:
+            metric_type (str): The metric type, e.g. 'blood_pressure'.
+            from_date (datetime, optional): Inclusive start of the range.
+            to_date (datetime, optional): Inclusive end of the range.
+
+        Returns:
+            list: One MetricSeries per user with readings of this type, each
+                  with recorded_at (epoch microseconds), id, value, systolic
+                  and diastolic columns sorted by recorded_at.
+        """
+        with _health_metrics.lock:
+            _health_metrics.refresh()
+            return [series.range(from_date, to_date) for series in _health_metrics.find_series(metric_type)]
+
     @staticmethod
     def get_by_id(metric_id):
         """Get a health metric by ID."""
-        metrics = load_dummy_data('health_metrics')
-        for metric in metrics:
-            if metric['id'] == metric_id:
-                return metric
-        return None
-    
+        with _health_metrics.lock:
+            _health_metrics.refresh()
+            metric = _health_metrics.get(metric_id)
+            return materialize_record(metric) if metric else None
+
     @staticmethod
     def create(metric_data):
         """Create a new health metric."""
-        metrics = list(load_dummy_data('health_metrics'))
-        
-        # Generate new ID
-        new_id = max([m['id'] for m in metrics], default=0) + 1
-        
         # Handle blood pressure special case
         if metric_data.get('metric_type') == 'blood_pressure':
             systolic = metric_data.get('systolic')
@@ -187,347 +506,394 @@ class JsonHealthMetricRepository:
             systolic = None
             diastolic = None
             value = metric_data.get('value')
-            
-        # Create new metric
-        new_metric = {
-            'id': new_id,
-            'metric_type': metric_data.get('metric_type'),
-            'value': value,
-            'unit': metric_data.get('unit'),
-            'notes': metric_data.get('notes'),
-            'systolic': systolic,
-            'diastolic': diastolic,
-            'recorded_at': metric_data.get('recorded_at', datetime.utcnow())
-        }
-        
-        metrics.append(new_metric)
-        save_dummy_data(metrics, 'health_metrics')
-        
-        return new_metric
-    
+
+        def apply():
+            # Create new metric
+            new_metric = {
+                'id': _health_metrics.allocate_id(),
+                'metric_type': metric_data.get('metric_type'),
+                'value': value,
+                'unit': metric_data.get('unit'),
+                'notes': metric_data.get('notes'),
+                'systolic': systolic,
+                'diastolic': diastolic,
+                'recorded_at': metric_data.get('recorded_at', datetime.utcnow())
+            }
+
+            _health_metrics.insert(new_metric)
+            _health_metrics.commit(new_metric)
+
+            return materialize_record(new_metric)
+
+        return _health_metrics.transact(apply)
+
     @staticmethod
     def update(metric_id, metric_data):
         """Update an existing health metric."""
-        metrics = list(load_dummy_data('health_metrics'))
-        
-        for i, metric in enumerate(metrics):
-            if metric['id'] == metric_id:
-                # Handle blood pressure special case
-                if metric['metric_type'] == 'blood_pressure':
-                    if 'systolic' in metric_data:
-                        metric['systolic'] = metric_data['systolic']
-                        # Update the primary value as well for graphing consistency
-                        metric['value'] = metric_data['systolic']
-                    if 'diastolic' in metric_data:
-                        metric['diastolic'] = metric_data['diastolic']
-                elif 'value' in metric_data:
-                    metric['value'] = metric_data['value']
-                
-                # Update other fields
-                if 'unit' in metric_data:
-                    metric['unit'] = metric_data['unit']
-                if 'notes' in metric_data:
-                    metric['notes'] = metric_data['notes']
-                
-                save_dummy_data(metrics, 'health_metrics')
-                return metric
-                
-        return None
-    
+        def apply():
+            metric = _health_metrics.get(metric_id)
+            if not metric:
+                return None
+
+            changes = {}
+            # Handle blood pressure special case
+            if metric['metric_type'] == 'blood_pressure':
+                if 'systolic' in metric_data:
+                    changes['systolic'] = metric_data['systolic']
+                    # Update the primary value as well for graphing consistency
+                    changes['value'] = metric_data['systolic']
+                if 'diastolic' in metric_data:
+                    changes['diastolic'] = metric_data['diastolic']
+            elif 'value' in metric_data:
+                changes['value'] = metric_data['value']
+
+            # Update other fields
+            if 'unit' in metric_data:
+                changes['unit'] = metric_data['unit']
+            if 'notes' in metric_data:
+                changes['notes'] = metric_data['notes']
+
+            _health_metrics.update(metric, changes)
+            _health_metrics.commit(metric)
+            return materialize_record(metric)
+
+        return _health_metrics.transact(apply)
+
     @staticmethod
     def delete(metric_id):
         """Delete a health metric."""
-        metrics = list(load_dummy_data('health_metrics'))
-        
-        for i, metric in enumerate(metrics):
-            if metric['id'] == metric_id:
-                del metrics[i]
-                save_dummy_data(metrics, 'health_metrics')
-                return True
-                
-        return False
+        def apply():
+            if _health_metrics.remove(metric_id) is None:
+                return False
+
+            _health_metrics.commit_delete(metric_id)
+            return True
+
+        return _health_metrics.transact(apply)
 
 class JsonAppointmentRepository:
     """Repository for appointments using JSON file as data store."""
-    
+
     @staticmethod
     def get_all(filters=None):
         """
         Get all appointments with optional filtering.
-        
+
         Args:
             filters (dict, optional): Filters to apply (status, from_date, to_date).
         """
-        appointments = list(load_dummy_data('appointments'))
-        
-        if not filters:
-            return appointments
-            
-        filtered_appointments = appointments
-        
-        # Apply filters
-        if 'status' in filters and filters['status']:
-            filtered_appointments = [a for a in filtered_appointments if a['status'] == filters['status']]
-            
-        if 'from_date' in filters and filters['from_date']:
-            from_date = filters['from_date']
-            if isinstance(from_date, str):
-                from_date = datetime.strptime(from_date, '%Y-%m-%d').date()
-            filtered_appointments = [a for a in filtered_appointments if a['date'] >= from_date]
-            
-        if 'to_date' in filters and filters['to_date']:
-            to_date = filters['to_date']
-            if isinstance(to_date, str):
-                to_date = datetime.strptime(to_date, '%Y-%m-%d').date()
-            filtered_appointments = [a for a in filtered_appointments if a['date'] <= to_date]
-            
+        from_date = filters.get('from_date') if filters else None
+        if isinstance(from_date, str):
+            from_date = datetime.strptime(from_date, '%Y-%m-%d').date()
+        to_date = filters.get('to_date') if filters else None
+        if isinstance(to_date, str):
+            to_date = datetime.strptime(to_date, '%Y-%m-%d').date()
+
+        with _appointments.lock:
+            _appointments.refresh()
+
+            if not filters:
+                return [materialize_record(a) for a in _appointments.rows.values()]
+
+            frame = _appointments.vector_frame()
+            if frame is not None:
+                rows = JsonAppointmentRepository._vector_filter(frame, filters, from_date, to_date)
+                if rows is not None:
+                    return [materialize_record(a) for a in rows]
+
+            # Use the status index for equality and the date index for ranges
+            if 'status' in filters and filters['status']:
+                filtered_appointments = _appointments.find('status', filters['status'])
+                if from_date:
+                    filtered_appointments = [a for a in filtered_appointments if a['date'] >= from_date]
+                if to_date:
+                    filtered_appointments = [a for a in filtered_appointments if a['date'] <= to_date]
+            elif from_date or to_date:
+                filtered_appointments = _appointments.find_range('date', from_date, to_date)
+            else:
+                filtered_appointments = list(_appointments.rows.values())
+            filtered_appointments = [materialize_record(a) for a in filtered_appointments]
+
         # Sort by date and time
         filtered_appointments.sort(key=lambda x: (x['date'], x['time']))
-        
+
         return filtered_appointments
-    
+
+    @staticmethod
+    def _vector_filter(frame, filters, from_date, to_date):
+        """Apply the filters as NumPy masks; returns None if they must be applied in Python."""
+        try:
+            mask = frame.all()
+            if filters.get('status'):
+                mask &= frame.equals('status', filters['status'])
+            if from_date:
+                mask &= frame.at_least('date', from_date)
+            if to_date:
+                mask &= frame.at_most('date', to_date)
+            return frame.select(mask, ('date', 'time'))
+        except TypeError:
+            return None
+
     @staticmethod
     def get_by_id(appointment_id):
         """Get an appointment by ID."""
-        appointments = load_dummy_data('appointments')
-        for appointment in appointments:
-            if appointment['id'] == appointment_id:
-                return appointment
-        return None
-    
+        with _appointments.lock:
+            _appointments.refresh()
+            appointment = _appointments.get(appointment_id)
+            return materialize_record(appointment) if appointment else None
+
     @staticmethod
     def create(appointment_data):
         """Create a new appointment."""
-        appointments = list(load_dummy_data('appointments'))
-        
-        # Generate new ID
-        new_id = max([a['id'] for a in appointments], default=0) + 1
-        
         # Handle date and time conversion
         appt_date = appointment_data.get('date')
         if isinstance(appt_date, str):
             appt_date = date.fromisoformat(appt_date)
-            
+
         appt_time = appointment_data.get('time')
         if isinstance(appt_time, str):
             appt_time = time.fromisoformat(appt_time)
-        
-        # Create new appointment
-        new_appointment = {
-            'id': new_id,
-            'title': appointment_data.get('title'),
-            'doctor_name': appointment_data.get('doctor_name'),
-            'hospital_name': appointment_data.get('hospital_name'),
-            'date': appt_date,
-            'time': appt_time,
-            'location': appointment_data.get('location'),
-            'notes': appointment_data.get('notes'),
-            'status': appointment_data.get('status', 'scheduled'),
-            'created_at': datetime.utcnow(),
-            'updated_at': datetime.utcnow()
-        }
-        
-        appointments.append(new_appointment)
-        save_dummy_data(appointments, 'appointments')
-        
-        return new_appointment
-    
+
+        def apply():
+            # Create new appointment
+            new_appointment = {
+                'id': _appointments.allocate_id(),
+                'title': appointment_data.get('title'),
+                'doctor_name': appointment_data.get('doctor_name'),
+                'hospital_name': appointment_data.get('hospital_name'),
+                'date': appt_date,
+                'time': appt_time,
+                'location': appointment_data.get('location'),
+                'notes': appointment_data.get('notes'),
+                'status': appointment_data.get('status', 'scheduled'),
+                'created_at': datetime.utcnow(),
+                'updated_at': datetime.utcnow()
+            }
+
+            _appointments.insert(new_appointment)
+            _appointments.commit(new_appointment)
+
+            return materialize_record(new_appointment)
+
+        return _appointments.transact(apply)
+
     @staticmethod
     def update(appointment_id, appointment_data):
         """Update an existing appointment."""
-        appointments = list(load_dummy_data('appointments'))
-        
-        for i, appointment in enumerate(appointments):
-            if appointment['id'] == appointment_id:
-                # Handle date and time conversion
-                if 'date' in appointment_data:
-                    appt_date = appointment_data['date']
-                    if isinstance(appt_date, str):
-                        appt_date = date.fromisoformat(appt_date)
-                    appointment['date'] = appt_date
-                    
-                if 'time' in appointment_data:
-                    appt_time = appointment_data['time']
-                    if isinstance(appt_time, str):
-                        appt_time = time.fromisoformat(appt_time)
-                    appointment['time'] = appt_time
-                
-                # Update other fields
-                if 'title' in appointment_data:
-                    appointment['title'] = appointment_data['title']
-                if 'doctor_name' in appointment_data:
-                    appointment['doctor_name'] = appointment_data['doctor_name']
-                if 'hospital_name' in appointment_data:
-                    appointment['hospital_name'] = appointment_data['hospital_name']
-                if 'location' in appointment_data:
-                    appointment['location'] = appointment_data['location']
-                if 'notes' in appointment_data:
-                    appointment['notes'] = appointment_data['notes']
-                
-                appointment['updated_at'] = datetime.utcnow()
-                
-                save_dummy_data(appointments, 'appointments')
-                return appointment
-                
-        return None
-    
+        changes = {}
+        # Handle date and time conversion
+        if 'date' in appointment_data:
+            appt_date = appointment_data['date']
+            if isinstance(appt_date, str):
+                appt_date = date.fromisoformat(appt_date)
+            changes['date'] = appt_date
+
+        if 'time' in appointment_data:
+            appt_time = appointment_data['time']
+            if isinstance(appt_time, str):
+                appt_time = time.fromisoformat(appt_time)
+            changes['time'] = appt_time
+
+        # Update other fields
+        for field in ('title', 'doctor_name', 'hospital_name', 'location', 'notes'):
+            if field in appointment_data:
+                changes[field] = appointment_data[field]
+
+        changes['updated_at'] = datetime.utcnow()
+
+        def apply():
+            appointment = _appointments.get(appointment_id)
+            if not appointment:
+                return None
+
+            _appointments.update(appointment, changes)
+            _appointments.commit(appointment)
+            return materialize_record(appointment)
+
+        return _appointments.transact(apply)
+
     @staticmethod
     def update_status(appointment_id, status):
         """Update an appointment's status."""
-        appointments = list(load_dummy_data('appointments'))
-        
-        for appointment in appointments:
-            if appointment['id'] == appointment_id:
-                appointment['status'] = status
-                appointment['updated_at'] = datetime.utcnow()
-                
-                save_dummy_data(appointments, 'appointments')
-                return appointment
-                
-        return None
-    
+        def apply():
+            appointment = _appointments.get(appointment_id)
+            if not appointment:
+                return None
+
+            _appointments.update(appointment, {'status': status, 'updated_at': datetime.utcnow()})
+            _appointments.commit(appointment)
+            return materialize_record(appointment)
+
+        return _appointments.transact(apply)
+
     @staticmethod
     def delete(appointment_id):
         """Delete an appointment."""
-        appointments = list(load_dummy_data('appointments'))
-        
-        for i, appointment in enumerate(appointments):
-            if appointment['id'] == appointment_id:
-                del appointments[i]
-                save_dummy_data(appointments, 'appointments')
-                return True
-                
-        return False
+        def apply():
+            if _appointments.remove(appointment_id) is None:
+                return False
+
+            _appointments.commit_delete(appointment_id)
+            return True
+
+        return _appointments.transact(apply)
 
 class JsonReminderRepository:
     """Repository for reminders using JSON file as data store."""
-    
+
     @staticmethod
     def get_all(filters=None):
         """
         Get all reminders with optional filtering.
-        
+
         Args:
             filters (dict, optional): Filters to apply (reminder_type, is_active, from_time, to_time).
         """
-        reminders = list(load_dummy_data('reminders'))
-        
+        with _reminders.lock:
+            _reminders.refresh()
+
+            if filters:
+                frame = _reminders.vector_frame()
+                rows = JsonReminderRepository._vector_filter(frame, filters) if frame is not None else None
+                if rows is not None:
+                    return [materialize_record(r) for r in rows]
+
+            reminders = [materialize_record(r) for r in _reminders.rows.values()]
+
         if not filters:
             return reminders
-            
+
         filtered_reminders = reminders
-        
+
         # Apply filters
         if 'reminder_type' in filters and filters['reminder_type']:
             filtered_reminders = [r for r in filtered_reminders if r['reminder_type'] == filters['reminder_type']]
-            
+
         if 'is_active' in filters and filters['is_active'] is not None:
             is_active_bool = filters['is_active']
             if isinstance(is_active_bool, str):
                 is_active_bool = is_active_bool.lower() == 'true'
             filtered_reminders = [r for r in filtered_reminders if r['is_active'] == is_active_bool]
-            
+
         if 'from_time' in filters and filters['from_time']:
             from_time = filters['from_time']
             if isinstance(from_time, str):
                 from_time = datetime.fromisoformat(from_time)
             filtered_reminders = [r for r in filtered_reminders if r['reminder_time'] >= from_time]
-            
+
         if 'to_time' in filters and filters['to_time']:
             to_time = filters['to_time']
             if isinstance(to_time, str):
                 to_time = datetime.fromisoformat(to_time)
             filtered_reminders = [r for r in filtered_reminders if r['reminder_time'] <= to_time]
-            
+
         # Sort by reminder_time
         filtered_reminders.sort(key=lambda x: x['reminder_time'])
-        
+
         return filtered_reminders
-    
+
+    @staticmethod
+    def _vector_filter(frame, filters):
+        """Apply the filters as NumPy masks; returns None if they must be applied in Python."""
+        try:
+            mask = frame.all()
+            if filters.get('reminder_type'):
+                mask &= frame.equals('reminder_type', filters['reminder_type'])
+            if filters.get('is_active') is not None:
+                is_active_bool = filters['is_active']
+                if isinstance(is_active_bool, str):
+                    is_active_bool = is_active_bool.lower() == 'true'
+                mask &= frame.equals('is_active', is_active_bool)
+            if filters.get('from_time'):
+                from_time = filters['from_time']
+                if isinstance(from_time, str):
+                    from_time = datetime.fromisoformat(from_time)
+                mask &= frame.at_least('reminder_time', from_time)
+            if filters.get('to_time'):
+                to_time = filters['to_time']
+                if isinstance(to_time, str):
+                    to_time = datetime.fromisoformat(to_time)
+                mask &= frame.at_most('reminder_time', to_time)
+            return frame.select(mask, ('reminder_time',))
+        except (TypeError, ValueError):
+            return None
+
     @staticmethod
     def get_by_id(reminder_id):
         """Get a reminder by ID."""
-        reminders = load_dummy_data('reminders')
-        for reminder in reminders:
-            if reminder['id'] == reminder_id:
-                return reminder
-        return None
-    
+        with _reminders.lock:
+            _reminders.refresh()
+            reminder = _reminders.get(reminder_id)
+            return materialize_record(reminder) if reminder else None
+
     @staticmethod
     def create(reminder_data):
         """Create a new reminder."""
-        reminders = list(load_dummy_data('reminders'))
-        
-        # Generate new ID
-        new_id = max([r['id'] for r in reminders], default=0) + 1
-        
         # Handle reminder_time conversion
         reminder_time = reminder_data.get('reminder_time')
         if isinstance(reminder_time, str):
             reminder_time = datetime.fromisoformat(reminder_time)
-        
-        # Create new reminder
-        new_reminder = {
-            'id': new_id,
-            'reminder_type': reminder_data.get('reminder_type'),
-            'target_id': reminder_data.get('target_id'),
-            'title': reminder_data.get('title'),
-            'message': reminder_data.get('message'),
-            'reminder_time': reminder_time,
-            'repeat_interval': reminder_data.get('repeat_interval', 'once'),
-            'is_active': reminder_data.get('is_active', True),
-            'notification_method': reminder_data.get('notification_method', 'app'),
-            'created_at': datetime.utcnow(),
-            'updated_at': datetime.utcnow()
-        }
-        
-        reminders.append(new_reminder)
-        save_dummy_data(reminders, 'reminders')
-        
-        return new_reminder
-    
+
+        def apply():
+            # Create new reminder
+            new_reminder = {
+                'id': _reminders.allocate_id(),
+                'reminder_type': reminder_data.get('reminder_type'),
+                'target_id': reminder_data.get('target_id'),
+                'title': reminder_data.get('title'),
+                'message': reminder_data.get('message'),
+                'reminder_time': reminder_time,
+                'repeat_interval': reminder_data.get('repeat_interval', 'once'),
+                'is_active': reminder_data.get('is_active', True),
+                'notification_method': reminder_data.get('notification_method', 'app'),
+                'created_at': datetime.utcnow(),
+                'updated_at': datetime.utcnow()
+            }
+
+            _reminders.insert(new_reminder)
+            _reminders.commit(new_reminder)
+
+            return materialize_record(new_reminder)
+
+        return _reminders.transact(apply)
+
     @staticmethod
     def update(reminder_id, reminder_data):
         """Update an existing reminder."""
-        reminders = list(load_dummy_data('reminders'))
-        
-        for reminder in reminders:
-            if reminder['id'] == reminder_id:
-                # Handle reminder_time conversion
-                if 'reminder_time' in reminder_data:
-                    reminder_time = reminder_data['reminder_time']
-                    if isinstance(reminder_time, str):
-                        reminder_time = datetime.fromisoformat(reminder_time)
-                    reminder['reminder_time'] = reminder_time
-                
-                # Update other fields
-                if 'title' in reminder_data:
-                    reminder['title'] = reminder_data['title']
-                if 'message' in reminder_data:
-                    reminder['message'] = reminder_data['message']
-                if 'repeat_interval' in reminder_data:
-                    reminder['repeat_interval'] = reminder_data['repeat_interval']
-                if 'is_active' in reminder_data:
-                    reminder['is_active'] = reminder_data['is_active']
-                if 'notification_method' in reminder_data:
-                    reminder['notification_method'] = reminder_data['notification_method']
-                
-                reminder['updated_at'] = datetime.utcnow()
-                
-                save_dummy_data(reminders, 'reminders')
-                return reminder
-                
-        return None
-    
+        changes = {}
+        # Handle reminder_time conversion
+        if 'reminder_time' in reminder_data:
+            reminder_time = reminder_data['reminder_time']
+            if isinstance(reminder_time, str):
+                reminder_time = datetime.fromisoformat(reminder_time)
+            changes['reminder_time'] = reminder_time
+
+        # Update other fields
+        for field in ('title', 'message', 'repeat_interval', 'is_active', 'notification_method'):
+            if field in reminder_data:
+                changes[field] = reminder_data[field]
+
+        changes['updated_at'] = datetime.utcnow()
+
+        def apply():
+            reminder = _reminders.get(reminder_id)
+            if not reminder:
+                return None
+
+            _reminders.update(reminder, changes)
+            _reminders.commit(reminder)
+            return materialize_record(reminder)
+
+        return _reminders.transact(apply)
+
     @staticmethod
     def delete(reminder_id):
         """Delete a reminder."""
-        reminders = list(load_dummy_data('reminders'))
-        
-        for i, reminder in enumerate(reminders):
-            if reminder['id'] == reminder_id:
-                del reminders[i]
-                save_dummy_data(reminders, 'reminders')
-                return True
-                
-        return False
\ No newline at end of file
+        def apply():
+            if _reminders.remove(reminder_id) is None:
+                return False
+
+            _reminders.commit_delete(reminder_id)
+            return True
+
+        return _reminders.transact(apply)
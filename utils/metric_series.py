@@ -0,0 +1,195 @@
+"""
+Columnar time series of health metrics for the JSON repository.
+
+Each (user, metric type) pair gets one series: its metrics sorted by
+``recorded_at``, held as parallel columns of 64-bit timestamps (microseconds
+since the epoch), IDs, values, systolic and diastolic readings (NaN when
+missing). With JSON_METRIC_SERIES=true the series are written to
+data/json_store/metric_series/ and memory-mapped, so a time range is found by
+binary search and sliced without copying or building any Python objects;
+otherwise they are built in memory with ``array``.
+
+The series are derived from the health_metrics collection, which stays the
+source of truth. Series files are a per-process cache: they are rewritten
+whenever the owning process sees the collection change, and each process
+only ever maps files it wrote itself.
+"""
+import math
+import mmap
+import os
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+from utils import data_loader
+
+COLUMNS = ('recorded_at', 'id', 'value', 'systolic', 'diastolic')
+_TYPECODES = ('q', 'q', 'd', 'd', 'd')
+_ITEM_SIZE = 8
+_SUFFIX = '.series'
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def series_store_enabled():
+    """Return True when metric series should be stored in memory-mapped files."""
+    return os.environ.get('JSON_METRIC_SERIES', 'false').lower() in ('true', '1', 'yes')
+
+def series_directory():
+    return os.path.join(data_loader.STORE_DIR, 'metric_series')
+
+def series_key(metric):
+    """Return the (user_id, metric_type) key of the series a metric belongs to."""
+    return metric.get('user_id'), metric.get('metric_type')
+
+def to_epoch(value):
+    """Convert a naive datetime to microseconds since the epoch."""
+    return (value - _EPOCH) // _MICROSECOND
+
+def _to_float(value):
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+class MetricSeries:
+    """
+    One time series, or a time range of one.
+
+    Attributes:
+        recorded_at, id, value, systolic, diastolic: Read-only sequences
+            (memoryviews) of equal length, sorted by recorded_at. Missing or
+            non-numeric readings are NaN.
+    """
+
+    def __init__(self, columns):
+        for name, column in zip(COLUMNS, columns):
+            setattr(self, name, column)
+
+    def __len__(self):
+        return len(self.recorded_at)
+
+    def range(self, start=None, end=None):
+        """
+        Return the part of the series recorded within [start, end] without copying it.
+
+        Args:
+            start (datetime, optional): Inclusive lower bound.
+            end (datetime, optional): Inclusive upper bound.
+        """
+        low = bisect_left(self.recorded_at, to_epoch(start)) if start is not None else 0
+        high = bisect_right(self.recorded_at, to_epoch(end)) if end is not None else len(self)
+        return MetricSeries([getattr(self, name)[low:high] for name in COLUMNS])
+
+    def timestamps(self):
+        """Return recorded_at decoded to datetimes."""
+        return [_EPOCH + timedelta(0, 0, value) for value in self.recorded_at]
+
+def _columns_from_rows(rows):
+    """Sort a series' rows and split them into columns; rows without a timestamp are left out."""
+    rows = sorted(
+        (row for row in rows if row.get('recorded_at') is not None),
+        key=lambda row: (row['recorded_at'], -row['id']),
+    )
+    return [
+        array('q', [to_epoch(row['recorded_at']) for row in rows]),
+        array('q', [row['id'] for row in rows]),
+        array('d', [_to_float(row.get('value')) for row in rows]),
+        array('d', [_to_float(row.get('systolic')) for row in rows]),
+        array('d', [_to_float(row.get('diastolic')) for row in rows]),
+    ]
+
+def _map_columns(file):
+    """Memory-map a series file and return zero-copy views of its columns."""
+    size = os.fstat(file.fileno()).st_size
+    count = size // (_ITEM_SIZE * len(COLUMNS))
+    if count == 0:
+        return [memoryview(array(typecode)) for typecode in _TYPECODES]
+    view = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+    block = count * _ITEM_SIZE
+    return [view[i * block:(i + 1) * block].cast(typecode) for i, typecode in enumerate(_TYPECODES)]
+
+class MetricSeriesStore:
+    """
+    The series of every (user, metric type) pair.
+
+    Args:
+        directory (str, optional): Where to write memory-mapped series files.
+            If None, series are only kept in memory.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._series = {}
+
+    def _path(self, key):
+        user_id, metric_type = key
+        return os.path.join(self.directory, f"{quote(str(user_id), safe='')}-{quote(str(metric_type), safe='')}{_SUFFIX}")
+
+    def write(self, key, rows):
+        """Replace the series for ``key`` with the given metrics."""
+        columns = _columns_from_rows(rows)
+        if not columns[0]:
+            self.discard(key)
+            return
+        if self.directory is None:
+            self._series[key] = MetricSeries([memoryview(column) for column in columns])
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.series.', suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'w+b') as file:
+                for column in columns:
+                    column.tofile(file)
+                file.flush()
+                # Map our own file before it becomes visible under its final
+                # name, so another process replacing it cannot affect us.
+                mapped = _map_columns(file)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._series[key] = MetricSeries(mapped)
+
+    def discard(self, key):
+        """Drop the series for ``key``."""
+        self._series.pop(key, None)
+        if self.directory is not None:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def rebuild(self, rows):
+        """Replace every series with the ones derived from ``rows``."""
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(series_key(row), []).append(row)
+        for key in list(self._series):
+            if key not in grouped:
+                self.discard(key)
+        if self.directory is not None and os.path.isdir(self.directory):
+            # Files left behind by an earlier run
+            current = {os.path.basename(self._path(key)) for key in grouped}
+            for name in os.listdir(self.directory):
+                if name.endswith(_SUFFIX) and name not in current:
+                    os.remove(os.path.join(self.directory, name))
+        for key, series_rows in grouped.items():
+            self.write(key, series_rows)
+
+    def find(self, metric_type=None, user_id=None):
+        """
+        Return the series matching a metric type and/or user.
+
+        Returns:
+            list: MetricSeries instances, one per matching (user, metric type).
+        """
+        return [
+            series for (series_user, series_type), series in self._series.items()
+            if (metric_type is None or series_type == metric_type)
+            and (user_id is None or series_user == user_id)
+        ]
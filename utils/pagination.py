@@ -0,0 +1,160 @@
+import base64
+import json
+from datetime import datetime, date, time
+
+from sqlalchemy import and_, or_, tuple_
+
+# Page size used when only a cursor is given, and the largest page served
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Databases that sort NULL above every other value; the others (SQLite,
+# MySQL) sort it below. Pages keep each database's own NULL order, which is
+# also the order of its indexes.
+NULLS_SORT_HIGH = ('postgresql', 'oracle')
+
+def pagination_requested(args):
+    """
+    Check if a list request asked for a page rather than the whole list.
+
+    Args:
+        args: The request's query arguments.
+
+    Returns:
+        bool: True if 'limit' or 'cursor' was given.
+    """
+    return 'limit' in args or 'cursor' in args
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+def _decode_value(column, value):
+    python_type = column.type.python_type
+    if value is None:
+        return None
+    if python_type in (datetime, date, time):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+def encode_cursor(values):
+    """Encode the sort key of the last row of a page as an opaque cursor."""
+    payload = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, columns):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): The cursor.
+        columns (tuple): The sort columns the cursor was made for.
+
+    Returns:
+        list: The sort key values, converted to the columns' Python types.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [_decode_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError('Invalid cursor')
+
+def parse_limit(args):
+    """
+    Read the page size from the request's query arguments.
+
+    Raises:
+        ValueError: If 'limit' is not a positive integer.
+    """
+    limit = args.get('limit')
+    if limit is None:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be a positive integer')
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+    return min(limit, MAX_LIMIT)
+
+def _nullable(column):
+    return getattr(column.expression, 'nullable', True)
+
+def _after(columns, values, descending, nulls_before):
+    """
+    Build the condition selecting the rows that sort after the key ``values``.
+
+    Rows whose key has no NULL columns are compared as a row value, which
+    databases serve with a single index range. A NULL in a nullable column
+    forms its own group, placed before or after the other values of that
+    column according to ``nulls_before``.
+    """
+    column, value = columns[0], values[0]
+    if not any(_nullable(c) for c in columns) or (value is not None and not any(_nullable(c) for c in columns[1:])):
+        key, cursor = tuple_(*columns), tuple_(*values)
+        condition = key < cursor if descending else key > cursor
+    elif value is None:
+        condition = column.is_(None)
+        if len(columns) > 1:
+            condition = and_(condition, _after(columns[1:], values[1:], descending, nulls_before))
+    else:
+        condition = or_(
+            column < value if descending else column > value,
+            and_(column == value, _after(columns[1:], values[1:], descending, nulls_before)),
+        )
+    if _nullable(column):
+        if value is None and nulls_before:
+            condition = or_(condition, column.is_not(None))
+        elif value is not None and not nulls_before:
+            condition = or_(condition, column.is_(None))
+    return condition
+
+def paginate(query, columns, args, descending=False):
+    """
+    Return one page of a query using keyset (cursor) pagination.
+
+    Rows are ordered by ``columns``, whose last entry must be unique (the
+    primary key), and each page starts strictly after the cursor's sort key.
+    Every page is a single index range scan, so its cost does not depend on
+    how many pages came before it. Rows with NULL in a nullable sort column
+    are included, in the database's own NULL order (see NULLS_SORT_HIGH).
+
+    Args:
+        query: The filtered query; any existing ordering is replaced.
+        columns (tuple): Sort columns, e.g. (HealthMetric.recorded_at, HealthMetric.id).
+        args: The request's query arguments ('limit', 'cursor').
+        descending (bool): Sort newest/largest first.
+
+    Returns:
+        tuple: (list of rows, cursor for the next page or None on the last page)
+
+    Raises:
+        ValueError: If 'limit' or 'cursor' is invalid.
+    """
+    limit = parse_limit(args)
+    cursor = args.get('cursor')
+
+    query = query.order_by(None).order_by(*[column.desc() if descending else column.asc() for column in columns])
+    if cursor:
+        decoded = decode_cursor(cursor, columns)
+        nulls_high = query.session.get_bind().dialect.name in NULLS_SORT_HIGH
+        nulls_before = nulls_high == descending
+        query = query.filter(_after(columns, decoded, descending, nulls_before))
+        if len(columns) > 1 and decoded[0] is not None and (nulls_before or not _nullable(columns[0])):
+            # Implied by the row comparison, but PostgreSQL only prunes
+            # partitions on plain comparisons of the leading column
+            query = query.filter(columns[0] <= decoded[0] if descending else columns[0] >= decoded[0])
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, column.key) for column in columns])
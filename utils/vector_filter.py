@@ -0,0 +1,151 @@
+"""
+NumPy-backed filtering for the JSON repository.
+
+A VectorFrame holds selected fields of a collection as NumPy columns: type
+codes for categorical fields (metric_type, status, ...) and int64 values for
+datetimes (microseconds), dates (days) and times (microseconds since
+midnight). Filters become boolean masks over those columns, and the matching
+rows are returned sorted with a stable lexsort, in the same order as the
+pure-Python path.
+
+Building a frame is O(n) in Python, so frames are cached until the
+collection changes, and only used for collections of at least
+JSON_VECTOR_FILTER_MIN_ROWS rows (see benchmarks/vector_filtering.py for
+where the crossover lies). NumPy is optional: without it the repositories
+keep filtering with plain Python.
+"""
+import os
+import warnings
+from datetime import datetime, date, time
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# NumPy datetime64 unit used for each temporal column kind
+_TEMPORAL_UNITS = {'datetime': 'us', 'date': 'D'}
+
+def vector_min_rows():
+    """Smallest collection size for which the NumPy path is used."""
+    return int(os.environ.get('JSON_VECTOR_FILTER_MIN_ROWS', '2000'))
+
+def vector_filtering_enabled(row_count):
+    """Return True if a collection of ``row_count`` rows should be filtered with NumPy."""
+    return NUMPY_AVAILABLE and row_count >= vector_min_rows()
+
+def _time_to_int(value):
+    if value is None:
+        return None
+    if not isinstance(value, time) or value.tzinfo is not None:
+        raise TypeError(f'not a naive time: {value!r}')
+    return ((value.hour * 60 + value.minute) * 60 + value.second) * 1000000 + value.microsecond
+
+def _temporal_to_int(kind, value):
+    """Convert one filter bound to the int64 form of a temporal column."""
+    if kind == 'time':
+        return _time_to_int(value)
+    if kind == 'date' and isinstance(value, datetime):
+        raise TypeError('cannot compare a date column with a datetime')
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        raise TypeError('cannot compare naive and aware datetimes')
+    if not isinstance(value, date):
+        raise TypeError(f'not a {kind}: {value!r}')
+    return int(np.datetime64(value, _TEMPORAL_UNITS[kind]).astype(np.int64))
+
+class VectorFrame:
+    """
+    Columns of one collection, for mask-based filtering.
+
+    Args:
+        rows (iterable): The collection's rows, in storage order.
+        columns (dict): Maps each field to 'category', 'datetime', 'date' or 'time'.
+
+    Raises:
+        TypeError, ValueError: If a column holds values it cannot represent
+            exactly (e.g. timezone-aware datetimes); callers then fall back to
+            filtering in Python.
+    """
+
+    def __init__(self, rows, columns):
+        self.rows = list(rows)
+        self.kinds = dict(columns)
+        self.columns = {}
+        self.nulls = {}
+        self.codes = {}
+        for field, kind in self.kinds.items():
+            values = [row.get(field) for row in self.rows]
+            if kind == 'category':
+                # Dict lookup matches values the way == does (e.g. 1 and True)
+                codes = self.codes[field] = {}
+                self.columns[field] = np.fromiter(
+                    (codes.setdefault(value, len(codes)) for value in values), dtype=np.int64, count=len(values)
+                )
+                continue
+            if kind == 'time':
+                ints = [_time_to_int(value) for value in values]
+                nulls = np.fromiter((value is None for value in ints), dtype=bool, count=len(ints))
+                column = np.fromiter((0 if value is None else value for value in ints), dtype=np.int64, count=len(ints))
+            else:
+                if kind == 'date' and any(isinstance(value, datetime) for value in values):
+                    raise TypeError(f'{field} holds datetimes')
+                with warnings.catch_warnings():
+                    # NumPy drops timezones with a warning; treat it as unrepresentable
+                    warnings.simplefilter('error')
+                    try:
+                        column = np.array(values, dtype=f'datetime64[{_TEMPORAL_UNITS[kind]}]').astype(np.int64)
+                    except UserWarning as e:
+                        raise TypeError(f'{field}: {e}') from e
+                nulls = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+            self.columns[field] = column
+            self.nulls[field] = nulls
+
+    def __len__(self):
+        return len(self.rows)
+
+    def all(self):
+        """Return a mask selecting every row."""
+        return np.ones(len(self.rows), dtype=bool)
+
+    def equals(self, field, value):
+        """Return a mask of the rows whose categorical ``field`` == ``value``."""
+        code = self.codes[field].get(value)
+        if code is None:
+            return np.zeros(len(self.rows), dtype=bool)
+        return self.columns[field] == code
+
+    def _bound(self, field, value):
+        if self.nulls[field].any():
+            # Python raises comparing None with a bound; let it do so
+            raise TypeError(f'{field} has missing values')
+        return _temporal_to_int(self.kinds[field], value)
+
+    def at_least(self, field, value):
+        """Return a mask of the rows whose temporal ``field`` >= ``value``."""
+        return self.columns[field] >= self._bound(field, value)
+
+    def at_most(self, field, value):
+        """Return a mask of the rows whose temporal ``field`` <= ``value``."""
+        return self.columns[field] <= self._bound(field, value)
+
+    def select(self, mask, sort_by=(), descending=False):
+        """
+        Return the rows selected by ``mask``, stably sorted by the given temporal fields.
+
+        Returns:
+            list: The matching rows, or None if a sort field is missing on
+                  one of them (the caller then sorts in Python).
+        """
+        indexes = np.flatnonzero(mask)
+        if sort_by:
+            keys = []
+            for field in reversed(sort_by):
+                if self.nulls[field][indexes].any():
+                    return None
+                key = self.columns[field][indexes]
+                keys.append(-key if descending else key)
+            indexes = indexes[np.lexsort(keys)]
+        rows = self.rows
+        return [rows[i] for i in indexes.tolist()]